@@ -0,0 +1,81 @@
+from typing import Dict, List, Mapping, Sequence
+import pandas as pd
+from date_idea import DateIdea
+
+# stats key -> DateIdea attribute holding a list of values
+MULTI_VALUE_FIELDS = (('by_liked_by', 'liked_by'), ('by_location', 'location'), ('by_tag', 'tags'))
+
+class IdeaFrames:
+    """
+    Columnar view of an idea catalog: one row per idea plus one (idea_id, value) table per
+    list attribute. Built once per catalog version and reused by every analysis.
+    """
+    def __init__(self, ideas: Sequence[DateIdea]):
+        self.names = pd.Series([idea.name for idea in ideas], dtype=object)
+        # History refers to ideas by name; the first idea with a name wins, as in the original lookup.
+        first = ~self.names.duplicated()
+        self.name_to_id = pd.Series(self.names.index[first], index=self.names[first].values)
+        self.values: Dict[str, pd.DataFrame] = {}
+        for _, attr in MULTI_VALUE_FIELDS:
+            pairs = [(idea_id, value) for idea_id, idea in enumerate(ideas) for value in getattr(idea, attr)]
+            self.values[attr] = pd.DataFrame(pairs, columns=['idea_id', 'value'])
+        # Keys of the zero-filled result, per stats key; iterating a Series element-wise is slow
+        self.keys: Dict[str, List] = {'by_idea': list(set(self.names.tolist()))}
+        for key, attr in MULTI_VALUE_FIELDS:
+            self.keys[key] = list(set(self.values[attr]['value'].tolist()))
+
+def _empty_stats(frames: IdeaFrames) -> Dict:
+    return {
+        'by_idea': dict.fromkeys(frames.keys['by_idea'], 0),
+        **{key: dict.fromkeys(frames.keys[key], 0) for key, _ in MULTI_VALUE_FIELDS},
+        'total': 0
+    }
+
+def count_stats(frames: IdeaFrames, history: List[Dict]) -> Dict:
+    """
+    Counts history entries per idea, liked_by, location and tag, joining history to the
+    catalog once on idea id instead of searching the catalog for every entry.
+    """
+    if not history:
+        return _empty_stats(frames)
+    activity = pd.DataFrame(history, columns=['activity_name'])['activity_name']
+    return stats_from_activity_counts(frames, activity.value_counts())
+
+def stats_from_activity_counts(frames: IdeaFrames, activity_counts: Mapping[str, int]) -> Dict:
+    """Same as count_stats, starting from per-activity counts such as DateStats.by_activity."""
+    stats = _empty_stats(frames)
+    counts = pd.Series(activity_counts, dtype='int64')
+    if counts.empty or frames.names.empty:
+        return stats
+    idea_ids = counts.index.map(frames.name_to_id)
+    known = ~pd.isna(idea_ids)
+    per_idea = pd.Series(counts.values[known], index=idea_ids[known].astype('int64'))
+    stats['total'] = int(per_idea.sum())
+    stats['by_idea'].update(zip(frames.names[per_idea.index].tolist(), per_idea.tolist()))
+    for key, attr in MULTI_VALUE_FIELDS:
+        values = frames.values[attr]
+        weights = values['idea_id'].map(per_idea)
+        matched = weights.notna()
+        totals = weights[matched].astype('int64').groupby(values['value'][matched]).sum()
+        stats[key].update(zip(totals.index.tolist(), totals.tolist()))
+    return stats
+
+def balance_suggestions(stats: Dict) -> List[str]:
+    """Turns counts into suggestions for the least represented locations, people and tags."""
+    suggestions = []
+    if stats['by_location'] and len(stats['by_location']) > 1:
+        min_count = min(stats['by_location'].values())
+        min_locs = [loc for loc, count in stats['by_location'].items() if count == min_count]
+        if min_locs:
+            suggestions.append(f"Try more activities at: {', '.join(min_locs)}")
+    if stats['by_liked_by'] and len(stats['by_liked_by']) > 1:
+        min_count = min(stats['by_liked_by'].values())
+        min_people = [person for person, count in stats['by_liked_by'].items() if count == min_count]
+        if min_people:
+            suggestions.append(f"Try more activities liked by: {', '.join(min_people)}")
+    if stats['by_tag'] and len(stats['by_tag']) > 1:
+        min_count = min(stats['by_tag'].values())
+        min_tags = [tag for tag, count in stats['by_tag'].items() if count == min_count]
+        if min_tags:
+            suggestions.append(f"Try more activities with tag: {', '.join(min_tags)}")
+    return suggestions
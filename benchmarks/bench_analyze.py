@@ -0,0 +1,64 @@
+"""
+Compares the vectorized analytics behind DateIdeaManager.analyze with the original
+per-entry catalog scan.
+
+    python -m benchmarks.bench_analyze [--sizes 1000 5000 10000]
+"""
+import argparse
+import time
+from analytics import IdeaFrames, count_stats
+from benchmarks.synthetic import make_ideas, make_history
+
+def legacy_stats(ideas, history):
+    """The original analyze() counting loop, kept here as the reference implementation."""
+    all_liked_by, all_locations, all_tags, all_ideas = set(), set(), set(), set()
+    for idea in ideas:
+        all_ideas.add(idea.name)
+        all_liked_by.update(idea.liked_by)
+        all_locations.update(idea.location)
+        all_tags.update(idea.tags)
+    stats = {
+        'by_idea': {name: 0 for name in all_ideas},
+        'by_liked_by': {person: 0 for person in all_liked_by},
+        'by_location': {loc: 0 for loc in all_locations},
+        'by_tag': {tag: 0 for tag in all_tags},
+        'total': 0
+    }
+    for entry in history:
+        idea = next((i for i in ideas if i.name == entry['activity_name']), None)
+        if not idea:
+            continue
+        stats['by_idea'][idea.name] += 1
+        for person in idea.liked_by:
+            stats['by_liked_by'][person] += 1
+        for loc in idea.location:
+            stats['by_location'][loc] += 1
+        for tag in idea.tags:
+            stats['by_tag'][tag] += 1
+        stats['total'] += 1
+    return stats
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000],
+                        help='catalog size; the history gets the same number of entries')
+    args = parser.parse_args()
+    print(f"{'ideas':>8} {'history':>8} {'legacy (s)':>12} {'frames (s)':>12} {'counts (s)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        ideas = make_ideas(size)
+        history = make_history(ideas, size)
+        expected, legacy_time = timed(legacy_stats, ideas, history)
+        frames, frames_time = timed(IdeaFrames, ideas)
+        stats, count_time = timed(count_stats, frames, history)
+        if stats != expected:
+            raise AssertionError(f"vectorized stats differ from the reference at size {size}")
+        print(f"{size:>8} {size:>8} {legacy_time:>12.4f} {frames_time:>12.4f} {count_time:>12.4f} "
+              f"{legacy_time / (frames_time + count_time):>7.1f}x")
+
+if __name__ == '__main__':
+    main()
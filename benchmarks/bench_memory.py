@@ -0,0 +1,43 @@
+"""
+Compares the memory held by a list of DateIdea objects with a CompactCatalog of the
+same ideas, measured with tracemalloc. Name strings are shared by both and excluded.
+
+    python -m benchmarks.bench_memory [--sizes 10000 100000 1000000]
+"""
+import argparse
+import gc
+import tracemalloc
+from date_idea import DateIdea
+from idea_catalog import CompactCatalog
+from benchmarks.synthetic import make_ideas
+
+def fresh_copy(idea: DateIdea) -> DateIdea:
+    # make_ideas shares list objects between ideas; a real catalog loaded from JSON does not
+    return DateIdea(idea.name, list(idea.liked_by), list(idea.location), list(idea.tags),
+                    idea.cost, idea.max_people, idea.cost_type)
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    print(f"{'ideas':>9} {'list (MB)':>10} {'compact (MB)':>13} {'ratio':>7}")
+    for size in args.sizes:
+        source = make_ideas(size)
+        ideas, list_bytes = traced(lambda: [fresh_copy(idea) for idea in source])
+        catalog, compact_bytes = traced(lambda: CompactCatalog(ideas))
+        if catalog[size // 2] != ideas[size // 2]:
+            raise AssertionError("CompactCatalog view differs from the original idea")
+        print(f"{size:>9} {list_bytes / 2**20:>10.1f} {compact_bytes / 2**20:>13.1f} {list_bytes / compact_bytes:>6.1f}x")
+        del ideas, catalog
+
+if __name__ == '__main__':
+    main()
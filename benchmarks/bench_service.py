@@ -0,0 +1,123 @@
+"""
+Load test for the HTTP service: requests per second and latency percentiles under
+concurrent keep-alive clients.
+
+    python -m benchmarks.bench_service [--concurrency 32] [--duration 10] [--target 127.0.0.1:8765]
+
+Without --target, a service is started in a subprocess on a synthetic catalog and history.
+The request mix is weighted towards sampling, with some history pages, analysis and
+recorded dates (--write-share) so the writer queue and cache invalidation are exercised.
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from benchmarks.synthetic import make_history, make_ideas
+
+def _request_mix(rng: random.Random, n_ideas: int, write_share: float) -> Tuple[str, str, bytes]:
+    if rng.random() < write_share:
+        body = json.dumps({'name': f"Idea {rng.randrange(n_ideas)}", 'n_people': 2}).encode()
+        return 'record', f"POST /record HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n", body
+    roll = rng.random()
+    if roll < 0.5:
+        target = f"/sample?n_people=2&max_cost={rng.choice([100, 500, 2000])}&location={rng.choice(['home', 'outside'])}"
+        return 'sample', f"GET {target} HTTP/1.1\r\n\r\n", b''
+    if roll < 0.7:
+        return 'batch', f"GET /sample/batch?n=5&n_people=2&max_cost=500&seed={rng.randrange(8)} HTTP/1.1\r\n\r\n", b''
+    if roll < 0.95:
+        return 'history', f"GET /history?offset={rng.randrange(5) * 50}&limit=50 HTTP/1.1\r\n\r\n", b''
+    return 'analyze', "GET /analyze HTTP/1.1\r\n\r\n", b''
+
+async def _client(host: str, port: int, deadline: float, seed: int, n_ideas: int, write_share: float,
+                  latencies: Dict[str, List[float]], errors: List[int]):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            kind, head, body = _request_mix(rng, n_ideas, write_share)
+            start = time.perf_counter()
+            writer.write(head.encode('latin-1') + body)
+            response = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in response.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies[kind].append(time.perf_counter() - start)
+            if not response.startswith(b'HTTP/1.1 200'):
+                errors.append(1)
+    finally:
+        writer.close()
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))] if values else 0.0
+
+async def _run(host: str, port: int, args) -> Tuple[Dict[str, List[float]], int, float]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: List[int] = []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(_client(host, port, deadline, i, args.ideas, args.write_share, latencies, errors)
+                           for i in range(args.concurrency)))
+    return latencies, len(errors), time.perf_counter() - start
+
+def _start_service(tmp: str, args) -> Tuple[subprocess.Popen, int]:
+    ideas = make_ideas(args.ideas)
+    ideas_file = os.path.join(tmp, 'ideas.json')
+    with open(ideas_file, 'w', encoding='utf-8') as f:
+        json.dump([dataclasses.asdict(idea) for idea in ideas], f)
+    with open(os.path.join(tmp, 'history.json'), 'w', encoding='utf-8') as f:
+        json.dump(make_history(ideas, args.history), f)
+    # The .jsonl journal imports history.json, then appends one line per recorded date
+    history_file = os.path.join(tmp, 'history.jsonl')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'date_service', '--port', '0', '--ideas', ideas_file, '--history', history_file],
+        stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('Serving on'):
+        process.kill()
+        raise RuntimeError("service failed to start")
+    return process, int(line.rsplit(':', 1)[1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--target', help='host:port of a running service (default: start one)')
+    parser.add_argument('--ideas', type=int, default=5000)
+    parser.add_argument('--history', type=int, default=20000)
+    parser.add_argument('--write-share', dest='write_share', type=float, default=0.05)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        process = None
+        if args.target:
+            host, port = args.target.rsplit(':', 1)
+            port = int(port)
+        else:
+            process, port = _start_service(tmp, args)
+            host = '127.0.0.1'
+        try:
+            latencies, errors, elapsed = asyncio.run(_run(host, port, args))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    everything = [t for values in latencies.values() for t in values]
+    print(f"{args.concurrency} clients, {elapsed:.1f}s, {len(everything)} requests, {errors} errors")
+    print(f"{'request':>8} {'count':>7} {'p50 ms':>7} {'p99 ms':>7}")
+    for kind in sorted(latencies) + ['all']:
+        values = everything if kind == 'all' else latencies[kind]
+        print(f"{kind:>8} {len(values):>7} {_percentile(values, 50) * 1000:>7.2f} {_percentile(values, 99) * 1000:>7.2f}")
+    print(f"throughput {len(everything) / elapsed:.0f} req/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Measures budget simulation throughput (sessions per second) for increasing worker
+counts, checking that every worker count produces the same result.
+
+    python -m benchmarks.bench_simulate [--sessions 1000000] [--workers 1 2 4 8]
+"""
+import argparse
+import dataclasses
+import json
+import os
+import tempfile
+import time
+from date_manager import DateIdeaManager
+from simulator import simulate_budget
+from benchmarks.synthetic import make_ideas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--ideas', type=int, default=5000)
+    parser.add_argument('--budget', type=float, default=3000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        ideas_file = os.path.join(tmp, 'ideas.json')
+        with open(ideas_file, 'w', encoding='utf-8') as f:
+            json.dump([dataclasses.asdict(idea) for idea in make_ideas(args.ideas)], f)
+        manager = DateIdeaManager(ideas_file, history_file=os.path.join(tmp, 'history.json'))
+        print(f"{os.cpu_count()} cores, {args.sessions} sessions, {args.ideas} ideas")
+        print(f"{'workers':>8} {'seconds':>8} {'sessions/s':>11} {'speedup':>8}")
+        baseline = reference = None
+        for workers in sorted(set(args.workers)):
+            start = time.perf_counter()
+            result = simulate_budget(manager, args.budget, n_people=2, sessions=args.sessions, workers=workers)
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference, baseline = result, elapsed
+            elif result != reference:
+                raise AssertionError(f"workers={workers} produced a different result")
+            print(f"{workers:>8} {elapsed:>8.2f} {args.sessions / elapsed:>11.0f} {baseline / elapsed:>7.1f}x")
+        print(f"mean dates {reference.mean_dates:.2f}, mean spend ₹{reference.mean_spend:.0f} "
+              f"(p10 ₹{reference.spend_percentile(10):.0f}, p90 ₹{reference.spend_percentile(90):.0f}), "
+              f"budget-limited {reference.budget_limited:.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Guards the cold-start import budget of the modules the app loads before its first screen.
+
+Runs `python -X importtime` in a fresh interpreter, reports the cumulative import time of
+each module, and exits non-zero if the budget is exceeded or if a heavy dependency
+(pandas, matplotlib, numpy) is imported eagerly.
+
+    python -m benchmarks.bench_startup [--budget-ms 150] [--runs 5]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+STARTUP_MODULES = ['date_manager', 'charts']
+DEFERRED = ('pandas', 'matplotlib', 'matplotlib_venn', 'numpy')
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+def import_times(modules):
+    """Returns ({top-level module: cumulative microseconds}, set of all imported modules)."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modules)],
+        cwd=root, capture_output=True, text=True, check=True,
+    )
+    cumulative, imported = {}, set()
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.add(name)
+        if name in modules:
+            cumulative[name] = int(match.group(2))
+    return cumulative, imported
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--budget-ms', type=float, default=150.0, help='budget for the summed cumulative import time')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to run; the best run is kept')
+    args = parser.parse_args()
+    best, imported = None, set()
+    for _ in range(args.runs):
+        cumulative, imported = import_times(STARTUP_MODULES)
+        if best is None or sum(cumulative.values()) < sum(best.values()):
+            best = cumulative
+    for name in STARTUP_MODULES:
+        print(f"{name:<16} {best.get(name, 0) / 1000:8.1f} ms")
+    total_ms = sum(best.values()) / 1000
+    print(f"{'total':<16} {total_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    eager = sorted(name for name in imported if name.split('.')[0] in DEFERRED)
+    failures = []
+    if eager:
+        failures.append(f"heavy modules imported at startup: {', '.join(eager[:5])}")
+    if total_ms > args.budget_ms:
+        failures.append(f"startup imports took {total_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
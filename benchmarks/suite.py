@@ -0,0 +1,319 @@
+"""
+Benchmark suite: latency and throughput of sampling, analysis, history persistence, idea
+loading and charts on synthetic data, compared against stored baseline results.
+
+    python -m benchmarks.suite [--sizes 1000 100000 1000000] [--only sample analyze]
+                               [--baseline benchmarks/baseline.json] [--save-baseline] [--tolerance 0.25]
+
+Each size N means a catalog of N ideas and a history of N dates (catalogs of 1M ideas
+use compact=True, as an app of that size would). Every case is run repeatedly for at
+least --min-time seconds and reports its median time per call and operations per second.
+
+Timings only mean something on the machine that recorded them, so a baseline file holds
+one set of results per machine, keyed by a fingerprint of the CPU model, CPU count, OS and
+Python version. Each result is compared with this machine's baseline median and the run
+exits non-zero if any case is slower by more than --tolerance (0.25 = 25%). If the file has
+no results for this machine the run only reports its timings, with a notice, and exits 0;
+a missing baseline file is still an error rather than a run with nothing to compare.
+--save-baseline stores this run's results under this machine's key instead, keeping the
+other machines' results and this machine's results at sizes that were not run.
+"""
+import argparse
+import dataclasses
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from benchmarks.synthetic import make_history, make_ideas
+
+COMPACT_FROM = 1_000_000
+# Charts draw one bar per activity, so they are rendered for a history over this many activities
+CHART_ACTIVITIES = 30
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+def machine_key() -> str:
+    """Fingerprint of what the timings depend on: CPU model and count, OS and Python version."""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            cpu = next((line.split(':', 1)[1].strip() for line in f if line.startswith('model name')), cpu)
+    except OSError:
+        pass
+    python = '.'.join(platform.python_version_tuple()[:2])
+    return f"{platform.system()} {platform.machine()}, {cpu}, {os.cpu_count()} CPUs, Python {python}"
+
+class Fixture:
+    """Synthetic files and a loaded manager for one size, shared by all cases at that size."""
+    def __init__(self, size: int, directory: str):
+        from date_manager import DateIdeaManager
+        self.size = size
+        self.directory = directory
+        self.ideas = make_ideas(size)
+        self.history = make_history(self.ideas, size)
+        self.ideas_file = self.path('ideas.json')
+        with open(self.ideas_file, 'w', encoding='utf-8') as f:
+            json.dump([dataclasses.asdict(idea) for idea in self.ideas], f)
+        with open(self.path('history.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.history, f)
+        # The journal imports history.json on first use and appends one line per date
+        self.manager = DateIdeaManager(self.ideas_file, history_file=self.path('history.jsonl'),
+                                       compact=size >= COMPACT_FROM)
+        # Measure the code rather than the disk
+        self.manager.history.journal.fsync = False
+        # Build the lazy structures a running app would already have (history writes keep
+        # the weighted sampler in sync once it exists), so cases do not depend on run order
+        self.manager.novelty_sampler()
+        self.manager.analyze()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+# name -> function(fixture) returning (callable to time, operations per call)
+CASES: Dict[str, Callable[[Fixture], Tuple[Callable[[], object], int]]] = {}
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+@case('sample')
+def _sample(fx: Fixture):
+    return lambda: fx.manager.sample_idea(location='home', max_cost=500, n_people=2), 1
+
+@case('sample_weighted')
+def _sample_weighted(fx: Fixture):
+    return lambda: fx.manager.sample_idea(location='home', max_cost=500, n_people=2, weighted=True), 1
+
+@case('batch_sample')
+def _batch_sample(fx: Fixture):
+    return lambda: fx.manager.sample_ideas(100, max_cost=500, n_people=2), 100
+
+@case('analyze')
+def _analyze(fx: Fixture):
+    return fx.manager.analyze, 1
+
+@case('similar')
+def _similar(fx: Fixture):
+    names = [idea.name for idea in fx.ideas[::max(1, len(fx.ideas) // 1000)]]
+    queries = iter(names * 10_000)
+    # A different idea on every call, so most lookups miss the neighbour cache
+    return lambda: fx.manager.similar_ideas(next(queries), 10), 1
+
+@case('plan')
+def _plan(fx: Fixture):
+    from planner import plan_itinerary
+    return lambda: plan_itinerary(fx.manager, 8, 4000, 2, max_per_location=4, timeout=None), 1
+
+@case('history_append_clear')
+def _history_append_clear(fx: Fixture):
+    manager = fx.manager
+    idea = manager.ideas[0]
+
+    def run():
+        # Record then undo, so the history keeps its size across runs
+        manager.record_date(idea, date='2030-01-01', n_people=2)
+        manager.clear_history(1)
+    return run, 2
+
+@case('edit_idea')
+def _edit_idea(fx: Fixture):
+    manager = fx.manager
+    idea = manager.ideas[0]
+    # Each edit copies the catalog and index before publishing them
+    return lambda: manager.update_idea(0, idea), 1
+
+@case('edit_batch')
+def _edit_batch(fx: Fixture):
+    manager = fx.manager
+    ideas = [manager.ideas[position] for position in range(100)]
+
+    def run():
+        with manager.edit_batch():
+            for position, idea in enumerate(ideas):
+                manager.update_idea(position, idea)
+    return run, 100
+
+@case('history_save')
+def _history_save(fx: Fixture):
+    from date_history import DateHistory
+    history = DateHistory(fx.path('history.json'))
+    return history.save, 1
+
+@case('load_ideas')
+def _load_ideas(fx: Fixture):
+    from idea_loader import cache_path, load_ideas
+    cache = cache_path(fx.ideas_file)
+
+    def run():
+        # Cold: parse and validate the JSON, then write the cache
+        if os.path.exists(cache):
+            os.remove(cache)
+        return load_ideas(fx.ideas_file)
+    return run, 1
+
+@case('load_ideas_cached')
+def _load_ideas_cached(fx: Fixture):
+    from idea_loader import load_ideas
+    load_ideas(fx.ideas_file)
+    return lambda: load_ideas(fx.ideas_file), 1
+
+@case('chart_specs')
+def _chart_specs(fx: Fixture):
+    from charts import chart_specs
+    return lambda: chart_specs(fx.manager.snapshot().stats), 1
+
+@case('render_charts')
+def _render_charts(fx: Fixture):
+    from charts import chart_specs, render_chart
+    from date_stats import DateStats
+    stats = DateStats(fx.path('charts.stats.json'), fx.manager.find_idea)
+    stats.rebuild(make_history(fx.ideas[:CHART_ACTIVITIES], fx.size))
+    # What the Visualizations screen renders on a cache miss
+    return lambda: [render_chart(spec) for spec in chart_specs(stats)], 1
+
+def measure(run: Callable[[], object], min_time: float, max_runs: int = 10_000) -> List[float]:
+    """Times run() repeatedly, after one warm-up call, for at least min_time seconds (and at least 3 runs unless one is slower than min_time)."""
+    run()
+    times: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(times) < max_runs:
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time and (len(times) >= 3 or elapsed >= 2 * min_time):
+                break
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return times
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(DEFAULT_BASELINE), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes: List[int], names: List[str], min_time: float) -> Dict:
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            fixture = Fixture(size, tmp)
+            print(f"size {size}: fixture built in {time.perf_counter() - started:.1f}s", flush=True)
+            for name in names:
+                run, ops = CASES[name](fixture)
+                times = measure(run, min_time)
+                median = statistics.median(times)
+                results[f'{name}@{size}'] = {
+                    'case': name, 'size': size, 'runs': len(times),
+                    'median_s': median, 'min_s': min(times), 'ops_per_s': ops / median if median else None,
+                }
+            fixture.manager.history.journal.close()
+    return {
+        'meta': {'machine': machine_key(), 'python': platform.python_version(), 'platform': platform.platform(),
+                 'processor': platform.processor() or platform.machine(), 'cpus': os.cpu_count(), 'commit': _commit(),
+                 'date': datetime.now().isoformat(timespec='seconds')},
+        'results': results,
+    }
+
+def _format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+def compare(run: Dict, baseline: Optional[Dict], tolerance: float) -> List[str]:
+    """Prints the results next to the baseline and returns the keys that regressed."""
+    regressions = []
+    base = (baseline or {}).get('results', {})
+    print(f"{'case':<22} {'size':>8} {'median':>11} {'ops/s':>12} {'baseline':>11} {'change':>8}")
+    for key, result in run['results'].items():
+        line = (f"{result['case']:<22} {result['size']:>8} {_format_time(result['median_s']):>11} "
+                f"{result['ops_per_s'] or 0:>12.0f}")
+        previous = base.get(key)
+        if baseline is not None and not previous:
+            line += f" {'-':>11} {'':>8}  not in baseline"
+        if previous:
+            change = result['median_s'] / previous['median_s'] - 1
+            flag = '  SLOWER' if change > tolerance else ''
+            line += f" {_format_time(previous['median_s']):>11} {change:>+7.0%}{flag}"
+            if change > tolerance:
+                regressions.append(key)
+        print(line)
+    return regressions
+
+def load_baseline(path: str, machine: str) -> Optional[Dict]:
+    """This machine's results in the baseline file at `path`, or None if it has none."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('machines', {}).get(machine)
+
+def save_baseline(path: str, run: Dict):
+    """Stores `run` as its machine's baseline in `path`, over any earlier results for the same cases."""
+    machines = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            machines = json.load(f).get('machines', {})
+    entry = machines.setdefault(run['meta']['machine'], {'results': {}})
+    entry['meta'] = run['meta']
+    entry['results'] = dict(sorted({**entry['results'], **run['results']}.items(),
+                                   key=lambda item: (item[1]['size'], item[0])))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'machines': machines}, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100_000])
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), help='run only these cases')
+    parser.add_argument('--min-time', dest='min_time', type=float, default=0.5, help='seconds per case (default 0.5)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline results file')
+    parser.add_argument('--save-baseline', dest='save_baseline', action='store_true',
+                        help='store this run as the baseline instead of comparing against it')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before failing (0.25 = 25%%)')
+    parser.add_argument('--output', help='also write this run\'s results to a JSON file')
+    args = parser.parse_args()
+    baseline = None
+    if not args.save_baseline:
+        if not os.path.exists(args.baseline):
+            # Checked before running, so a missing baseline cannot pass as "no regressions"
+            sys.exit(f"error: baseline file {args.baseline} not found; record one on this machine with "
+                     f"`python -m benchmarks.suite --save-baseline --baseline {args.baseline}`")
+        machine = machine_key()
+        baseline = load_baseline(args.baseline, machine)
+        if baseline is None:
+            # Another machine's timings would flag (or hide) differences in hardware, not code
+            print(f"notice: {args.baseline} has no results for this machine ({machine}), so this run is "
+                  f"not compared; record them with `python -m benchmarks.suite --save-baseline "
+                  f"--baseline {args.baseline}`")
+        else:
+            meta = baseline['meta']
+            print(f"comparing with the baseline for {machine} from {meta.get('date')} (commit {meta.get('commit')})")
+    run = run_suite(args.sizes, args.only or list(CASES), args.min_time)
+    regressions = compare(run, baseline, args.tolerance)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f"results written to {args.output}")
+    if args.save_baseline:
+        save_baseline(args.baseline, run)
+        print(f"baseline for {run['meta']['machine']} written to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
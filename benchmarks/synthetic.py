@@ -0,0 +1,34 @@
+"""Synthetic idea catalogs and histories for the benchmarks."""
+import random
+from typing import Dict, List, Optional
+from date_idea import DateIdea
+
+TAGS = ['relaxing', 'adventure', 'active', 'fitness', 'creative', 'puzzle', 'game', 'food',
+        'music', 'romantic', 'learning', 'social', 'outdoors', 'culture', 'budget', 'luxury']
+
+def make_ideas(n: int, seed: int = 0) -> List[DateIdea]:
+    rng = random.Random(seed)
+    ideas = []
+    for i in range(n):
+        ideas.append(DateIdea(
+            name=f"Idea {i}",
+            liked_by=rng.choice([['bf'], ['gf'], ['bf', 'gf']]),
+            location=rng.choice([['home'], ['outside'], ['home', 'outside']]),
+            tags=rng.sample(TAGS, rng.randint(0, 4)),
+            cost=rng.choice([0, 50, 100, 200, 400, 800, 1500, 2400, 5000]),
+            max_people=rng.choice([1, 2, 2, 4, 6, 10, 30]),
+            cost_type=rng.choice(['total', 'per_person']),
+        ))
+    return ideas
+
+def make_history(ideas: List[DateIdea], n: int, seed: int = 0, n_people: Optional[int] = 2) -> List[Dict]:
+    rng = random.Random(seed)
+    history = []
+    for i in range(n):
+        idea = rng.choice(ideas)
+        history.append({
+            "activity_name": idea.name,
+            "date": f"{2020 + i // 3650 % 10}-{i // 300 % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "cost_per_person": idea.cost_per_person() if n_people else None,
+        })
+    return history
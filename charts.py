@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from date_stats import DateStats
+from metrics import count, timed
+
+# (name, data, params): everything a chart's pixels depend on
+ChartSpec = Tuple[str, Any, Dict]
+# (width, height, RGBA rows top to bottom), ready for a texture upload
+ChartImage = Tuple[int, int, bytes]
+
+class ChartCache:
+    """
+    LRU cache of rendered chart images keyed by a hash of each chart's data and figure
+    parameters, capped both by entry count and by total pixel bytes. Safe to share
+    between render threads.
+    """
+    def __init__(self, max_entries: int = 32, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, ChartImage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(spec: ChartSpec) -> str:
+        return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[ChartImage]:
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key: str, image: ChartImage):
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key)[2])
+            self._entries[key] = image
+            self.size += len(image[2])
+            while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+def _sorted_counts(counter) -> List[List]:
+    return [[label, count] for label, count in sorted(counter.items(), key=lambda x: x[1], reverse=True) if count > 0]
+
+def chart_specs(stats: DateStats) -> List[ChartSpec]:
+    """Describes the charts available for the given history statistics, in display order."""
+    if not stats.entries:
+        return []
+    specs = []
+    activities = _sorted_counts(stats.by_activity)
+    if activities:
+        specs.append(('activity_counts', activities, {
+            'title': 'Number of Times Each Activity Was Done', 'xlabel': 'Count', 'ylabel': 'Activity',
+            'color': 'skyblue', 'figsize': [5, max(3, len(activities) * 0.6)], 'integer_ticks': True}))
+    regions = stats.liked_by_regions
+    if regions['bf'] or regions['gf'] or regions['both']:
+        specs.append(('liked_by_venn', [regions['bf'], regions['gf'], regions['both']], {
+            'title': 'Percent of Dates Liked by bf, gf, and Both', 'figsize': [6, 6]}))
+    tags = _sorted_counts(stats.by_tag)
+    if tags:
+        specs.append(('tag_counts', tags, {
+            'title': 'Total Count of Tags (All Time)', 'xlabel': 'Count', 'ylabel': 'Tag',
+            'color': 'orange', 'figsize': [5, max(3, len(tags) * 0.6)], 'integer_ticks': True}))
+    if stats.month_spending:
+        months = [[month, spend] for month, spend in sorted(stats.month_spending.items())]
+        specs.append(('monthly_spending', months, {
+            'title': 'Money Spent Per Person on Dates Per Month (₹)', 'xlabel': 'Total Spent Per Person (₹)',
+            'ylabel': 'Month', 'color': 'green', 'figsize': [5, max(3, len(months) * 0.6)],
+            # Only set integer ticks if all values are integers
+            'integer_ticks': all(float(spend).is_integer() for _, spend in months)}))
+    return specs
+
+def _draw(spec: ChartSpec):
+    """
+    Draws one chart spec on a standalone Agg figure rather than pyplot, so it can run on
+    worker threads. matplotlib is imported here rather than at module level so that
+    importing this module stays cheap.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import matplotlib.ticker as ticker
+    from matplotlib_venn import venn2
+    name, data, params = spec
+    fig = Figure(figsize=params['figsize'])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    if name == 'liked_by_venn':
+        venn2(subsets=tuple(data), set_labels=('bf', 'gf'), ax=ax)
+        ax.set_title(params['title'])
+    else:
+        labels, values = zip(*data)
+        ax.barh(labels, values, color=params['color'])
+        ax.set_title(params['title'])
+        ax.set_xlabel(params['xlabel'])
+        ax.set_ylabel(params['ylabel'])
+        if params['integer_ticks']:
+            ax.xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
+    fig.tight_layout()
+    return fig
+
+@timed('charts.render')
+def render_chart(spec: ChartSpec) -> ChartImage:
+    """Renders one chart spec straight to RGBA pixels from the Agg canvas, with no image encoding."""
+    canvas = _draw(spec).canvas
+    canvas.draw()
+    pixels = canvas.buffer_rgba()
+    height, width = pixels.shape[:2]
+    return width, height, bytes(pixels)
+
+def render_chart_png(spec: ChartSpec) -> bytes:
+    """Renders one chart spec to PNG bytes, for saving to disk."""
+    buf = BytesIO()
+    _draw(spec).savefig(buf, format='png', bbox_inches='tight')
+    return buf.getvalue()
+
+def cached_render(spec: ChartSpec, cache: Optional[ChartCache] = None) -> ChartImage:
+    """Returns the image for a chart spec, rendering it only on a cache miss."""
+    key = ChartCache.key(spec)
+    image = cache.get(key) if cache is not None else None
+    count('charts.cache_miss' if image is None else 'charts.cache_hit')
+    if image is None:
+        image = render_chart(spec)
+        if cache is not None:
+            cache.put(key, image)
+    return image
+
+class ChartRenderer:
+    """
+    Renders chart specs on a small thread pool and hands each result back through
+    `schedule` (e.g. Kivy's Clock.schedule_once), so on_done(index, image) or, if the
+    render raised, on_error(index, error) runs on the UI thread as each chart finishes.
+    start() and cancel() drop the current batch: queued renders are cancelled, running
+    ones finish (into any cache) but are not delivered.
+    """
+    def __init__(self, render: Callable[[ChartSpec], Any], schedule: Callable[[Callable], Any],
+                 workers: Optional[int] = None):
+        self.render = render
+        self.schedule = schedule
+        self._pool = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                                        thread_name_prefix='chart-render')
+        self._pending: List[Future] = []
+        self._generation = 0
+
+    def start(self, specs: List[ChartSpec], on_done: Callable[[int, Any], None],
+              on_error: Callable[[int, BaseException], None]):
+        self.cancel()
+        generation = self._generation
+        for index, spec in enumerate(specs):
+            future = self._pool.submit(self.render, spec)
+            future.add_done_callback(partial(self._rendered, generation, index, on_done, on_error))
+            self._pending.append(future)
+
+    def cancel(self):
+        self._generation += 1
+        for future in self._pending:
+            future.cancel()
+        self._pending = []
+
+    def _rendered(self, generation: int, index: int, on_done, on_error, future: Future):
+        # Called on the render thread; the result is delivered on the UI thread
+        if future.cancelled():
+            return
+        error = future.exception()
+
+        def deliver(*_):
+            if generation != self._generation:
+                return
+            if error is None:
+                on_done(index, future.result())
+            else:
+                on_error(index, error)
+        self.schedule(deliver)
+
+    def close(self):
+        self.cancel()
+        self._pool.shutdown(wait=False)
+
+def render_charts(stats: DateStats) -> List[Tuple[str, bytes]]:
+    """Returns (name, png) for every chart."""
+    return [(spec[0], render_chart_png(spec)) for spec in chart_specs(stats)]
+
+def export_charts(stats: DateStats, directory: str) -> List[str]:
+    """Writes every chart as <name>.png into directory and returns the file paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, png in render_charts(stats):
+        path = os.path.join(directory, f'{name}.png')
+        with open(path, 'wb') as f:
+            f.write(png)
+        paths.append(path)
+    return paths
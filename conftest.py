@@ -0,0 +1,25 @@
+# Lets the tests import the top-level modules when run from any directory
+import dataclasses
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def make_manager(tmp_path):
+    """Builds a DateIdeaManager over n synthetic ideas in a temporary directory."""
+    from benchmarks.synthetic import make_ideas
+    from date_manager import DateIdeaManager
+    managers = []
+
+    def make(n=500, history="history.jsonl", **kwargs):
+        ideas_file = tmp_path / "ideas.json"
+        ideas_file.write_text(json.dumps([dataclasses.asdict(idea) for idea in make_ideas(n)]))
+        manager = DateIdeaManager(str(ideas_file), history_file=str(tmp_path / history), **kwargs)
+        managers.append(manager)
+        return manager
+    yield make
+    for manager in managers:
+        manager.history.close()
@@ -1,17 +1,203 @@
-from typing import List, Dict, Optional
-from datetime import datetime
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterator, List, Optional, Union
+from datetime import date as Date, datetime
+from history_journal import HistoryJournal
+from date_stats import DateStats
+from metrics import timed
+
+def _date_key(value: Union[str, Date]) -> str:
+    """A range bound as the 'YYYY-MM-DD' string entries are dated with."""
+    if isinstance(value, str):
+        return value
+    # str() of a datetime carries the time and sorts after every entry of that day
+    return (value.date() if isinstance(value, datetime) else value).isoformat()
+
+class HistoryView(Sequence):
+    """
+    Read-only view of a DateHistory as of one write: the first `length` entries of the
+    entry list, with the stats that match them. The history only appends to that list
+    in place (clears replace it), so a view never changes after it is taken and can be
+    read from any thread without locking.
+
+    Appends do not copy the stats: a view holds the last published DateStats (which is
+    never modified) and how many entries it covers, and `stats` adds the rest on first
+    access.
+    """
+    def __init__(self, owner: "DateHistory", entries: List[Dict], length: int, base: DateStats, base_length: int):
+        self._owner = owner
+        self._entries = entries
+        self._length = length
+        self._base = base
+        self._base_length = base_length
+        self._stats: Optional[DateStats] = base if base_length == length else None
+
+    @property
+    def stats(self) -> DateStats:
+        stats = self._stats
+        if stats is None:
+            # Concurrent readers may both build it; either result is the same
+            stats = self._stats = self._base.extended(self._entries[self._base_length:self._length])
+        return stats
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            positions = range(self._length)[key]
+            if positions.step == 1:
+                return self._entries[positions.start:positions.stop]
+            return [self._entries[position] for position in positions]
+        return self._entries[range(self._length)[key]]
+
+    def __iter__(self) -> Iterator[Dict]:
+        entries = self._entries
+        return (entries[position] for position in range(self._length))
+
+    def _current(self) -> bool:
+        # The owner's indexes are positions into its current entry list. Once a clear has
+        # replaced that list, positions past the cut get reused, so an older view scans
+        # instead. Callers fetch the index before checking, so a clear in between is caught.
+        return self._entries is self._owner.history
+
+    def iter_range(self, start_date: Optional[Union[str, Date]] = None, end_date: Optional[Union[str, Date]] = None) -> Iterator[Dict]:
+        """
+        Yields entries dated from start_date to end_date inclusive (either may be None for
+        an open end), in date order. Dates are 'YYYY-MM-DD' strings or date objects; a
+        datetime stands for its whole day.
+        Located by bisection on the date index, so only the matching entries are touched.
+        """
+        index = self._owner._dates()
+        if not self._current():
+            index = sorted((entry["date"], position) for position, entry in enumerate(self)
+                           if isinstance(entry.get("date"), str))
+        length = self._length
+        lo = bisect_left(index, (_date_key(start_date), -1)) if start_date is not None else 0
+        hi = bisect_right(index, (_date_key(end_date), length)) if end_date is not None else len(index)
+        entries = self._entries
+        # The index may already hold entries added after this view was taken
+        return (entries[position] for _, position in index[lo:hi] if position < length)
+
+    def page(self, offset: int = 0, limit: int = 50, newest_first: bool = True) -> List[Dict]:
+        """
+        Returns up to `limit` entries starting `offset` entries from the newest (or, with
+        newest_first=False, the oldest) recorded entry.
+        """
+        if offset < 0 or limit < 0:
+            raise ValueError("offset and limit must be non-negative")
+        if not newest_first:
+            return self._entries[offset:min(offset + limit, self._length)]
+        end = self._length - offset
+        if end <= 0:
+            return []
+        return self._entries[max(0, end - limit):end][::-1]
+
+    def by_activity(self, name: str) -> List[Dict]:
+        """Returns the entries for one activity, oldest first."""
+        positions = self._owner._activities().get(name, ())
+        if not self._current():
+            positions = [position for position, entry in enumerate(self) if entry["activity_name"] == name]
+        entries, length = self._entries, self._length
+        return [entries[position] for position in positions if position < length]
 
 class DateHistory:
-    def __init__(self, file_path: str = "history.json"):
+    def __init__(self, file_path: str = "history.json", journal: Optional[HistoryJournal] = None):
+        """
+        History is stored as a single JSON file by default. A `.jsonl` file path (or an
+        explicit journal) selects the append-only HistoryJournal backend instead, which
+        imports a sibling `.json` history the first time it is opened. Running statistics
+        are kept in a `.stats.json` file next to the history, saved every `stats_every`
+        added entries, on clears and by flush()/close(); a file missing the newest entries
+        is caught up on load.
+
+        Writes (add_entry, clear) are serialized by a lock and published as a new
+        HistoryView; the query methods read the latest view, so they are safe to call from
+        other threads while a write is in progress. A published `stats` is never modified.
+        """
         self.file_path = file_path
+        # Only a journal created here is closed by close(); a SQLiteStore is shared with its owner
+        self._owns_journal = journal is None and file_path.endswith(".jsonl")
+        if self._owns_journal:
+            journal = HistoryJournal(file_path, legacy_path=file_path[:-len(".jsonl")] + ".json")
+        self.journal = journal
         self.history: List[Dict] = self.load()
+        # Query indexes, built on first use and then kept up to date by add_entry/clear.
+        # _date_index holds (date, position) pairs sorted by date then position.
+        self._date_index: Optional[List[tuple]] = None
+        self._activity_index: Optional[Dict[str, List[int]]] = None
+        # Guards writes and the lazy index builds
+        self._lock = threading.RLock()
+        # Called with each new view while the write lock is still held
+        self.on_publish: Optional[Callable[[HistoryView], None]] = None
+        stats = DateStats(os.path.splitext(file_path)[0] + ".stats.json")
+        stats.sync(self.history)
+        # The stats published for the first _stats_length entries; views add later entries themselves
+        self._stats = stats
+        self._stats_length = len(self.history)
+        self._stats_saved = True
+        self._publish()
+
+    # Entries added between two rebuilds of the published stats (and saves of the stats file)
+    stats_every = 256
+
+    @property
+    def stats(self) -> DateStats:
+        """The stats of the latest view."""
+        return self._view.stats
+
+    def _publish(self):
+        self._view = HistoryView(self, self.history, len(self.history), self._stats, self._stats_length)
+        if self.on_publish is not None:
+            self.on_publish(self._view)
+
+    def _set_stats(self, stats: DateStats, save: bool):
+        self._stats = stats
+        self._stats_length = len(self.history)
+        self._stats_saved = save
+        if save:
+            stats.save()
+
+    def view(self) -> HistoryView:
+        """Returns a consistent, read-only view of the history as of the last completed write."""
+        return self._view
+
+    def update_stats(self, update):
+        """Applies update(stats) to a copy of the stats and publishes it, e.g. after a catalog change."""
+        with self._lock:
+            stats = self._view.stats.copy()
+            update(stats)
+            self._set_stats(stats, save=False)
+            self._publish()
+
+    def flush(self):
+        """Saves the stats file if entries were added since it was last saved."""
+        with self._lock:
+            if not self._stats_saved or self._stats_length != len(self.history):
+                self._set_stats(self._view.stats, save=True)
+                self._publish()
 
+    def close(self):
+        """Saves the stats and closes a journal this history opened."""
+        with self._lock:
+            self.flush()
+            if self._owns_journal:
+                self.journal.close()
+
+    @timed('history.save')
     def save(self):
+        if self.journal:
+            self.journal.compact(self.history)
+            return
         from json import dump
         with open(self.file_path, "w", encoding="utf-8") as f:
             dump(self.history, f, ensure_ascii=False, indent=2)
 
     def load(self) -> List[Dict]:
+        if self.journal:
+            return self.journal.load()
         from json import load
         try:
             with open(self.file_path, "r", encoding="utf-8") as f:
@@ -19,26 +205,126 @@ class DateHistory:
         except (FileNotFoundError, Exception):
             return []
 
-    def add_entry(self, activity_name: str, date: Optional[str] = None, cost_per_person: Optional[float] = None):
+    @timed('history.add_entry')
+    def add_entry(self, activity_name: str, date: Optional[str] = None, cost_per_person: Optional[float] = None) -> Dict:
         """
-        Adds an entry to the history with the given activity name, date, and cost per person.
+        Adds an entry to the history with the given activity name, date, and cost per person,
+        and returns it.
         """
-        self.history.append({
+        entry = {
             "activity_name": activity_name,
             "date": date or datetime.now().strftime("%Y-%m-%d"),
             "cost_per_person": cost_per_person
-        })
-        self.save()
+        }
+        with self._lock:
+            self.history.append(entry)
+            if self.journal:
+                self.journal.append(entry, self.history)
+            else:
+                self.save()
+            if len(self.history) - self._stats_length >= self.stats_every:
+                self._set_stats(self._stats.extended(self.history[self._stats_length:]), save=True)
+            self._index_entry(entry, len(self.history) - 1)
+            self._publish()
+        return entry
 
     def get_history(self) -> List[Dict]:
         return self.history
 
+    @timed('history.clear')
     def clear(self, n: Optional[int] = None):
         """
         Clears the last n entries from the history. If n is None, clears all history.
+        n must be positive; clearing more entries than there are clears them all.
         """
-        if n is None:
-            self.history.clear()
-        else:
-            del self.history[-n:]
-        self.save()
+        if n is not None and n <= 0:
+            raise ValueError(f"n must be a positive number of entries (or None for all), got {n}.")
+        with self._lock:
+            # A new list rather than an in-place delete, so published views keep their entries
+            if n is None:
+                removed, self.history = self.history, []
+            else:
+                removed, self.history = self.history[-n:], self.history[:-n]
+            if self.journal:
+                self.journal.clear(n, self.history)
+            else:
+                self.save()
+            stats = self._view.stats.copy()
+            stats.remove(removed, self.history)
+            self._set_stats(stats, save=True)
+            self._unindex_tail(removed)
+            self._publish()
+
+    def _index_entry(self, entry: Dict, position: int):
+        # In-order additions are appended in place, which views tolerate because they
+        # skip positions past their length; anything else builds a new list.
+        if self._date_index is not None and isinstance(entry.get("date"), str):
+            key = (entry["date"], position)
+            if not self._date_index or key > self._date_index[-1]:
+                self._date_index.append(key)
+            else:
+                # A back-dated entry
+                index = self._date_index[:]
+                index.insert(bisect_left(index, key), key)
+                self._date_index = index
+        if self._activity_index is not None:
+            self._activity_index.setdefault(entry["activity_name"], []).append(position)
+
+    def _unindex_tail(self, removed: List[Dict]):
+        """Drops index entries for the entries just cleared from the end of the history."""
+        length = len(self.history)
+        if self._date_index is not None:
+            index = self._date_index
+            dated = sum(isinstance(entry.get("date"), str) for entry in removed)
+            # Usually the newest entries are also the latest dated, i.e. at the end of the index.
+            end = len(index)
+            while dated and end and index[end - 1][1] >= length:
+                end -= 1
+                dated -= 1
+            if dated:
+                self._date_index = [key for key in index if key[1] < length]
+            else:
+                self._date_index = index[:end]
+        if self._activity_index is not None:
+            activity_index = dict(self._activity_index)
+            for name in {entry["activity_name"] for entry in removed}:
+                positions = activity_index.get(name, [])
+                # Positions are appended in increasing order, so removed ones are at the end.
+                end = len(positions)
+                while end and positions[end - 1] >= length:
+                    end -= 1
+                if end:
+                    activity_index[name] = positions[:end]
+                else:
+                    activity_index.pop(name, None)
+            self._activity_index = activity_index
+
+    def _dates(self) -> List[tuple]:
+        if self._date_index is None:
+            with self._lock:
+                if self._date_index is None:
+                    self._date_index = sorted((entry["date"], position) for position, entry in enumerate(self.history)
+                                              if isinstance(entry.get("date"), str))
+        return self._date_index
+
+    def _activities(self) -> Dict[str, List[int]]:
+        if self._activity_index is None:
+            with self._lock:
+                if self._activity_index is None:
+                    index: Dict[str, List[int]] = {}
+                    for position, entry in enumerate(self.history):
+                        index.setdefault(entry["activity_name"], []).append(position)
+                    self._activity_index = index
+        return self._activity_index
+
+    def iter_range(self, start_date: Optional[Union[str, Date]] = None, end_date: Optional[Union[str, Date]] = None) -> Iterator[Dict]:
+        """See HistoryView.iter_range."""
+        return self._view.iter_range(start_date, end_date)
+
+    def page(self, offset: int = 0, limit: int = 50, newest_first: bool = True) -> List[Dict]:
+        """See HistoryView.page."""
+        return self._view.page(offset, limit, newest_first)
+
+    def by_activity(self, name: str) -> List[Dict]:
+        """See HistoryView.by_activity."""
+        return self._view.by_activity(name)
@@ -1,108 +1,589 @@
-import json
 import random
+import threading
+from collections import Counter
+from contextlib import contextmanager
 from date_idea import DateIdea
-from date_history import DateHistory
-from typing import Optional, List
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-from matplotlib_venn import venn2
-import pandas as pd
-from collections import Counter, defaultdict
-from datetime import datetime
+from date_history import DateHistory, HistoryView
+from idea_index import IdeaIndex
+from idea_catalog import CompactCatalog
+from idea_loader import iter_ideas, load_ideas
+from sqlite_store import SQLiteStore, is_sqlite_path
+from novelty_sampler import NoveltySampler
+from filter_cache import CandidateSet, FilterCache
+from metrics import timed
+from typing import Dict, Optional, List, Sequence, Set, Tuple, Union
+
+# Catalog writes remembered for catching up the filter cache and similarity index
+CATALOG_LOG_SIZE = 4096
+
+# pandas (analytics), matplotlib (charts) and numpy (similar_ideas) are imported on
+# first use, so that constructing a manager and sampling stays cheap at app startup.
+
+def warm_up_imports():
+    """Imports the analytics and plotting dependencies ahead of first use, e.g. from a background thread."""
+    import analytics
+    import matplotlib.pyplot
+    from charts import render_chart
+    from matplotlib_venn import venn2
+
+def cost_per_person(idea: DateIdea, n_people: Optional[int]) -> float:
+    """What one person pays for an idea done by n_people; 'total' costs are split evenly."""
+    if idea.cost_type == 'total':
+        return idea.cost / n_people if n_people else idea.cost
+    return idea.cost
+
+def _slots_by_name(ideas: Sequence[DateIdea], slots: Optional[List[int]]) -> Tuple[Dict[str, int], Counter]:
+    """Maps each name to the index slot of the first idea with it, and counts the ideas per name."""
+    # Map names to slots rather than ideas, so a compact catalog is not materialized.
+    pairs = ideas.names_by_row() if slots is None else zip(slots, (idea.name for idea in ideas))
+    by_name: Dict[str, int] = {}
+    counts: Counter = Counter()
+    for slot, name in pairs:
+        by_name.setdefault(name, slot)
+        counts[name] += 1
+    return by_name, counts
+
+def _position(ideas: Sequence[DateIdea], slots: Optional[List[int]], slot: int) -> int:
+    return ideas.position_of(slot) if slots is None else slots.index(slot)
+
+class ManagerSnapshot:
+    """
+    Read-only state of a DateIdeaManager as of one completed write: the catalog, its
+    index and the matching HistoryView (with its stats). The manager publishes a new
+    snapshot after every write and never modifies a published one, so it can be read
+    from any thread without locking. Name lookups and analysis frames are built lazily
+    and shared by every snapshot of the same catalog.
+    """
+    def __init__(self, ideas: Sequence[DateIdea], index: IdeaIndex, slots: Optional[List[int]],
+                 history: Optional[HistoryView] = None, version: int = 0):
+        self.ideas = ideas
+        self.index = index
+        self.slots = slots
+        self.history = history
+        # Catalog version, counting the manager's catalog writes
+        self.version = version
+        self._lazy: Dict[str, object] = {}
+
+    @property
+    def stats(self):
+        return self.history.stats
+
+    def after_edits(self, ideas: Sequence[DateIdea], index: IdeaIndex, slots: Optional[List[int]],
+                    version: int, changed: Set[int]) -> "ManagerSnapshot":
+        """
+        Snapshot of a catalog that differs from this one only in the `changed` slots. A
+        built name lookup is carried over and patched for the names those slots held or
+        now hold, rather than rebuilt from the whole catalog.
+        """
+        snapshot = ManagerSnapshot(ideas, index, slots, version=version)
+        if 'by_name' not in self._lazy:
+            return snapshot
+        old_by_name = self._lazy['by_name']
+        by_name, counts = dict(old_by_name), self._lazy['name_counts'].copy()
+        # Each affected name, with the changed slots that hold it now
+        holders: Dict[str, List[int]] = {}
+        for slot in changed:
+            old = self.index.slots[slot] if slot < len(self.index.slots) else None
+            new = index.slots[slot] if slot < len(index.slots) else None
+            if old is not None:
+                counts[old.name] -= 1
+                holders.setdefault(old.name, [])
+            if new is not None:
+                counts[new.name] += 1
+                holders.setdefault(new.name, []).append(slot)
+        for name, held in holders.items():
+            if counts[name] <= 0:
+                del counts[name]
+                by_name.pop(name, None)
+                continue
+            first = old_by_name.get(name)
+            # Ideas keep their relative order, so the first unchanged holder is still the old first one
+            candidates = held + [first] if first is not None and first not in changed else held
+            if counts[name] > len(held) and len(candidates) == len(held):
+                # The old first holder changed and an unchanged one further on takes over; rebuild lazily
+                return snapshot
+            by_name[name] = candidates[0] if len(candidates) == 1 else \
+                min(candidates, key=lambda slot: _position(ideas, slots, slot))
+        snapshot._lazy['by_name'], snapshot._lazy['name_counts'] = by_name, counts
+        return snapshot
+
+    def with_history(self, history: HistoryView) -> "ManagerSnapshot":
+        """Same catalog (sharing its lazy lookups) with a newer history."""
+        snapshot = ManagerSnapshot(self.ideas, self.index, self.slots, history, self.version)
+        snapshot._lazy = self._lazy
+        return snapshot
+
+    def slot_of(self, name: str) -> Optional[int]:
+        """Index slot of the first idea with the given name."""
+        by_name = self._lazy.get('by_name')
+        if by_name is None:
+            by_name, self._lazy['name_counts'] = _slots_by_name(self.ideas, self.slots)
+            self._lazy['by_name'] = by_name
+        return by_name.get(name)
+
+    def find_idea(self, name: str) -> Optional[DateIdea]:
+        slot = self.slot_of(name)
+        return None if slot is None else self.index.slots[slot]
+
+    def frames(self):
+        """Columnar view of the catalog for analytics."""
+        frames = self._lazy.get('frames')
+        if frames is None:
+            from analytics import IdeaFrames
+            frames = self._lazy['frames'] = IdeaFrames(self.ideas)
+        return frames
 
 class DateIdeaManager:
-    def __init__(self, ideas_file: str):
-        self.ideas: List[DateIdea] = self.load_ideas(ideas_file)
-        self.history = DateHistory()
+    def __init__(self, ideas_file: str, history_file: Optional[str] = None, compact: bool = False):
+        """
+        With compact=True the catalog is kept in a CompactCatalog (array columns, DateIdea
+        views built on demand) instead of a list, for very large idea sets.
+
+        A SQLite ideas_file (.db/.sqlite) selects the SQLiteStore backend: edits are
+        written through to the database, sampling filters and analysis run as SQL, and the
+        history is kept in the same database unless history_file says otherwise. Create one
+        from existing JSON files with `python -m sqlite_store`. history_file otherwise
+        defaults to "history.jsonl", the append-only journal, which imports an existing
+        "history.json" the first time it is opened.
+
+        The manager can be shared between threads. Edits and recorded dates go through one
+        lock-guarded writer path that builds new versions of the catalog, index and stats
+        (copy-on-write) and then publishes them as a ManagerSnapshot. Copying makes a single
+        edit O(catalog size); bulk edits inside edit_batch() share one copy. Sampling, analysis
+        and charts read the latest snapshot, so they never block on a write and never see
+        one half-applied. Weighted sampling shares the NoveltySampler, similar_ideas the
+        SimilarityIndex and plain sampling the FilterCache, so those take separate locks.
+        """
+        self._lock = threading.RLock()
+        self._sampler_lock = threading.RLock()
+        self._sampler: Optional[NoveltySampler] = None
+        self._similarity_lock = threading.RLock()
+        self._similarity: Optional["SimilarityIndex"] = None
+        self._filter_lock = threading.Lock()
+        self._filter_cache: Optional[FilterCache] = None
+        # (catalog version, slots changed by that write, or None when the whole catalog was replaced).
+        # A tuple replaced on every write, so readers can iterate it without the writer lock.
+        self._catalog_version = 0
+        self._catalog_log: Tuple[Tuple[int, Optional[Tuple[int, ...]]], ...] = ()
+        # Slots edited so far inside edit_batch(), or None outside a batch
+        self._batch_edits: Optional[Set[int]] = None
+        # Whether _ideas/index/_slots are the writer's own copies, not yet published
+        self._unpublished = False
+        self.store: Optional[SQLiteStore] = None
+        self._store_ids: List[int] = []
+        if is_sqlite_path(ideas_file):
+            if compact:
+                raise ValueError("compact=True is not supported with a SQLite ideas file")
+            self.store = SQLiteStore(ideas_file)
+            rows = self.store.load_ideas()
+            self.ideas = [idea for _, idea in rows]
+            self._store_ids = [idea_id for idea_id, _ in rows]
+        else:
+            self.ideas = CompactCatalog(iter_ideas(ideas_file)) if compact else self.load_ideas(ideas_file)
+        if history_file is None:
+            history_file = ideas_file if self.store else "history.jsonl"
+        if self.store and history_file == ideas_file:
+            self.history = DateHistory(history_file, journal=self.store)
+        else:
+            self.history = DateHistory(history_file)
+        # Every history write, including ones made on self.history directly, republishes the snapshot
+        self.history.on_publish = self._history_published
+        self._catalog_changed()
+        self.rng = random.Random()
+
+    @property
+    def ideas(self) -> Sequence[DateIdea]:
+        return self._ideas
+
+    @ideas.setter
+    def ideas(self, ideas: Sequence[DateIdea]):
+        # Assigning a whole catalog rebuilds the index; single edits go through
+        # add_idea/update_idea/delete_idea and update it incrementally.
+        with self._lock:
+            if isinstance(ideas, CompactCatalog):
+                # The catalog owns row-stable storage and the index uses its row ids as slots.
+                self._set_catalog(ideas, IdeaIndex(rows=ideas.rows), None, None)
+            else:
+                ideas = list(ideas)
+                self._set_catalog(ideas, IdeaIndex(ideas), list(range(len(ideas))), None)
+
+    def _editable_catalog(self):
+        """Copies of the catalog, index and slots for the writer to change before publishing."""
+        if self._unpublished:
+            # Later edits in a batch change the copies the first one made
+            return self._ideas, self.index, self._slots
+        if self._slots is None:
+            ideas = self._ideas.copy()
+            return ideas, self.index.copy(rows=ideas.rows), None
+        return list(self._ideas), self.index.copy(), list(self._slots)
+
+    def _set_catalog(self, ideas: Sequence[DateIdea], index: IdeaIndex, slots: Optional[List[int]],
+                     changed: Optional[int]):
+        """
+        Publishes a new catalog; `changed` is the one edited slot, or None for a new catalog.
+        Inside edit_batch() single edits are only collected, and published when it ends.
+        """
+        self._ideas, self.index, self._slots = ideas, index, slots
+        if self._batch_edits is not None:
+            if changed is not None:
+                self._batch_edits.add(changed)
+                self._unpublished = True
+                return
+            self._batch_edits.clear()
+        self._publish_catalog(None if changed is None else (changed,))
+
+    def _publish_catalog(self, changed: Optional[Tuple[int, ...]]):
+        self._unpublished = False
+        self._catalog_version += 1
+        self._catalog_log = self._catalog_log[-(CATALOG_LOG_SIZE - 1):] + ((self._catalog_version, changed),)
+        self._catalog_changed(changed)
+
+    @contextmanager
+    def edit_batch(self):
+        """
+        Groups catalog edits: add_idea/update_idea/delete_idea inside the block share one
+        copy of the catalog and index, published when the block exits, instead of copying
+        both (O(catalog size)) for every edit. Readers of snapshot() see the whole batch at
+        once; `ideas` and `index` show the edits so far. The writer lock is held throughout,
+        and nested batches join the outer one.
+        """
+        with self._lock:
+            if self._batch_edits is not None:
+                yield
+                return
+            self._batch_edits = set()
+            try:
+                yield
+            finally:
+                edits, self._batch_edits = self._batch_edits, None
+                # Edits made before an exception were applied (and written to a store), so publish them
+                if self._unpublished:
+                    self._publish_catalog(tuple(sorted(edits)))
+
+    def add_idea(self, idea: DateIdea):
+        """Appends an idea to the catalog and indexes it."""
+        with self._lock:
+            if self.store:
+                self._store_ids.append(self.store.add_idea(idea))
+            ideas, index, slots = self._editable_catalog()
+            if slots is None:
+                ideas.append(idea)
+                slot = ideas.row_at(-1)
+                index.index_slot(slot, idea)
+            else:
+                slot = index.add(idea)
+                slots.append(slot)
+                ideas.append(idea)
+            self._set_catalog(ideas, index, slots, slot)
+
+    def update_idea(self, position: int, idea: DateIdea):
+        """Replaces the idea at the given catalog position."""
+        with self._lock:
+            if self.store:
+                self.store.update_idea(self._store_ids[position], idea)
+            ideas, index, slots = self._editable_catalog()
+            if slots is None:
+                slot = ideas.row_at(position)
+                index.unindex_slot(slot, ideas[position])
+                ideas[position] = idea
+                index.index_slot(slot, idea)
+            else:
+                slot = slots[position]
+                index.replace(slot, idea)
+                ideas[position] = idea
+            self._set_catalog(ideas, index, slots, slot)
+
+    def delete_idea(self, position: int):
+        """Removes the idea at the given catalog position."""
+        with self._lock:
+            if self.store:
+                self.store.delete_idea(self._store_ids.pop(position))
+            ideas, index, slots = self._editable_catalog()
+            if slots is None:
+                slot = ideas.row_at(position)
+                index.unindex_slot(slot, ideas[position])
+            else:
+                slot = slots.pop(position)
+                index.remove(slot)
+            del ideas[position]
+            self._set_catalog(ideas, index, slots, slot)
+
+    def _catalog_changed(self, changed: Optional[Tuple[int, ...]] = None):
+        """Publishes the writer's catalog; `changed` are the slots edited since the last one, or None."""
+        previous: Optional[ManagerSnapshot] = getattr(self, '_catalog', None)
+        if changed is None or previous is None:
+            catalog = ManagerSnapshot(self._ideas, self.index, self._slots, version=self._catalog_version)
+        else:
+            catalog = previous.after_edits(self._ideas, self.index, self._slots, self._catalog_version, set(changed))
+        self._catalog = catalog
+        history = getattr(self, 'history', None)
+        if history is None:
+            self._snapshot = catalog
+            return
+
+        def refresh(stats):
+            # History stats count tags/locations through the catalog, so re-derive them
+            # against the new one; later entries are looked up in whatever is published.
+            if changed is None or previous is None:
+                stats.lookup = catalog.find_idea
+                stats.refresh_catalog()
+            else:
+                # Only activities named by the edited slots can have changed
+                names = {idea.name for ideas in (previous.index.slots, self.index.slots)
+                         for idea in (ideas[slot] for slot in changed if slot < len(ideas)) if idea is not None}
+                stats.refresh_ideas(names, previous.find_idea, catalog.find_idea)
+            stats.lookup = self.find_idea
+        # Publishes the new catalog together with the matching stats
+        history.update_stats(refresh)
+
+    def _history_published(self, view: HistoryView):
+        self._snapshot = self._catalog.with_history(view)
+
+    def snapshot(self) -> ManagerSnapshot:
+        """Returns the state as of the last completed write; safe to read from any thread."""
+        return self._snapshot
+
+    def find_idea(self, name: str) -> Optional[DateIdea]:
+        """Returns the first idea with the given name, as history entries refer to ideas by name."""
+        return self._snapshot.find_idea(name)
+
+    def novelty_sampler(self) -> NoveltySampler:
+        """
+        Returns the weighted sampler, rebuilt when the catalog changes and caught up with the
+        history. Hold the manager's sampler lock while drawing from it on a shared manager.
+        """
+        with self._sampler_lock:
+            return self._novelty_sampler(self._snapshot)
+
+    def novelty_weights(self) -> Tuple[IdeaIndex, List[float]]:
+        """The weighted sampler's index and a copy of its per-slot weights, read together."""
+        with self._sampler_lock:
+            sampler = self._novelty_sampler(self._snapshot)
+            return sampler.index, list(sampler.tree.weights)
+
+    def _novelty_sampler(self, snapshot: ManagerSnapshot) -> NoveltySampler:
+        sampler = self._sampler
+        if sampler is None or sampler.index is not snapshot.index:
+            sampler = self._sampler = NoveltySampler(snapshot.index, snapshot.stats, snapshot.slot_of, snapshot.history)
+        else:
+            # Read lazily: the snapshot's stats are only built if the sampler refreshes its boosts
+            sampler.stats = lambda: snapshot.stats
+            sampler.sync(snapshot.history)
+        return sampler
+
+    def _similarity_index(self, snapshot: ManagerSnapshot) -> "SimilarityIndex":
+        """The similarity index caught up with the snapshot's catalog; call with the similarity lock held."""
+        from idea_similarity import SimilarityIndex
+        similarity = self._similarity
+        if similarity is not None and similarity.version < snapshot.version:
+            # Apply the edits since the index was last used
+            edits = self._catalog_edits(similarity.version, snapshot.version)
+            if edits is None:
+                similarity = None
+            else:
+                similarity.update(snapshot.index, edits)
+                similarity.version = snapshot.version
+        if similarity is None:
+            similarity = self._similarity = SimilarityIndex(snapshot.index)
+            similarity.version = snapshot.version
+        return similarity
+
+    def _catalog_edits(self, since: int, until: int) -> Optional[Set[int]]:
+        """
+        Slots edited by the catalog writes after version `since` up to `until`, or None if
+        the log no longer reaches back that far or the whole catalog was replaced.
+        """
+        pending = [slots for version, slots in self._catalog_log if since < version <= until]
+        if len(pending) == until - since and all(slots is not None for slots in pending):
+            return {slot for slots in pending for slot in slots}
+        return None
+
+    def _candidates(self, snapshot: ManagerSnapshot, liked_by: Optional[str], location: Optional[str],
+                    max_cost: float, n_people: int) -> Optional[CandidateSet]:
+        """
+        The ideas matching the filters, from the FilterCache. None when the cache cannot
+        serve the query: n_people < 1, or the snapshot is older than the cached sets.
+        """
+        if n_people < 1:
+            return None
+        with self._filter_lock:
+            cache = self._filter_cache
+            if cache is not None and cache.version != snapshot.version:
+                if cache.version > snapshot.version:
+                    return None
+                edits = self._catalog_edits(cache.version, snapshot.version)
+                if edits is None:
+                    cache.clear(snapshot.index)
+                else:
+                    cache.update(snapshot.index, edits)
+                cache.version = snapshot.version
+            if cache is None:
+                cache = self._filter_cache = FilterCache(snapshot.index)
+                cache.version = snapshot.version
+            return cache.get(liked_by, location, max_cost, n_people)
+
+    def filter_cache_stats(self) -> Dict[str, float]:
+        """Hit/miss counts and size of the cache of filtered candidates used by unweighted sampling."""
+        with self._filter_lock:
+            if self._filter_cache is None:
+                return FilterCache(self.index).stats()
+            return self._filter_cache.stats()
+
+    @timed('manager.similar_ideas')
+    def similar_ideas(self, idea: Union[DateIdea, str], k: int = 10, untried: bool = True,
+                      history_weight: float = 0.0) -> List[DateIdea]:
+        """
+        Returns up to k ideas most like the given one (or the idea with that name) by tags,
+        location, liked_by and cost (see SimilarityIndex), most similar first. untried=True
+        skips ideas already in the history. history_weight > 0 multiplies each similarity
+        by the idea's novelty weight (as weighted sampling uses) to that power, favouring
+        under-used and not recently done ideas.
+        """
+        name = idea if isinstance(idea, str) else idea.name
+        with self._similarity_lock:
+            # Read the snapshot under the lock so the index only ever moves forward
+            snapshot = self._snapshot
+            slot = snapshot.slot_of(name)
+            if slot is None:
+                raise ValueError(f"unknown idea: {name!r}")
+            similarity = self._similarity_index(snapshot)
+            slots = snapshot.index.slots
+            tried = snapshot.stats.by_activity if untried else {}
+
+            def keep(member: int) -> bool:
+                other = slots[member].name
+                return other != name and other not in tried
+            if history_weight <= 0:
+                return [slots[member] for _, member in similarity.similar(slot, k, keep)]
+            # Rerank a deeper list, so ideas just outside the top k can move up
+            ranked = similarity.similar(slot, max(k * 5, similarity.size), keep)
+            with self._sampler_lock:
+                weights = self._novelty_sampler(snapshot).tree.weights
+                ranked.sort(key=lambda pair: -pair[0] * weights[pair[1]] ** history_weight)
+            return [slots[member] for _, member in ranked[:k]]
 
     def load_ideas(self, ideas_file: str) -> List[DateIdea]:
-        with open(ideas_file, 'r', encoding='utf-8') as f:
-            ideas_data = json.load(f)
-        return [DateIdea(**idea) for idea in ideas_data]
+        """
+        Loads and validates the ideas file, using the pre-parsed cache next to it when the
+        file is unchanged. Raises IdeaFileError (a ValueError) with the line of a bad record.
+        """
+        return load_ideas(ideas_file)
 
     def _cost_per_person(self, idea, n_people):
-        if idea.cost_type == 'total':
-            return idea.cost / n_people if n_people else idea.cost
-        return idea.cost
+        return cost_per_person(idea, n_people)
 
-    def sample_idea(self, liked_by: Optional[str] = None, location: Optional[str] = None, max_cost: Optional[float] = None, n_people: Optional[int] = None) -> Optional[DateIdea]:
+    @timed('manager.sample_idea')
+    def sample_idea(self, liked_by: Optional[str] = None, location: Optional[str] = None, max_cost: Optional[float] = None,
+                    n_people: Optional[int] = None, weighted: bool = False) -> Optional[DateIdea]:
+        """
+        Picks a random idea matching the filters. With weighted=True the draw favours ideas
+        with under-used tags, locations and people and avoids recently done ones (see
+        NoveltySampler); otherwise every matching idea is equally likely.
+        """
         if n_people is None:
             raise ValueError("You must specify n_people (number of people) when sampling an idea.")
         if max_cost is None:
             raise ValueError("You must specify max_cost when sampling an idea.")
-        filtered = self.ideas
-        if liked_by:
-            filtered = [i for i in filtered if liked_by in i.liked_by]
-        if location:
-            filtered = [i for i in filtered if location in i.location]
-        filtered = [i for i in filtered if n_people <= i.max_people]
-        filtered = [i for i in filtered if self._cost_per_person(i, n_people) <= max_cost]
-        if not filtered:
-            return None
-        return random.choice(filtered)
+        snapshot = self._snapshot
+        index = snapshot.index
+        if weighted:
+            candidates = index.candidates_mask(liked_by=liked_by, location=location, max_cost=max_cost, n_people=n_people)
+            with self._sampler_lock:
+                slot = self._novelty_sampler(snapshot).choice(candidates, self.rng)
+            return None if slot is None else index.slots[slot]
+        if self.store:
+            return self.store.sample_idea(self.rng, liked_by=liked_by, location=location, max_cost=max_cost, n_people=n_people)
+        cached = self._candidates(snapshot, liked_by, location, max_cost, n_people)
+        if cached is not None:
+            with self._filter_lock:
+                slot = cached.choice(index, self.rng)
+            return None if slot is None else index.slots[slot]
+        candidates = index.candidates_mask(liked_by=liked_by, location=location, max_cost=max_cost, n_people=n_people)
+        return index.choice(candidates, self.rng)
+
+    @timed('manager.sample_ideas')
+    def sample_ideas(self, n: int, liked_by: Optional[str] = None, location: Optional[str] = None, max_cost: Optional[float] = None,
+                     n_people: Optional[int] = None, replace: bool = False, seed: Optional[int] = None,
+                     weighted: bool = False) -> List[DateIdea]:
+        """
+        Samples n ideas matching the same filters as sample_idea, filtering the catalog once.
+        Without replacement, fewer than n ideas are returned if not enough ideas match.
+        Passing a seed makes the draw reproducible; otherwise the manager's shared RNG is used.
+        weighted=True draws with sample_idea's novelty weights.
+        """
+        if n_people is None:
+            raise ValueError("You must specify n_people (number of people) when sampling ideas.")
+        if max_cost is None:
+            raise ValueError("You must specify max_cost when sampling ideas.")
+        if n < 0:
+            raise ValueError("n must be non-negative.")
+        rng = random.Random(seed) if seed is not None else self.rng
+        snapshot = self._snapshot
+        index = snapshot.index
+        if weighted:
+            candidates = index.candidates_mask(liked_by=liked_by, location=location, max_cost=max_cost, n_people=n_people)
+            with self._sampler_lock:
+                drawn = self._novelty_sampler(snapshot).sample(n, candidates, rng, replace)
+            return [index.slots[slot] for slot in drawn]
+        cached = None
+        if self.store:
+            # Filter in SQL and draw ids, then fetch only the drawn ideas.
+            candidates = self.store.candidate_ids(liked_by=liked_by, location=location, max_cost=max_cost, n_people=n_people)
+        else:
+            cached = self._candidates(snapshot, liked_by, location, max_cost, n_people)
+            if cached is not None:
+                # Draw from the cached slot list, then look up only the drawn ideas
+                with self._filter_lock:
+                    candidates = cached.slots(index)
+            else:
+                candidates = index.ideas_of(index.candidates_mask(liked_by=liked_by, location=location, max_cost=max_cost, n_people=n_people))
+        if not candidates:
+            return []
+        if replace:
+            chosen = rng.choices(candidates, k=n)
+        else:
+            chosen = rng.sample(candidates, min(n, len(candidates)))
+        if cached is not None:
+            return [index.slots[slot] for slot in chosen]
+        return self.store.ideas_by_id(chosen) if self.store else chosen
 
-    def record_date(self, idea: DateIdea, date: Optional[str] = None, n_people: Optional[int] = None):
-        """ Records a date idea in the history. """
+    @timed('manager.record_date')
+    def record_date(self, idea: DateIdea, date: Optional[str] = None, n_people: Optional[int] = None) -> Dict:
+        """ Records a date idea in the history and returns the new entry. """
         if not isinstance(idea, DateIdea):
             raise ValueError("Expected a DateIdea instance")
         if n_people is None:
             raise ValueError("n_people must be specified to record cost per person.")
         cost_per_person = self._cost_per_person(idea, n_people)
-        self.history.add_entry(idea.name, date, cost_per_person)  # Date is optional, will use current date if None
+        with self._lock:
+            entry = self.history.add_entry(idea.name, date, cost_per_person)  # Date is optional, will use current date if None
+        if self._sampler is not None:
+            # Keep the weighted sampler current incrementally rather than at the next draw
+            self.novelty_sampler()
+        return entry
+
+    def clear_history(self, n: Optional[int] = None):
+        """Clears the last n entries of the date history (all of it if n is None)."""
+        with self._lock:
+            self.history.clear(n)
 
-    def clear_history(self):
-        """Clears the date history."""
-        self.history.clear()
+    def idea_frames(self):
+        """Returns the columnar view of the catalog, rebuilt only when the catalog changes."""
+        return self._snapshot.frames()
 
+    @timed('manager.analyze')
     def analyze(self):
         """
         Returns only suggestions for balancing activities.
         """
-        all_liked_by = set()
-        all_locations = set()
-        all_tags = set()
-        all_ideas = set()
-        for idea in self.ideas:
-            all_ideas.add(idea.name)
-            all_liked_by.update(idea.liked_by)
-            all_locations.update(idea.location)
-            all_tags.update(idea.tags)
-        stats = {
-            'by_idea': {name: 0 for name in all_ideas},
-            'by_liked_by': {person: 0 for person in all_liked_by},
-            'by_location': {loc: 0 for loc in all_locations},
-            'by_tag': {tag: 0 for tag in all_tags},
-            'total': 0
-        }
-        for entry in self.history.get_history():
-            idea = next((i for i in self.ideas if i.name == entry['activity_name']), None)
-            if not idea:
-                continue
-            stats['by_idea'][idea.name] += 1
-            for person in idea.liked_by:
-                stats['by_liked_by'][person] += 1
-            for loc in idea.location:
-                stats['by_location'][loc] += 1
-            for tag in idea.tags:
-                stats['by_tag'][tag] += 1
-            stats['total'] += 1
-        suggestions = []
-        if stats['by_location'] and len(stats['by_location']) > 1:
-            min_count = min(stats['by_location'].values())
-            min_locs = [loc for loc, count in stats['by_location'].items() if count == min_count]
-            if min_locs:
-                suggestions.append(f"Try more activities at: {', '.join(min_locs)}")
-        if stats['by_liked_by'] and len(stats['by_liked_by']) > 1:
-            min_count = min(stats['by_liked_by'].values())
-            min_people = [person for person, count in stats['by_liked_by'].items() if count == min_count]
-            if min_people:
-                suggestions.append(f"Try more activities liked by: {', '.join(min_people)}")
-        if stats['by_tag'] and len(stats['by_tag']) > 1:
-            min_count = min(stats['by_tag'].values())
-            min_tags = [tag for tag, count in stats['by_tag'].items() if count == min_count]
-            if min_tags:
-                suggestions.append(f"Try more activities with tag: {', '.join(min_tags)}")
-        return suggestions
+        from analytics import stats_from_activity_counts, balance_suggestions
+        if self.store and self.history.journal is self.store:
+            # Ideas and history share the database, so the counts are one SQL join.
+            stats = self.store.count_stats()
+        else:
+            snapshot = self._snapshot
+            stats = stats_from_activity_counts(snapshot.frames(), snapshot.stats.by_activity)
+        return balance_suggestions(stats)
 
     def generate_visualizations(self):
         """
@@ -112,14 +593,15 @@ class DateIdeaManager:
         3. Bar chart: Total count of tags (sorted by count)
         4. Bar chart: Money spent on dates per month
         """
-        history = self.history.get_history()
-        if not history:
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as ticker
+        from matplotlib_venn import venn2
+        stats = self._snapshot.stats
+        if not stats.entries:
             print("No history to visualize.")
             return
-        # Helper: get DateIdea by name
-        idea_by_name = {idea.name: idea for idea in self.ideas}
         # 1. Bar chart: Number of times each activity was done
-        activity_counts = Counter(entry['activity_name'] for entry in history)
+        activity_counts = stats.by_activity
         activities, counts = zip(*sorted(activity_counts.items(), key=lambda x: x[1], reverse=True))
         plt.figure(figsize=(8, 4))
         plt.bar(activities, counts, color='skyblue')
@@ -130,27 +612,13 @@ class DateIdeaManager:
         plt.tight_layout()
         plt.show()
         # 2. Venn Diagram: Percent of dates liked by bf, gf, both
-        bf_set, gf_set = set(), set()
-        for entry in history:
-            idea = idea_by_name.get(entry['activity_name'])
-            if not idea:
-                continue
-            # Instead of entry['activity_name'] + entry['date'], use a tuple:
-            date_key = (entry['activity_name'], entry['date'])
-            if 'bf' in idea.liked_by:
-                bf_set.add(date_key)
-            if 'gf' in idea.liked_by:
-                gf_set.add(date_key)
+        regions = stats.liked_by_regions
         plt.figure(figsize=(6, 6))
-        venn2((bf_set, gf_set), set_labels=('bf', 'gf'))
+        venn2(subsets=(regions['bf'], regions['gf'], regions['both']), set_labels=('bf', 'gf'))
         plt.title('Percent of Dates Liked by bf, gf, and Both')
         plt.show()
         # 3. Bar chart: Total count of tags (sorted by count)
-        tag_counter = Counter()
-        for entry in history:
-            idea = idea_by_name.get(entry['activity_name'])
-            if idea:
-                tag_counter.update(idea.tags)
+        tag_counter = +stats.by_tag
         if tag_counter:
             tags, tag_counts = zip(*sorted(tag_counter.items(), key=lambda x: x[1], reverse=True))
             plt.figure(figsize=(8, 4))
@@ -162,16 +630,7 @@ class DateIdeaManager:
             plt.tight_layout()
             plt.show()
         # 4. Bar chart: Money spent per person on dates per month
-        month_spending = defaultdict(float)
-        for entry in history:
-            date_str = entry['date']
-            try:
-                month = datetime.strptime(date_str, "%Y-%m-%d").strftime("%Y-%m")
-            except Exception:
-                continue
-            cost_per_person = entry.get('cost_per_person')
-            if cost_per_person is not None:
-                month_spending[month] += cost_per_person
+        month_spending = stats.month_spending
         if month_spending:
             months, spend = zip(*sorted(month_spending.items()))
             plt.figure(figsize=(8, 4))
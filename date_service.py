@@ -0,0 +1,308 @@
+"""
+Local HTTP service around one long-lived DateIdeaManager (stdlib asyncio only).
+
+    python -m date_service [--host 127.0.0.1] [--port 8765] [--ideas ideas.json] [--history history.jsonl]
+
+    GET  /sample?n_people=2&max_cost=500[&liked_by=bf&location=home&weighted=1]
+    GET  /sample/batch?n=5&n_people=2&max_cost=500[&seed=1&replace=1]
+    POST /record           {"name": "Movie @ Home", "n_people": 2, "date": "2025-07-01"}
+    GET  /history?offset=0&limit=50[&newest_first=0]
+    GET  /analyze
+    GET  /similar?name=Movie%20@%20Home&k=5[&untried=0&history_weight=1]
+    GET  /plan?dates=8&budget=4000&n_people=2[&max_per_location=3&timeout=0.5]
+
+Responses are JSON. Reads run on a pool of reader threads against the manager's latest
+snapshot, so a slow /analyze or /plan does not hold up other connections; writes are
+queued to a single writer task, which applies them one at a time and in arrival order on
+a writer thread, so disk syncs never stall the readers. Deterministic GET responses
+(everything except unseeded sampling) are cached until the next write.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from date_idea import DateIdea
+from date_manager import DateIdeaManager
+from datepicker import handle
+from metrics import configure
+
+# path -> datepicker op
+ROUTES = {'/sample': 'sample', '/sample/batch': 'batch-sample', '/history': 'history', '/analyze': 'analyze',
+          '/similar': 'similar', '/plan': 'plan'}
+WRITE_ROUTES = {'/record': 'record'}
+_INTS = ('n_people', 'n', 'seed', 'offset', 'limit', 'k', 'dates', 'max_per_location', 'max_per_tag')
+_FLOATS = ('max_cost', 'history_weight', 'budget', 'repeat_penalty', 'timeout')
+_BOOLS = ('weighted', 'replace', 'newest_first', 'untried', 'allow_repeats', 'novelty')
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+            500: 'Internal Server Error'}
+MAX_BODY = 1 << 20
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _query_request(op: str, query: str) -> Dict:
+    request: Dict[str, Any] = {'op': op}
+    for key, value in parse_qsl(query):
+        try:
+            if key in _INTS:
+                request[key] = int(value)
+            elif key in _FLOATS:
+                request[key] = float(value)
+            elif key in _BOOLS:
+                request[key] = value.lower() not in ('0', 'false', 'no', '')
+            else:
+                request[key] = value
+        except ValueError:
+            raise HTTPError(400, f"invalid value for {key}: {value!r}") from None
+    return request
+
+def _cacheable(request: Dict) -> bool:
+    op = request['op']
+    # Random draws must differ between calls; only a seed the op actually uses fixes them.
+    # sample takes no seed, and uniform plans search a pool drawn at random.
+    if op == 'sample':
+        return False
+    if op == 'batch-sample':
+        return request.get('seed') is not None
+    if op == 'plan':
+        return request.get('novelty', True) or request.get('seed') is not None
+    return True
+
+class DateService:
+    """Serves one DateIdeaManager over HTTP/1.1 with keep-alive connections."""
+    def __init__(self, manager: DateIdeaManager, cache_size: int = 256, read_workers: int = 4):
+        self.manager = manager
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Counts completed writes, so a read that overlapped one is not cached
+        self._generation = 0
+        self._writes: Optional[asyncio.Queue] = None
+        self._write_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='date-service-writer')
+        self._read_threads = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix='date-service-reader')
+        self._writer: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> int:
+        """Starts listening and returns the bound port (useful with port=0)."""
+        self._writes = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._writer is not None:
+            self._writer.cancel()
+        self._write_thread.shutdown(wait=True)
+        self._read_threads.shutdown(wait=True)
+        self.manager.history.flush()
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            request, future = await self._writes.get()
+            try:
+                result = await loop.run_in_executor(self._write_thread, handle, self.manager, request)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                # Any write can change every cached answer
+                self._generation += 1
+                self.cache.clear()
+                if not future.cancelled():
+                    future.set_result(result)
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> bytes:
+        """Returns the encoded JSON response body for one request, raising HTTPError on failure."""
+        url = urlsplit(target)
+        if url.path in WRITE_ROUTES:
+            if method != 'POST':
+                raise HTTPError(405, f"{url.path} expects POST")
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError as e:
+                raise HTTPError(400, f"invalid JSON body: {e}") from None
+            if not isinstance(request, dict):
+                raise HTTPError(400, "request body must be a JSON object")
+            request['op'] = WRITE_ROUTES[url.path]
+            future = asyncio.get_running_loop().create_future()
+            await self._writes.put((request, future))
+            return self._encode(await future)
+        op = ROUTES.get(url.path)
+        if op is None:
+            raise HTTPError(404, f"no such endpoint: {url.path}")
+        if method != 'GET':
+            raise HTTPError(405, f"{url.path} expects GET")
+        request = _query_request(op, url.query)
+        loop = asyncio.get_running_loop()
+        if not _cacheable(request):
+            return await loop.run_in_executor(self._read_threads, self._read, request)
+        key = (op, tuple(sorted(request.items())))
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        generation = self._generation
+        encoded = await loop.run_in_executor(self._read_threads, self._read, request)
+        if generation == self._generation:
+            self.cache[key] = encoded
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return encoded
+
+    def _read(self, request: Dict) -> bytes:
+        return self._encode(handle(self.manager, request))
+
+    @staticmethod
+    def _encode(result: Any) -> bytes:
+        return json.dumps(result, ensure_ascii=False).encode('utf-8')
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, 400, b'{"error": "malformed request line"}', False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY:
+                    await self._respond(writer, 413, b'{"error": "bad or too large Content-Length"}', False)
+                    return
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = 200, await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, self._encode({'error': str(e)})
+                except (ValueError, TypeError, KeyError) as e:
+                    status, payload = 400, self._encode({'error': str(e)})
+                except Exception as e:
+                    # Answer rather than drop the connection on an unexpected failure
+                    status, payload = 500, self._encode({'error': f"{type(e).__name__}: {e}"})
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: bytes, keep_alive: bool):
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload)
+        await writer.drain()
+
+class ServiceClient:
+    """
+    Blocking client for DateService with the manager's method names, so a device (such as
+    the Kivy app) can use a shared service instead of loading the JSON files itself.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, timeout: float = 10.0):
+        self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _call(self, method: str, path: str, params: Optional[Dict] = None, body: Optional[Dict] = None):
+        query = urlencode({k: v for k, v in (params or {}).items() if v is not None})
+        self.conn.request(method, f"{path}?{query}" if query else path,
+                          body=None if body is None else json.dumps(body).encode('utf-8'),
+                          headers={'Content-Type': 'application/json'})
+        response = self.conn.getresponse()
+        data = json.loads(response.read())
+        if response.status != 200:
+            raise ValueError(data.get('error', f"HTTP {response.status}"))
+        return data
+
+    def sample_idea(self, liked_by: Optional[str] = None, location: Optional[str] = None, max_cost: Optional[float] = None,
+                    n_people: Optional[int] = None, weighted: bool = False) -> Optional[DateIdea]:
+        data = self._call('GET', '/sample', dict(liked_by=liked_by, location=location, max_cost=max_cost,
+                                                 n_people=n_people, weighted=int(weighted)))
+        return None if data is None else DateIdea(**data)
+
+    def sample_ideas(self, n: int, liked_by: Optional[str] = None, location: Optional[str] = None,
+                     max_cost: Optional[float] = None, n_people: Optional[int] = None, replace: bool = False,
+                     seed: Optional[int] = None, weighted: bool = False):
+        data = self._call('GET', '/sample/batch', dict(n=n, liked_by=liked_by, location=location, max_cost=max_cost,
+                                                       n_people=n_people, replace=int(replace), seed=seed,
+                                                       weighted=int(weighted)))
+        return [DateIdea(**idea) for idea in data]
+
+    def record_date(self, idea: DateIdea, date: Optional[str] = None, n_people: Optional[int] = None) -> Dict:
+        return self._call('POST', '/record', body={'name': idea.name, 'date': date, 'n_people': n_people})
+
+    def history_page(self, offset: int = 0, limit: int = 50, newest_first: bool = True):
+        return self._call('GET', '/history', dict(offset=offset, limit=limit, newest_first=int(newest_first)))
+
+    def analyze(self):
+        return self._call('GET', '/analyze')
+
+    def similar_ideas(self, idea, k: int = 10, untried: bool = True, history_weight: float = 0.0):
+        name = idea if isinstance(idea, str) else idea.name
+        data = self._call('GET', '/similar', dict(name=name, k=k, untried=int(untried), history_weight=history_weight))
+        return [DateIdea(**item) for item in data]
+
+    def plan_itinerary(self, dates: int, budget: float, n_people: int, **options) -> Dict:
+        """Same options as planner.plan_itinerary; returns the Itinerary fields as a dict."""
+        params = dict(dates=dates, budget=budget, n_people=n_people)
+        params.update({k: int(v) if isinstance(v, bool) else v for k, v in options.items()})
+        data = self._call('GET', '/plan', params)
+        data['ideas'] = [DateIdea(**idea) for idea in data['ideas']]
+        return data
+
+    def close(self):
+        self.conn.close()
+
+async def _main(args):
+    service = DateService(DateIdeaManager(args.ideas, history_file=args.history))
+    port = await service.start(args.host, args.port)
+    print(f"Serving on http://{args.host}:{port}", flush=True)
+    await service.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP service for date ideas.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ideas', default='ideas.json')
+    parser.add_argument('--history', default=None)
+    parser.add_argument('--metrics', default=None,
+                        help='metrics sinks, e.g. "ring,jsonl=metrics.jsonl,prometheus=9108" (default: $DATEPICKER_METRICS)')
+    args = parser.parse_args()
+    configure(args.metrics)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from date_idea import DateIdea
+
+def _month(date_str: Optional[str]) -> Optional[str]:
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").strftime("%Y-%m")
+    except Exception:
+        return None
+
+def _drop_empty(counter: Counter, keys: Iterable[str]):
+    for key in keys:
+        if counter.get(key, 1) <= 0:
+            del counter[key]
+
+class DateStats:
+    """
+    Running aggregates over a DateHistory, so analysis and charts never rescan it.
+
+    Each added entry updates activity, tag, liked_by and location counts, the bf/gf Venn
+    regions and monthly spend in O(tags); clears roll the removed entries back. Activity
+    and monthly figures are persisted next to the history by save(), which the owning
+    DateHistory calls every so many writes rather than on each one; sync() catches a
+    saved file that lags the history up by replaying the missing entries. Counts that
+    depend on idea attributes are re-derived from the activity counts whenever the
+    catalog changes, because history entries only store the activity name.
+    """
+    def __init__(self, file_path: str, lookup: Optional[Callable[[str], Optional[DateIdea]]] = None):
+        self.file_path = file_path
+        self.lookup = lookup or (lambda name: None)
+        self.entries = 0
+        self.last_entry: Optional[Dict] = None
+        self.by_activity: Counter = Counter()
+        self.month_spending: Dict[str, float] = {}
+        self.month_entries: Counter = Counter()
+        self._reset_attributes()
+
+    def copy(self) -> "DateStats":
+        """Returns an independent copy; DateHistory edits a copy and swaps it in, so readers never see a half-applied entry."""
+        clone = DateStats(self.file_path, self.lookup)
+        clone.entries = self.entries
+        clone.last_entry = self.last_entry
+        clone.matched = self.matched
+        for attr in ('by_activity', 'month_spending', 'month_entries', 'by_liked_by', 'by_location', 'by_tag',
+                     'liked_by_regions'):
+            setattr(clone, attr, getattr(self, attr).copy())
+        return clone
+
+    def extended(self, entries: List[Dict]) -> "DateStats":
+        """Returns a copy with `entries` added, leaving this one unchanged."""
+        clone = self.copy()
+        for entry in entries:
+            clone.add(entry)
+        return clone
+
+    def _reset_attributes(self):
+        self.matched = 0
+        self.by_liked_by: Counter = Counter()
+        self.by_location: Counter = Counter()
+        self.by_tag: Counter = Counter()
+        self.liked_by_regions: Counter = Counter()
+
+    def _apply_idea(self, idea: DateIdea, count: int):
+        self.matched += count
+        for person in idea.liked_by:
+            self.by_liked_by[person] += count
+        for loc in idea.location:
+            self.by_location[loc] += count
+        for tag in idea.tags:
+            self.by_tag[tag] += count
+        bf, gf = 'bf' in idea.liked_by, 'gf' in idea.liked_by
+        if bf or gf:
+            self.liked_by_regions['both' if bf and gf else 'bf' if bf else 'gf'] += count
+        if count < 0:
+            # Drop values no longer counted, as a rebuild would not list them
+            _drop_empty(self.by_liked_by, idea.liked_by)
+            _drop_empty(self.by_location, idea.location)
+            _drop_empty(self.by_tag, idea.tags)
+            _drop_empty(self.liked_by_regions, ('both', 'bf', 'gf'))
+
+    def _apply(self, entry: Dict, sign: int):
+        name = entry['activity_name']
+        self.entries += sign
+        self.by_activity[name] += sign
+        if self.by_activity[name] <= 0:
+            del self.by_activity[name]
+        idea = self.lookup(name)
+        if idea:
+            self._apply_idea(idea, sign)
+        month = _month(entry.get('date'))
+        cost_per_person = entry.get('cost_per_person')
+        if month and cost_per_person is not None:
+            self.month_entries[month] += sign
+            self.month_spending[month] = self.month_spending.get(month, 0.0) + sign * cost_per_person
+            if self.month_entries[month] <= 0:
+                del self.month_entries[month]
+                del self.month_spending[month]
+
+    def add(self, entry: Dict):
+        self._apply(entry, 1)
+        self.last_entry = entry
+
+    def remove(self, removed: List[Dict], history: List[Dict]):
+        """Rolls back entries removed from the end of the history; `history` is what remains."""
+        if not history:
+            self.reset()
+        else:
+            for entry in removed:
+                self._apply(entry, -1)
+            self.last_entry = history[-1]
+
+    def reset(self):
+        self.entries = 0
+        self.last_entry = None
+        self.by_activity.clear()
+        self.month_spending.clear()
+        self.month_entries.clear()
+        self._reset_attributes()
+
+    def rebuild(self, history: List[Dict]):
+        """Recomputes everything from a full history scan."""
+        self.reset()
+        for entry in history:
+            self._apply(entry, 1)
+        self.last_entry = history[-1] if history else None
+
+    def refresh_catalog(self):
+        """Re-derives attribute counts from activity counts after the catalog changed."""
+        self._reset_attributes()
+        for name, count in self.by_activity.items():
+            idea = self.lookup(name)
+            if idea:
+                self._apply_idea(idea, count)
+
+    def refresh_ideas(self, names: Iterable[str], old_lookup: Callable[[str], Optional[DateIdea]],
+                      new_lookup: Callable[[str], Optional[DateIdea]]):
+        """
+        Moves the attribute counts of the given activities from the ideas old_lookup finds
+        for them to the ones new_lookup finds, after catalog edits that only changed those.
+        """
+        for name in names:
+            count = self.by_activity.get(name)
+            old, new = old_lookup(name), new_lookup(name)
+            if not count or old == new:
+                continue
+            if old:
+                self._apply_idea(old, -count)
+            if new:
+                self._apply_idea(new, count)
+
+    def sync(self, history: List[Dict]):
+        """
+        Loads the persisted aggregates and adds the entries recorded after they were saved,
+        or rebuilds them if they do not match the history. Saves the result if it differs
+        from the file.
+        """
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            saved = data["entries"]
+            in_sync = saved <= len(history) and data["last_entry"] == (history[saved - 1] if saved else None)
+        except (FileNotFoundError, Exception):
+            in_sync = False
+        if not in_sync:
+            self.rebuild(history)
+            self.save()
+            return
+        self.reset()
+        self.entries = saved
+        self.last_entry = data["last_entry"]
+        self.by_activity.update(data["by_activity"])
+        self.month_spending.update(data["month_spending"])
+        self.month_entries.update(data["month_entries"])
+        self.refresh_catalog()
+        if saved < len(history):
+            for entry in history[saved:]:
+                self.add(entry)
+            self.save()
+
+    def save(self):
+        tmp_path = self.file_path + ".tmp"
+        # json.dumps uses the C encoder; json.dump to a file streams through the pure-Python one
+        data = json.dumps({
+            "entries": self.entries,
+            "last_entry": self.last_entry,
+            "by_activity": self.by_activity,
+            "month_spending": self.month_spending,
+            "month_entries": self.month_entries,
+        }, ensure_ascii=False)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.file_path)
@@ -0,0 +1,195 @@
+"""
+Headless command-line interface to DateIdeaManager; never imports Kivy.
+
+    python -m datepicker sample --n-people 2 --max-cost 500 [--liked-by bf] [--location home] [--weighted]
+    python -m datepicker batch-sample -n 10 --n-people 2 --max-cost 500 [--seed 1] [--replace]
+    python -m datepicker record "Movie @ Home" --n-people 2 [--date 2025-07-01]
+    python -m datepicker history [--limit 50] [--offset 0] [--oldest-first] [--start D] [--end D] [--activity NAME]
+    python -m datepicker analyze
+    python -m datepicker similar "Movie @ Home" -k 5 [--include-tried] [--history-weight 1]
+    python -m datepicker plan --dates 8 --budget 4000 --n-people 2 [--max-per-location 3] [--timeout 1]
+    python -m datepicker render-charts --out charts/
+    python -m datepicker stream < requests.jsonl
+    python -m datepicker --metrics on analyze     # also prints timings of the instrumented calls to stderr
+
+Every command prints one JSON document. `stream` reads one JSON request per line from
+stdin, e.g. {"op": "sample", "n_people": 2, "max_cost": 500}, and writes one JSON line
+per request: {"ok": true, "result": ...} or {"ok": false, "error": "..."}. The manager,
+its indexes and caches stay loaded between requests.
+"""
+import argparse
+import dataclasses
+import json
+import sys
+from typing import Any, Dict, List, Optional
+from date_manager import DateIdeaManager
+from metrics import configure, metrics
+
+OPS = ('sample', 'batch-sample', 'record', 'history', 'analyze', 'similar', 'plan', 'render-charts', 'metrics')
+
+def _idea_json(idea) -> Optional[Dict]:
+    return None if idea is None else dataclasses.asdict(idea)
+
+def _filters(request: Dict) -> Dict:
+    return {key: request.get(key) for key in ('liked_by', 'location', 'max_cost', 'n_people')}
+
+def handle(manager: DateIdeaManager, request: Dict) -> Any:
+    """Runs one request against the manager and returns a JSON-serializable result."""
+    op = request.get('op')
+    if op == 'sample':
+        return _idea_json(manager.sample_idea(**_filters(request), weighted=bool(request.get('weighted'))))
+    if op == 'batch-sample':
+        ideas = manager.sample_ideas(int(request.get('n', 1)), **_filters(request), replace=bool(request.get('replace')),
+                                     seed=request.get('seed'), weighted=bool(request.get('weighted')))
+        return [_idea_json(idea) for idea in ideas]
+    if op == 'record':
+        name = request.get('name')
+        idea = manager.find_idea(name) if isinstance(name, str) else None
+        if idea is None:
+            raise ValueError(f"unknown idea: {name!r}")
+        return manager.record_date(idea, date=request.get('date'), n_people=request.get('n_people'))
+    if op == 'history':
+        history = manager.history.view()
+        if request.get('activity') is not None:
+            entries = history.by_activity(request['activity'])
+        elif request.get('start') is not None or request.get('end') is not None:
+            entries = list(history.iter_range(request.get('start'), request.get('end')))
+        else:
+            return history.page(int(request.get('offset', 0)), int(request.get('limit', 50)),
+                                newest_first=request.get('newest_first', True))
+        offset, limit = int(request.get('offset', 0)), request.get('limit')
+        return entries[offset:None if limit is None else offset + int(limit)]
+    if op == 'analyze':
+        return manager.analyze()
+    if op == 'similar':
+        if not isinstance(request.get('name'), str):
+            raise ValueError("similar needs the name of an idea")
+        ideas = manager.similar_ideas(request['name'], int(request.get('k', 10)), untried=request.get('untried', True),
+                                      history_weight=float(request.get('history_weight', 0.0)))
+        return [_idea_json(idea) for idea in ideas]
+    if op == 'plan':
+        from planner import plan_itinerary
+        options = {key: request[key] for key in ('max_per_location', 'max_per_tag', 'repeat_penalty', 'timeout', 'seed')
+                   if request.get(key) is not None}
+        plan = plan_itinerary(manager, int(request.get('dates', 1)), request.get('budget'), request.get('n_people'),
+                              liked_by=request.get('liked_by'), location=request.get('location'),
+                              max_cost=request.get('max_cost'), allow_repeats=bool(request.get('allow_repeats')),
+                              novelty=request.get('novelty', True), **options)
+        result = dataclasses.asdict(plan)
+        result['ideas'] = [_idea_json(idea) for idea in plan.ideas]
+        return result
+    if op == 'render-charts':
+        from charts import export_charts
+        return export_charts(manager.snapshot().stats, request.get('out') or 'charts')
+    if op == 'metrics':
+        return {'spans': metrics.snapshot(), 'counters': dict(metrics.counters), 'enabled': metrics.enabled,
+                'filter_cache': manager.filter_cache_stats()}
+    raise ValueError(f"unknown op {op!r}; expected one of {', '.join(OPS)}")
+
+def stream(manager: DateIdeaManager, lines, out) -> int:
+    """Answers JSON-lines requests until end of input; returns the number of failed requests."""
+    failures = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            response = {'ok': True, 'result': handle(manager, request)}
+        except (ValueError, TypeError, KeyError, OSError) as e:
+            failures += 1
+            response = {'ok': False, 'error': str(e)}
+        if isinstance(request, dict) and 'id' in request:
+            # Echo a caller-supplied id so responses can be matched to requests
+            response['id'] = request['id']
+        out.write(json.dumps(response, ensure_ascii=False) + '\n')
+        out.flush()
+    return failures
+
+def _add_filters(parser: argparse.ArgumentParser):
+    parser.add_argument('--liked-by', dest='liked_by')
+    parser.add_argument('--location')
+    parser.add_argument('--max-cost', dest='max_cost', type=float, required=True)
+    parser.add_argument('--n-people', dest='n_people', type=int, required=True)
+    parser.add_argument('--weighted', action='store_true', help='favour under-used and not recently done ideas')
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m datepicker', description='Headless DatePicker commands.')
+    parser.add_argument('--ideas', default='ideas.json', help='ideas JSON or SQLite file (default: ideas.json)')
+    parser.add_argument('--history', default=None, help='history file (default: history.jsonl, or the SQLite ideas file)')
+    parser.add_argument('--compact', action='store_true', help='keep the catalog in array columns (very large catalogs)')
+    parser.add_argument('--metrics', default=None,
+                        help='metrics sinks, e.g. "ring,jsonl=metrics.jsonl,prometheus=9108" (default: $DATEPICKER_METRICS)')
+    commands = parser.add_subparsers(dest='op', required=True)
+    _add_filters(commands.add_parser('sample', help='sample one idea'))
+    batch = commands.add_parser('batch-sample', help='sample several ideas, filtering once')
+    _add_filters(batch)
+    batch.add_argument('-n', type=int, default=10)
+    batch.add_argument('--replace', action='store_true')
+    batch.add_argument('--seed', type=int)
+    record = commands.add_parser('record', help='record a date by idea name')
+    record.add_argument('name')
+    record.add_argument('--n-people', dest='n_people', type=int, required=True)
+    record.add_argument('--date', help='YYYY-MM-DD (default: today)')
+    history = commands.add_parser('history', help='list history entries')
+    history.add_argument('--offset', type=int, default=0)
+    history.add_argument('--limit', type=int, default=50)
+    history.add_argument('--oldest-first', dest='newest_first', action='store_false')
+    history.add_argument('--start', help='first date, YYYY-MM-DD')
+    history.add_argument('--end', help='last date, YYYY-MM-DD')
+    history.add_argument('--activity')
+    commands.add_parser('analyze', help='print balancing suggestions')
+    similar = commands.add_parser('similar', help='ideas most like the named one')
+    similar.add_argument('name')
+    similar.add_argument('-k', type=int, default=10)
+    similar.add_argument('--include-tried', dest='untried', action='store_false', help='also list ideas already done')
+    similar.add_argument('--history-weight', dest='history_weight', type=float, default=0.0,
+                         help='favour under-used, not recently done ideas (0 = similarity only)')
+    plan = commands.add_parser('plan', help='plan several dates within a total per-person budget')
+    plan.add_argument('--dates', type=int, required=True)
+    plan.add_argument('--budget', type=float, required=True, help='total per-person budget for all dates')
+    plan.add_argument('--n-people', dest='n_people', type=int, required=True)
+    plan.add_argument('--liked-by', dest='liked_by')
+    plan.add_argument('--location')
+    plan.add_argument('--max-cost', dest='max_cost', type=float, help='per-person cap for a single date')
+    plan.add_argument('--max-per-location', dest='max_per_location', type=int)
+    plan.add_argument('--max-per-tag', dest='max_per_tag', type=int)
+    plan.add_argument('--repeat-penalty', dest='repeat_penalty', type=float)
+    plan.add_argument('--allow-repeats', dest='allow_repeats', action='store_true')
+    plan.add_argument('--uniform', dest='novelty', action='store_false', help='ignore the history when weighing ideas')
+    plan.add_argument('--timeout', type=float, help='seconds to search (default 1)')
+    plan.add_argument('--seed', type=int, help='makes the --uniform pool reproducible')
+    charts = commands.add_parser('render-charts', help='write the visualization charts as PNG files')
+    charts.add_argument('--out', default='charts')
+    commands.add_parser('stream', help='answer JSON-lines requests from stdin')
+    commands.add_parser('metrics', help='print the collected timings (useful in stream mode)')
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure(args.metrics)
+    manager = DateIdeaManager(args.ideas, history_file=args.history, compact=args.compact)
+    try:
+        return _run(manager, args)
+    finally:
+        # Save the history stats now rather than catching them up on the next start
+        manager.history.close()
+
+def _run(manager: DateIdeaManager, args: argparse.Namespace) -> int:
+    if args.op == 'stream':
+        return 1 if stream(manager, sys.stdin, sys.stdout) else 0
+    request = {key: value for key, value in vars(args).items() if key not in ('ideas', 'history', 'compact', 'metrics')}
+    try:
+        result = handle(manager, request)
+    except (ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if metrics.enabled:
+        print(json.dumps(metrics.snapshot(), indent=2), file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import random
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from date_idea import DateIdea
+from idea_index import IdeaIndex
+from metrics import count
+
+# (liked_by, location, n_people, cost floor)
+FilterKey = Tuple[Optional[str], Optional[str], int, float]
+
+class CandidateSet:
+    """
+    The ideas matching one filter key: their bitset, plus what drawing from it needs
+    (the packed bitset for rejection sampling, or the slot list), built on first use.
+    """
+    __slots__ = ('mask', 'count', 'n_slots', '_packed', '_slots')
+
+    def __init__(self, mask: int, n_slots: int):
+        self.mask = mask
+        self.count = mask.bit_count()
+        self.n_slots = n_slots
+        self._packed: Optional[bytes] = None
+        self._slots: Optional[List[int]] = None
+
+    def slots(self, index: IdeaIndex) -> List[int]:
+        """The matching slots in ascending order, as IdeaIndex.slots_of returns them."""
+        if self._slots is None:
+            self._slots = index.slots_of(self.mask)
+        return self._slots
+
+    def choice(self, index: IdeaIndex, rng: random.Random) -> Optional[int]:
+        """A uniformly random matching slot, drawn the same way as IdeaIndex.choice."""
+        if not self.count:
+            return None
+        if self.count * 16 >= self.n_slots:
+            if self._packed is None:
+                self._packed = self.mask.to_bytes((self.n_slots + 7) >> 3, 'little')
+            packed = self._packed
+            while True:
+                slot = rng.randrange(self.n_slots)
+                if packed[slot >> 3] >> (slot & 7) & 1:
+                    return slot
+        return self.slots(index)[rng.randrange(self.count)]
+
+class FilterCache:
+    """
+    LRU cache of the candidate sets of recently sampled filter combinations, so that
+    sampling the same filters again (e.g. "Reject" in the app) skips filtering.
+
+    Entries are keyed by (liked_by, location, n_people, cost floor), where the cost floor
+    is max_cost lowered to the highest per-person cost of any idea within it
+    (IdeaIndex.cost_floor): budgets with no idea priced between them select the same
+    ideas, so they share one exact entry. At most `size` sets are kept.
+
+    The cache follows one IdeaIndex. After catalog edits, update() is given the edited
+    slots and drops only the sets the old or new version of each one belongs to;
+    `version` is the owner's catalog version the cached sets reflect.
+    """
+    def __init__(self, index: IdeaIndex, size: int = 64):
+        self.index = index
+        self.size = size
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[FilterKey, CandidateSet]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, liked_by: Optional[str], location: Optional[str], max_cost: float, n_people: int) -> CandidateSet:
+        """The candidate set for these filters (n_people must be positive)."""
+        key = (liked_by or None, location or None, n_people, self.index.cost_floor(max_cost, n_people))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            count('filter_cache.hit')
+            self._entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        count('filter_cache.miss')
+        mask = self.index.candidates_mask(liked_by=key[0], location=key[1], max_cost=key[3], n_people=n_people)
+        entry = self._entries[key] = CandidateSet(mask, len(self.index.slots))
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def _matches(self, key: FilterKey, idea: DateIdea) -> bool:
+        liked_by, location, n_people, floor = key
+        cost = idea.cost / n_people if idea.cost_type == 'total' else idea.cost
+        return ((not liked_by or liked_by in idea.liked_by) and (not location or location in idea.location)
+                and idea.max_people >= n_people and cost <= floor)
+
+    def update(self, index: IdeaIndex, slots: Iterable[int]):
+        """Follows `index` after the given slots changed, dropping the sets they were or now are in."""
+        self.index = index
+        for slot in slots:
+            idea = index.slots[slot] if slot < len(index.slots) else None
+            stale = [key for key, entry in self._entries.items()
+                     if entry.mask >> slot & 1 or (idea is not None and self._matches(key, idea))]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self, index: IdeaIndex):
+        """Drops every set and follows `index`, e.g. after the whole catalog was replaced."""
+        self.index = index
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions, 'invalidations': self.invalidations}
@@ -0,0 +1,148 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+class JournalError(ValueError):
+    """A journal record other than the last one that cannot be read, with its line number."""
+    def __init__(self, path: str, line: int, message: str):
+        super().__init__(f"{path}:{line}: {message}")
+        self.path = path
+        self.line = line
+
+class HistoryJournal:
+    """
+    Append-only JSON-Lines storage for DateHistory.
+
+    Every accepted date is one appended line and every clear is a tombstone line, so
+    writes cost the same regardless of history size. Each record carries a sequence
+    number; after `compact_every` records the full history is written to a snapshot
+    (temp file + fsync + atomic rename) and the journal is truncated. Records already
+    covered by the snapshot are skipped on load, so a crash between the rename and the
+    truncate cannot replay them twice. A torn last line is discarded (or, if the record is
+    whole and only its newline is missing, completed); an unreadable line anywhere else
+    raises JournalError instead of dropping the records after it.
+    """
+    def __init__(self, file_path: str = "history.jsonl", compact_every: int = 1000, fsync: bool = True,
+                 legacy_path: Optional[str] = None):
+        self.file_path = file_path
+        self.snapshot_path = file_path + ".snapshot"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.legacy_path = legacy_path
+        self.seq = 0
+        self.pending = 0
+        self._fh = None
+
+    def load(self) -> List[Dict]:
+        history: List[Dict] = []
+        snapshot_seq = 0
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            history = snapshot["history"]
+            snapshot_seq = snapshot["seq"]
+        except FileNotFoundError:
+            if not os.path.exists(self.file_path) and self.legacy_path and os.path.exists(self.legacy_path):
+                with open(self.legacy_path, "r", encoding="utf-8") as f:
+                    history = json.load(f)
+                self.compact(history)
+                return history
+        self.seq = snapshot_seq
+        self.pending = 0
+        good_offset = 0
+        try:
+            with open(self.file_path, "rb") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return history
+        for number, line in enumerate(lines, 1):
+            try:
+                record = json.loads(line)
+                seq = record["seq"]
+            except (ValueError, KeyError, TypeError) as e:
+                if number == len(lines):
+                    # A torn write can only be the last line; drop it.
+                    break
+                raise JournalError(self.file_path, number, f"unreadable record: {e}") from e
+            good_offset += len(line)
+            if seq <= snapshot_seq:
+                continue
+            self._replay(history, record)
+            self.seq = seq
+            self.pending += 1
+        if good_offset != os.path.getsize(self.file_path):
+            with open(self.file_path, "r+b") as f:
+                f.truncate(good_offset)
+        elif lines and not lines[-1].endswith(b"\n"):
+            # Otherwise the next append would continue this line and make it unreadable
+            with open(self.file_path, "ab") as f:
+                f.write(b"\n")
+        return history
+
+    @staticmethod
+    def _replay(history: List[Dict], record: Dict):
+        if record["op"] == "add":
+            history.append(record["entry"])
+        elif record["op"] == "clear":
+            if record["n"] is None:
+                history.clear()
+            else:
+                del history[-record["n"]:]
+
+    def _write(self, record: Dict):
+        if self._fh is None:
+            self._fh = open(self.file_path, "a", encoding="utf-8")
+        self.seq += 1
+        record["seq"] = self.seq
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+        self.pending += 1
+
+    def append(self, entry: Dict, history: List[Dict]):
+        """Journals one added entry; `history` is the in-memory list after the append."""
+        self._write({"op": "add", "entry": entry})
+        if self.pending >= self.compact_every:
+            self.compact(history)
+
+    def clear(self, n: Optional[int], history: List[Dict]):
+        """Journals a clear of the last n entries (all if n is None) as a tombstone record."""
+        if n is not None and n <= 0:
+            raise ValueError(f"n must be a positive number of entries (or None for all), got {n}.")
+        if n is None or not history:
+            # Clearing everything is cheapest as an empty snapshot.
+            self.compact(history)
+            return
+        self._write({"op": "clear", "n": n})
+        if self.pending >= self.compact_every:
+            self.compact(history)
+
+    def compact(self, history: List[Dict]):
+        """Writes the full history to the snapshot atomically and truncates the journal."""
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": self.seq, "history": history}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self._fsync_dir()
+        self.close()
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.pending = 0
+
+    def _fsync_dir(self):
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.snapshot_path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
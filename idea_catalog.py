@@ -0,0 +1,193 @@
+import sys
+from array import array
+from collections.abc import MutableSequence
+from typing import Dict, Iterable, List, Optional, Union
+from date_idea import DateIdea
+
+class _Vocabulary:
+    """Interns values (strings or tuples of strings) to small integer codes."""
+    def __init__(self):
+        self.values: List = []
+        self.codes: Dict = {}
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class _Rows:
+    """Read-only view of a CompactCatalog by row id; free rows read as None."""
+    def __init__(self, catalog: "CompactCatalog"):
+        self._catalog = catalog
+
+    def __len__(self) -> int:
+        return len(self._catalog._names)
+
+    def __getitem__(self, row: int) -> Optional[DateIdea]:
+        return self._catalog.row(row)
+
+    def __iter__(self):
+        return (self._catalog.row(row) for row in range(len(self)))
+
+class CompactCatalog(MutableSequence):
+    """
+    Array-backed idea catalog for very large idea sets.
+
+    liked_by/location combinations and cost types are stored as codes into small
+    vocabularies, tags as tag ids in CSR-style (start, length) + values arrays, and
+    cost/max_people as typed `array` columns. DateIdea objects are created on demand
+    when an item is read, so memory stays proportional to the columns rather than to
+    one object graph per idea.
+
+    Each idea lives in a row whose id never changes while it is in the catalog; the
+    sequence order is a separate array of row ids. IdeaIndex uses row ids as slots.
+    """
+    TAG_TYPECODE = 'I'
+
+    def __init__(self, ideas: Iterable[DateIdea] = ()):
+        self._liked_by_vocab = _Vocabulary()
+        self._location_vocab = _Vocabulary()
+        self._cost_type_vocab = _Vocabulary()
+        self._tag_vocab = _Vocabulary()
+        self._names: List[Optional[str]] = []
+        self._liked_by = array('H')
+        self._location = array('H')
+        self._cost_type = array('B')
+        self._cost = array('d')
+        self._max_people = array('q')
+        self._tag_start = array('Q')
+        self._tag_len = array('H')
+        self._tag_values = array(self.TAG_TYPECODE)
+        self._tag_garbage = 0
+        self._order = array('Q')
+        self._free: List[int] = []
+        self.rows = _Rows(self)
+        for idea in ideas:
+            self.append(idea)
+
+    def _write_row(self, row: int, idea: DateIdea):
+        tag_ids = [self._tag_vocab.code(sys.intern(tag)) for tag in idea.tags]
+        values = (
+            sys.intern(idea.name),
+            self._liked_by_vocab.code(tuple(idea.liked_by)),
+            self._location_vocab.code(tuple(idea.location)),
+            self._cost_type_vocab.code(idea.cost_type),
+            idea.cost,
+            idea.max_people,
+            len(self._tag_values),
+            len(tag_ids),
+        )
+        if row == len(self._names):
+            for column, value in zip(self._columns(), values):
+                column.append(value)
+        else:
+            self._tag_garbage += self._tag_len[row]
+            for column, value in zip(self._columns(), values):
+                column[row] = value
+        self._tag_values.extend(tag_ids)
+        # Replaced tag lists are left behind in the values array; reclaim them once
+        # they make up half of it.
+        if self._tag_garbage * 2 > len(self._tag_values):
+            self._compact_tags()
+
+    def _columns(self):
+        return (self._names, self._liked_by, self._location, self._cost_type, self._cost,
+                self._max_people, self._tag_start, self._tag_len)
+
+    def _compact_tags(self):
+        values = array(self.TAG_TYPECODE)
+        for row in range(len(self._names)):
+            start, length = self._tag_start[row], self._tag_len[row]
+            self._tag_start[row] = len(values)
+            values.extend(self._tag_values[start:start + length])
+        self._tag_values = values
+        self._tag_garbage = 0
+
+    def row(self, row: int) -> Optional[DateIdea]:
+        """Builds a DateIdea view of the given row id."""
+        name = self._names[row]
+        if name is None:
+            return None
+        start = self._tag_start[row]
+        tags = self._tag_vocab.values
+        cost = self._cost[row]
+        return DateIdea(
+            name=name,
+            liked_by=list(self._liked_by_vocab.values[self._liked_by[row]]),
+            location=list(self._location_vocab.values[self._location[row]]),
+            tags=[tags[t] for t in self._tag_values[start:start + self._tag_len[row]]],
+            cost=int(cost) if cost.is_integer() else cost,
+            max_people=self._max_people[row],
+            cost_type=self._cost_type_vocab.values[self._cost_type[row]],
+        )
+
+    def row_at(self, position: int) -> int:
+        """Returns the row id stored at a sequence position."""
+        return self._order[position]
+
+    def position_of(self, row: int) -> int:
+        """Returns the sequence position of a row id (O(n), at array speed)."""
+        return self._order.index(row)
+
+    def names_by_row(self) -> Iterable:
+        """Yields (row id, name) in sequence order without building DateIdea views."""
+        names = self._names
+        return ((row, names[row]) for row in self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __getitem__(self, position: Union[int, slice]):
+        if isinstance(position, slice):
+            return [self.row(row) for row in self._order[position]]
+        return self.row(self._order[position])
+
+    def __iter__(self):
+        return (self.row(row) for row in self._order)
+
+    def __setitem__(self, position: int, idea: DateIdea):
+        if isinstance(position, slice):
+            raise TypeError("CompactCatalog does not support slice assignment")
+        self._write_row(self._order[position], idea)
+
+    def __delitem__(self, position: int):
+        if isinstance(position, slice):
+            raise TypeError("CompactCatalog does not support slice deletion")
+        row = self._order.pop(position)
+        self._tag_garbage += self._tag_len[row]
+        self._tag_len[row] = 0
+        self._names[row] = None
+        self._free.append(row)
+
+    def insert(self, position: int, idea: DateIdea):
+        row = self._free.pop() if self._free else len(self._names)
+        self._write_row(row, idea)
+        if position >= len(self._order):
+            self._order.append(row)
+        else:
+            self._order.insert(position, row)
+
+    def copy(self) -> "CompactCatalog":
+        """
+        Returns a catalog that can be edited without affecting this one. Columns are
+        copied; vocabularies only ever grow and existing codes never change, so they are
+        shared.
+        """
+        clone = object.__new__(CompactCatalog)
+        clone.__dict__.update(self.__dict__)
+        clone._names = list(self._names)
+        for attr in ('_liked_by', '_location', '_cost_type', '_cost', '_max_people',
+                     '_tag_start', '_tag_len', '_tag_values', '_order'):
+            setattr(clone, attr, getattr(self, attr)[:])
+        clone._free = list(self._free)
+        clone.rows = _Rows(clone)
+        return clone
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the array columns (excluding name strings)."""
+        arrays = (self._liked_by, self._location, self._cost_type, self._cost, self._max_people,
+                  self._tag_start, self._tag_len, self._tag_values, self._order)
+        return sum(a.itemsize * len(a) for a in arrays) + sys.getsizeof(self._names)
+
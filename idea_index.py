@@ -0,0 +1,267 @@
+import heapq
+import math
+import random
+import re
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from date_idea import DateIdea
+
+_ONE_BIT = re.compile('1')
+
+def _mask_from_slots(slots: Iterable[int], n_slots: int) -> int:
+    """Builds a bitset from slot ids in O(n_slots / 8) instead of one big-int OR per slot."""
+    buf = bytearray((n_slots + 7) >> 3)
+    for slot in slots:
+        buf[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buf, 'little')
+
+class IdeaIndex:
+    """
+    Precomputed lookup structures over a catalog of DateIdeas.
+
+    Every idea occupies a slot id, and candidate sets are plain Python ints used as
+    bitsets over those slots. Categorical filters (liked_by, location, tags) are
+    inverted indexes from value to bitset; numeric filters (max_people, per-person
+    cost) are answered by bisecting sorted (key, slot) arrays and turning the
+    resulting range into a bitset through block prefix masks.
+
+    By default the index stores the ideas itself. Passing `rows` (e.g. CompactCatalog.rows)
+    instead makes the caller own the storage: slot ids are the caller's row ids, free rows
+    read as None, and the caller updates the index with index_slot/unindex_slot.
+    """
+    BLOCK = 256
+
+    def __init__(self, ideas: Iterable[DateIdea] = (), rows: Optional[Sequence[Optional[DateIdea]]] = None):
+        self.slots: Sequence[Optional[DateIdea]] = []
+        self.live = 0
+        self.version = 0
+        self.count = 0
+        self._free: List[int] = []
+        self.by_liked_by: Dict[str, int] = {}
+        self.by_location: Dict[str, int] = {}
+        self.by_tag: Dict[str, int] = {}
+        # Sorted (key, slot) arrays; costs are split by cost_type because only
+        # 'total' costs depend on n_people.
+        self._max_people: List[Tuple[int, int]] = []
+        self._total_cost: List[Tuple[float, int]] = []
+        self._per_person_cost: List[Tuple[float, int]] = []
+        self._prefixes: Dict[int, List[int]] = {}
+        self._build(list(ideas) if rows is None else rows)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _build(self, slots: Sequence[Optional[DateIdea]]):
+        n = len(slots)
+        self.slots = slots
+        live = []
+        postings: Dict[str, Dict[str, List[int]]] = {'liked_by': {}, 'location': {}, 'tags': {}}
+        for slot, idea in enumerate(slots):
+            if idea is None:
+                continue
+            live.append(slot)
+            for attr, index in postings.items():
+                for value in set(getattr(idea, attr)):
+                    index.setdefault(value, []).append(slot)
+            self._sorted_for(idea).append((idea.cost, slot))
+            self._max_people.append((idea.max_people, slot))
+        self.live = _mask_from_slots(live, n)
+        self.count = len(live)
+        self.by_liked_by = {k: _mask_from_slots(v, n) for k, v in postings['liked_by'].items()}
+        self.by_location = {k: _mask_from_slots(v, n) for k, v in postings['location'].items()}
+        self.by_tag = {k: _mask_from_slots(v, n) for k, v in postings['tags'].items()}
+        self._max_people.sort()
+        self._total_cost.sort()
+        self._per_person_cost.sort()
+
+    def copy(self, rows: Optional[Sequence[Optional[DateIdea]]] = None) -> "IdeaIndex":
+        """
+        Returns an index that can be edited without affecting this one. Bitsets are
+        immutable ints and are shared; the containers holding them are copied. Pass the
+        copied catalog's `rows` when the caller owns the storage.
+        """
+        clone = object.__new__(IdeaIndex)
+        clone.__dict__.update(self.__dict__)
+        clone.slots = list(self.slots) if rows is None else rows
+        clone._free = list(self._free)
+        clone.by_liked_by = dict(self.by_liked_by)
+        clone.by_location = dict(self.by_location)
+        clone.by_tag = dict(self.by_tag)
+        clone._max_people = list(self._max_people)
+        clone._total_cost = list(self._total_cost)
+        clone._per_person_cost = list(self._per_person_cost)
+        clone._prefixes = {}
+        return clone
+
+    def _sorted_for(self, idea: DateIdea) -> List[Tuple[float, int]]:
+        return self._total_cost if idea.cost_type == 'total' else self._per_person_cost
+
+    def _index_value(self, index: Dict[str, int], values: Iterable[str], bit: int, add: bool):
+        for value in set(values):
+            if add:
+                index[value] = index.get(value, 0) | bit
+            else:
+                remaining = index.get(value, 0) & ~bit
+                if remaining:
+                    index[value] = remaining
+                else:
+                    index.pop(value, None)
+
+    def _link(self, slot: int, idea: DateIdea, add: bool):
+        bit = 1 << slot
+        self._index_value(self.by_liked_by, idea.liked_by, bit, add)
+        self._index_value(self.by_location, idea.location, bit, add)
+        self._index_value(self.by_tag, idea.tags, bit, add)
+        for entries, key in ((self._sorted_for(idea), idea.cost), (self._max_people, idea.max_people)):
+            if add:
+                insort(entries, (key, slot))
+            else:
+                del entries[bisect_left(entries, (key, slot))]
+        self.live = self.live | bit if add else self.live & ~bit
+        self.count += 1 if add else -1
+        self._prefixes.clear()
+        self.version += 1
+
+    def index_slot(self, slot: int, idea: DateIdea):
+        """Indexes an idea the caller has stored in row `slot` (external rows only)."""
+        self._link(slot, idea, add=True)
+
+    def unindex_slot(self, slot: int, idea: DateIdea):
+        """Removes the previous contents of row `slot` from the index (external rows only)."""
+        self._link(slot, idea, add=False)
+
+    def add(self, idea: DateIdea) -> int:
+        """Indexes a new idea and returns its slot id."""
+        if self._free:
+            slot = self._free.pop()
+            self.slots[slot] = idea
+        else:
+            slot = len(self.slots)
+            self.slots.append(idea)
+        self._link(slot, idea, add=True)
+        return slot
+
+    def remove(self, slot: int):
+        """Drops the idea stored in the given slot; the slot id is reused by later adds."""
+        idea = self.slots[slot]
+        if idea is None:
+            raise KeyError(slot)
+        self._link(slot, idea, add=False)
+        self.slots[slot] = None
+        self._free.append(slot)
+
+    def replace(self, slot: int, idea: DateIdea):
+        """Re-indexes an edited idea in place, keeping its slot id."""
+        old = self.slots[slot]
+        if old is None:
+            raise KeyError(slot)
+        self._link(slot, old, add=False)
+        self.slots[slot] = idea
+        self._link(slot, idea, add=True)
+
+    def _prefix_mask(self, entries: List[Tuple[float, int]], pos: int) -> int:
+        """Bitset of the slots stored at entries[:pos]."""
+        prefixes = self._prefixes.get(id(entries))
+        if prefixes is None:
+            prefixes = [0]
+            buf = bytearray((len(self.slots) + 7) >> 3)
+            for i, (_, slot) in enumerate(entries, 1):
+                buf[slot >> 3] |= 1 << (slot & 7)
+                if i % self.BLOCK == 0:
+                    prefixes.append(int.from_bytes(buf, 'little'))
+            self._prefixes[id(entries)] = prefixes
+        block = pos // self.BLOCK
+        start = block * self.BLOCK
+        if start == pos:
+            return prefixes[block]
+        return prefixes[block] | _mask_from_slots((slot for _, slot in entries[start:pos]), len(self.slots))
+
+    def _range_mask(self, entries: List[Tuple[float, int]], lo: int, hi: int) -> int:
+        if lo >= hi:
+            return 0
+        if lo == 0 and hi == len(entries) == len(self):
+            return self.live
+        return self._prefix_mask(entries, hi) ^ self._prefix_mask(entries, lo)
+
+    def _within_budget(self, entries: List[Tuple[float, int]], max_cost: float, n_people: Optional[int]) -> int:
+        if n_people is None or n_people == 0:
+            return self._range_mask(entries, 0, bisect_right(entries, max_cost, key=lambda e: e[0]))
+        if n_people > 0:
+            # cost / n_people is monotonic in cost, so the affordable ideas are a prefix.
+            return self._range_mask(entries, 0, bisect_right(entries, max_cost, key=lambda e: e[0] / n_people))
+        return _mask_from_slots((slot for cost, slot in entries if cost / n_people <= max_cost), len(self.slots))
+
+    def candidates_mask(self, liked_by: Optional[str] = None, location: Optional[str] = None,
+                        max_cost: Optional[float] = None, n_people: Optional[int] = None) -> int:
+        """
+        Returns the bitset of slots matching the same filters as DateIdeaManager.sample_idea.
+        """
+        mask = self.live
+        if liked_by:
+            mask &= self.by_liked_by.get(liked_by, 0)
+        if location:
+            mask &= self.by_location.get(location, 0)
+        if mask and n_people is not None:
+            start = bisect_left(self._max_people, (n_people, -1))
+            mask &= self._range_mask(self._max_people, start, len(self._max_people))
+        if mask and max_cost is not None:
+            mask &= (self._within_budget(self._total_cost, max_cost, n_people)
+                     | self._within_budget(self._per_person_cost, max_cost, None))
+        return mask
+
+    def cheapest(self, mask: int, n_people: int, limit: int) -> List[Tuple[float, int]]:
+        """
+        Returns up to `limit` (per-person cost, slot) pairs for the slots in a bitset,
+        cheapest first, by merging the sorted cost arrays instead of sorting the set.
+        """
+        packed = mask.to_bytes((len(self.slots) + 7) >> 3, 'little')
+        split = ((cost / n_people, slot) for cost, slot in self._total_cost)
+        found = []
+        for cost, slot in heapq.merge(self._per_person_cost, split):
+            if len(found) >= limit:
+                break
+            if packed[slot >> 3] >> (slot & 7) & 1:
+                found.append((cost, slot))
+        return found
+
+    def cost_floor(self, max_cost: float, n_people: int) -> float:
+        """
+        The highest per-person cost of any idea that is at most max_cost (-inf if there is
+        none). Every budget from there up to max_cost selects the same ideas, so it can
+        stand in for max_cost as a cache key. n_people must be positive.
+        """
+        floor = -math.inf
+        pos = bisect_right(self._per_person_cost, max_cost, key=lambda e: e[0])
+        if pos:
+            floor = self._per_person_cost[pos - 1][0]
+        pos = bisect_right(self._total_cost, max_cost, key=lambda e: e[0] / n_people)
+        if pos:
+            floor = max(floor, self._total_cost[pos - 1][0] / n_people)
+        return floor
+
+    def slots_of(self, mask: int) -> List[int]:
+        """Returns the slot ids set in a bitset, in ascending order."""
+        return [m.start() for m in _ONE_BIT.finditer(bin(mask)[:1:-1])]
+
+    def ideas_of(self, mask: int) -> List[DateIdea]:
+        slots = self.slots
+        return [slots[slot] for slot in self.slots_of(mask)]
+
+    def choice(self, mask: int, rng: Optional[random.Random] = None) -> Optional[DateIdea]:
+        """
+        Picks a uniformly random idea from a bitset. Dense sets use rejection sampling on
+        the packed bytes; sparse sets are expanded to their slot list.
+        """
+        count = mask.bit_count()
+        if not count:
+            return None
+        rng = rng or random
+        n_slots = len(self.slots)
+        if count * 16 >= n_slots:
+            packed = mask.to_bytes((n_slots + 7) >> 3, 'little')
+            while True:
+                slot = rng.randrange(n_slots)
+                if packed[slot >> 3] >> (slot & 7) & 1:
+                    return self.slots[slot]
+        slots = self.slots_of(mask)
+        return self.slots[slots[rng.randrange(count)]]
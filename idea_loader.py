@@ -0,0 +1,246 @@
+import gc
+import json
+import os
+import pickle
+import re
+from contextlib import contextmanager
+from dataclasses import MISSING, fields
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from date_idea import DateIdea
+from metrics import count, timed
+
+COST_TYPES = ('total', 'per_person')
+CACHE_VERSION = 1
+# DateIdea fields in constructor order, with their default factories (None when required)
+_FIELDS = [
+    (f.name, f.default_factory if f.default_factory is not MISSING
+     else None if f.default is MISSING else (lambda value=f.default: value))
+    for f in fields(DateIdea)
+]
+_FIELD_ORDER = [name for name, _ in _FIELDS]
+_FIELD_NAMES = set(_FIELD_ORDER)
+_WHITESPACE = re.compile(r'\s*')
+# A value or syntax error this close to the end of the buffer may just be cut off by the chunk edge
+_TOKEN_TAIL = 16
+
+class IdeaFileError(ValueError):
+    """An ideas file that is not valid JSON or contains an invalid idea, with the line of the problem."""
+    def __init__(self, path: str, line: int, message: str, field: Optional[str] = None):
+        super().__init__(f"{path}:{line}: {message}")
+        self.path = path
+        self.line = line
+        self.message = message
+        self.field = field
+
+@contextmanager
+def _gc_paused():
+    # Bulk-creating many small containers triggers repeated cyclic GC passes; none of
+    # them can form cycles, so collection is paused for the duration.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+_STR_TYPES = {str}
+
+def _is_str_list(value: Any) -> bool:
+    return type(value) is list and set(map(type, value)) <= _STR_TYPES
+
+def validate_record(record: Any, path: str, line: int) -> Tuple:
+    """Checks one idea record and returns its DateIdea field values in constructor order."""
+    if not isinstance(record, dict):
+        raise IdeaFileError(path, line, f"expected an idea object, got {type(record).__name__}")
+    if record.keys() == _FIELD_NAMES:
+        values = [record[name] for name, _ in _FIELDS]
+    else:
+        unknown = set(record) - _FIELD_NAMES
+        if unknown:
+            raise IdeaFileError(path, line, f"unknown field(s): {', '.join(sorted(unknown))}")
+        values = []
+        for name, default in _FIELDS:
+            if name in record:
+                values.append(record[name])
+            elif default is None:
+                raise IdeaFileError(path, line, f"missing required field '{name}'")
+            else:
+                values.append(default())
+    name, liked_by, location, tags, cost, max_people, cost_type = values
+    if not isinstance(name, str):
+        raise IdeaFileError(path, line, "'name' must be a string", 'name')
+    for field_name, value in (('liked_by', liked_by), ('location', location), ('tags', tags)):
+        if not _is_str_list(value):
+            raise IdeaFileError(path, line, f"'{field_name}' must be a list of strings ({name})", field_name)
+    if isinstance(cost, bool) or not isinstance(cost, (int, float)):
+        raise IdeaFileError(path, line, f"'cost' must be a number ({name})", 'cost')
+    if isinstance(max_people, bool) or not isinstance(max_people, int) or max_people < 0:
+        raise IdeaFileError(path, line, f"'max_people' must be a non-negative integer ({name})", 'max_people')
+    if cost_type not in COST_TYPES:
+        raise IdeaFileError(path, line, f"'cost_type' must be one of {', '.join(COST_TYPES)}, got {cost_type!r} ({name})", 'cost_type')
+    return tuple(values)
+
+class _StreamReader:
+    """Decodes a JSON array one element at a time from a text file, tracking line numbers."""
+    def __init__(self, f, path: str, chunk_size: int):
+        self.f = f
+        self.path = path
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.line = 1
+        self.eof = False
+
+    def _more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _advance(self, end: int):
+        self.line += self.buf.count('\n', self.pos, end)
+        self.pos = end
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character ('' at end of file)."""
+        while True:
+            self._advance(_WHITESPACE.match(self.buf, self.pos).end())
+            if self.pos < len(self.buf) or not self._more():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else 'end of file'
+            raise IdeaFileError(self.path, self.line, f"expected {' or '.join(repr(c) for c in chars)}, found {found}")
+        self.pos += 1
+        return char
+
+    def decode(self) -> Tuple[Any, int, str]:
+        """Returns the next value, the line it starts on and its source text."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Anything else is a real error: raise it now rather than reading (and
+                # re-decoding) the rest of the file first
+                truncated = e.msg.startswith('Unterminated string') or len(self.buf) - e.pos <= _TOKEN_TAIL
+                if truncated and self._more():
+                    continue
+                raise IdeaFileError(self.path, self.line + self.buf.count('\n', self.pos, e.pos), e.msg) from None
+            # A value ending near the buffer edge (e.g. a number cut at "1.") may continue in the next chunk
+            if len(self.buf) - end <= _TOKEN_TAIL and self._more():
+                continue
+            line, raw = self.line, self.buf[self.pos:end]
+            self._advance(end)
+            return value, line, raw
+
+def iter_records(path: str, chunk_size: int = 1 << 16) -> Iterator[Tuple]:
+    """
+    Streams validated idea records (DateIdea field tuples) from a JSON array file without
+    loading the whole document. Raises IdeaFileError with the offending line number.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _StreamReader(f, path, chunk_size)
+        reader.expect('[')
+        if reader.peek() == ']':
+            reader.pos += 1
+        else:
+            while True:
+                record, line, raw = reader.decode()
+                try:
+                    values = validate_record(record, path, line)
+                except IdeaFileError as e:
+                    # Point at the offending field's line rather than the start of the idea
+                    offset = raw.find(f'"{e.field}"') if e.field else -1
+                    if offset < 0:
+                        raise
+                    raise IdeaFileError(path, line + raw.count('\n', 0, offset), e.message, e.field) from None
+                yield values
+                if reader.expect(',]') == ']':
+                    break
+        if reader.peek():
+            raise IdeaFileError(path, reader.line, "unexpected data after the ideas array")
+
+def cache_path(path: str) -> str:
+    return path + '.cache'
+
+def _file_key(path: str) -> Dict:
+    stat = os.stat(path)
+    return {'version': CACHE_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+def _read_cache(path: str, key: Dict):
+    try:
+        with open(cache_path(path), 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get('key') != key:
+        return None
+    return cached['records']
+
+def _write_cache(path: str, key: Dict, records: List[Tuple]):
+    tmp_path = cache_path(path) + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'key': key, 'records': records}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path(path))
+    except OSError:
+        # The cache is only an accelerator; a read-only directory just means cold loads.
+        pass
+
+def iter_ideas(path: str, use_cache: bool = True) -> Iterator[DateIdea]:
+    """
+    Yields the DateIdeas in an ideas file. When the pre-parsed cache next to the file
+    matches its mtime and size, JSON parsing is skipped entirely; otherwise the file is
+    streamed and validated, and the cache is rewritten.
+    """
+    key = _file_key(path)
+    with _gc_paused():
+        records = _read_cache(path, key) if use_cache else None
+        count('load_ideas.cache_miss' if records is None else 'load_ideas.cache_hit')
+        if records is None:
+            records = list(iter_records(path))
+            if use_cache:
+                _write_cache(path, key, records)
+    for record in records:
+        yield DateIdea(*record)
+
+@timed('load_ideas')
+def load_ideas(path: str, use_cache: bool = True) -> List[DateIdea]:
+    with _gc_paused():
+        return list(iter_ideas(path, use_cache))
+
+def idea_record(idea: DateIdea) -> Tuple:
+    """Returns an idea's field values in constructor order, as stored in the cache."""
+    return tuple(getattr(idea, name) for name, _ in _FIELDS)
+
+def check_idea(idea: DateIdea, path: str):
+    """
+    Raises IdeaFileError (line 0) if the idea would fail validation when `path` is next
+    parsed; the pre-parsed cache would otherwise hide a bad edit until then.
+    """
+    validate_record(dict(zip(_FIELD_ORDER, idea_record(idea))), path, 0)
+
+def save_ideas(path: str, ideas: Iterable[DateIdea]):
+    """
+    Writes ideas to the file atomically (temp file + fsync + rename), in the same
+    indented format the app has always written, and refreshes the pre-parsed cache so
+    the next load does not have to re-parse what was just written.
+    """
+    records = [idea_record(idea) for idea in ideas]
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump([dict(zip(_FIELD_ORDER, record)) for record in records], f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _write_cache(path, _file_key(path), records)
@@ -0,0 +1,135 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from date_idea import DateIdea
+from idea_loader import check_idea, save_ideas
+
+class IdeaRepository:
+    """
+    Single writer for the ideas file.
+
+    Every idea gets an id that stays the same for the life of the repository, so screens
+    can edit or delete an idea without caring about positions shifting underneath them.
+    Changes are applied to the manager's catalog in memory straight away; the file is
+    rewritten by a debounced timer, so a burst of edits costs one atomic write. The write
+    happens `delay` seconds after the last change, but never later than `max_delay`
+    seconds after the first unsaved one. Call flush() or close() before exiting.
+
+    A manager backed by a SQLiteStore already writes each change to its database, so
+    there is no file to rewrite.
+    """
+    def __init__(self, manager, file_path: str, delay: float = 1.0, max_delay: float = 5.0):
+        self.manager = manager
+        self.file_path = file_path
+        self.delay = delay
+        self.max_delay = max_delay
+        self.last_error: Optional[Exception] = None
+        self._ids: List[int] = list(range(len(manager.ideas)))
+        self._next_id = len(self._ids)
+        self._positions: Optional[Dict[int, int]] = None
+        self._dirty = False
+        self._first_change: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        # _lock guards the catalog and pending state; _write_lock orders file writes.
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def items(self) -> Iterator[Tuple[int, DateIdea]]:
+        """Yields (id, idea) in catalog order."""
+        with self._lock:
+            pairs = list(zip(self._ids, self.manager.ideas))
+        return iter(pairs)
+
+    def position(self, idea_id: int) -> int:
+        """Returns the catalog position of an idea id. Raises KeyError for unknown ids."""
+        if self._positions is None:
+            self._positions = {idea_id: position for position, idea_id in enumerate(self._ids)}
+        return self._positions[idea_id]
+
+    def get(self, idea_id: int) -> DateIdea:
+        with self._lock:
+            return self.manager.ideas[self.position(idea_id)]
+
+    def add(self, idea: DateIdea) -> int:
+        """Appends an idea and returns its id. Raises IdeaFileError for an idea the loader would reject."""
+        check_idea(idea, self.file_path)
+        with self._lock:
+            self.manager.add_idea(idea)
+            idea_id = self._next_id
+            self._next_id += 1
+            self._ids.append(idea_id)
+            if self._positions is not None:
+                self._positions[idea_id] = len(self._ids) - 1
+            self._changed()
+        return idea_id
+
+    def update(self, idea_id: int, idea: DateIdea):
+        """Replaces an idea. Raises IdeaFileError for an idea the loader would reject."""
+        check_idea(idea, self.file_path)
+        with self._lock:
+            self.manager.update_idea(self.position(idea_id), idea)
+            self._changed()
+
+    def delete(self, idea_id: int):
+        with self._lock:
+            position = self.position(idea_id)
+            self.manager.delete_idea(position)
+            del self._ids[position]
+            # Later positions shifted; rebuild the map on the next lookup.
+            self._positions = None
+            self._changed()
+
+    @contextmanager
+    def batch(self):
+        """Groups edits so the manager copies and publishes its catalog once (see DateIdeaManager.edit_batch)."""
+        with self._lock, self.manager.edit_batch():
+            yield
+
+    def _changed(self):
+        if getattr(self.manager, 'store', None) is not None:
+            return
+        now = time.monotonic()
+        self._dirty = True
+        if self._first_change is None:
+            self._first_change = now
+        if self._timer is not None:
+            self._timer.cancel()
+        wait = max(0.0, min(self.delay, self._first_change + self.max_delay - now))
+        self._timer = threading.Timer(wait, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except OSError as e:
+            # Keep the changes pending; the next edit or an explicit flush retries.
+            self.last_error = e
+
+    def flush(self):
+        """Writes pending changes to the ideas file now, if there are any."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                # DateIdea is immutable, so a shallow copy is a consistent snapshot.
+                ideas = list(self.manager.ideas)
+                self._dirty = False
+                self._first_change = None
+            try:
+                save_ideas(self.file_path, ideas)
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                raise
+            self.last_error = None
+
+    def close(self):
+        self.flush()
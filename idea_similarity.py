@@ -0,0 +1,179 @@
+import math
+from bisect import insort
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from date_idea import DateIdea
+from idea_index import IdeaIndex
+
+# Weight of one matching value in each field; cost is a single bucket per idea
+FIELD_WEIGHTS = {'tags': 1.0, 'location': 0.5, 'liked_by': 0.5, 'cost': 0.5}
+
+def cost_bucket(idea: DateIdea, n_people: int) -> int:
+    """0 for free ideas, then one bucket per doubling of the per-person cost (1, 2-3, 4-7, ...)."""
+    cost = idea.cost / n_people if idea.cost_type == 'total' else idea.cost
+    return 0 if cost <= 0 else max(1, int(math.log2(cost)) + 2)
+
+class SimilarityIndex:
+    """
+    Content-based "more like this" lookups over an IdeaIndex's slots.
+
+    Each idea is a sparse vector with one entry per tag, location and liked_by value and
+    one for its per-person cost bucket, weighted by FIELD_WEIGHTS. Similarity is cosine.
+    Every feature keeps a posting set of the slots that have it, so scoring an idea
+    against the whole catalog is one numpy scatter-add per feature (a sparse
+    vector-matrix product).
+
+    The top `size` neighbours of each looked-up idea are cached (LRU, `cache_size`
+    lists). Catalog edits are applied per slot with update(): postings and norms change
+    in place, cached lists gain the edited idea where it now ranks, and lists that
+    contained a removed or changed idea are dropped and recomputed on their next use.
+    """
+    def __init__(self, index: IdeaIndex, n_people: int = 2, size: int = 50, cache_size: int = 10_000):
+        self.index = index
+        self.n_people = n_people
+        self.size = size
+        self.cache_size = cache_size
+        # Catalog version this index reflects, kept by the owner (DateIdeaManager)
+        self.version = 0
+        self._feature_ids: Dict[Tuple[str, object], int] = {}
+        self._weights: List[float] = []
+        self._postings: List[Set[int]] = []
+        # Feature id -> postings as an array, rebuilt after the postings change
+        self._arrays: Dict[int, np.ndarray] = {}
+        self._features: List[Optional[Tuple[int, ...]]] = []
+        # Vector length per slot; free slots are inf so they score 0
+        self._norms = np.full(0, np.inf)
+        # Slot -> its neighbours as (-similarity, slot), most similar first
+        self._neighbors: "OrderedDict[int, List[Tuple[float, int]]]" = OrderedDict()
+        # Slot -> cached lists it appears in
+        self._owners: Dict[int, Set[int]] = {}
+        for slot, idea in enumerate(index.slots):
+            if idea is not None:
+                self._add(slot, idea)
+
+    def _encode(self, idea: DateIdea) -> Tuple[int, ...]:
+        keys = [('tags', tag) for tag in set(idea.tags)]
+        keys += [('location', loc) for loc in set(idea.location)]
+        keys += [('liked_by', person) for person in set(idea.liked_by)]
+        keys.append(('cost', cost_bucket(idea, self.n_people)))
+        ids = []
+        for key in keys:
+            feature = self._feature_ids.get(key)
+            if feature is None:
+                feature = self._feature_ids[key] = len(self._weights)
+                self._weights.append(FIELD_WEIGHTS[key[0]])
+                self._postings.append(set())
+            ids.append(feature)
+        return tuple(ids)
+
+    def _norm(self, features: Iterable[int]) -> float:
+        return math.sqrt(sum(self._weights[f] ** 2 for f in features))
+
+    def _add(self, slot: int, idea: DateIdea):
+        features = self._encode(idea)
+        if slot >= len(self._features):
+            self._features.extend([None] * (slot + 1 - len(self._features)))
+        if slot >= len(self._norms):
+            grown = np.full(max(slot + 1, 2 * len(self._norms)), np.inf)
+            grown[:len(self._norms)] = self._norms
+            self._norms = grown
+        self._features[slot] = features
+        self._norms[slot] = self._norm(features)
+        for feature in features:
+            self._postings[feature].add(slot)
+            self._arrays.pop(feature, None)
+
+    def _remove(self, slot: int):
+        features = self._features[slot] if slot < len(self._features) else None
+        if features is None:
+            return
+        for feature in features:
+            self._postings[feature].discard(slot)
+            self._arrays.pop(feature, None)
+        self._features[slot] = None
+        self._norms[slot] = np.inf
+        self._forget(slot)
+        # Lists holding the old version of this idea are recomputed when next needed
+        for owner in self._owners.pop(slot, set()):
+            self._forget(owner)
+
+    def _forget(self, owner: int):
+        for _, member in self._neighbors.pop(owner, ()):
+            owners = self._owners.get(member)
+            if owners is not None:
+                owners.discard(owner)
+
+    def _similarities(self, features: Tuple[int, ...]) -> np.ndarray:
+        """Cosine similarity of a feature vector to every slot."""
+        dots = np.zeros(len(self._norms))
+        for feature in features:
+            array = self._arrays.get(feature)
+            if array is None:
+                array = self._arrays[feature] = np.fromiter(self._postings[feature], dtype=np.intp)
+            # Postings hold each slot once, so the fancy-index add is exact
+            dots[array] += self._weights[feature] ** 2
+        return dots / (self._norms * self._norm(features))
+
+    def update(self, index: IdeaIndex, slots: Iterable[int]):
+        """Re-reads the given slots from `index` (which this index then follows) after they changed."""
+        self.index = index
+        for slot in slots:
+            self._remove(slot)
+            idea = index.slots[slot] if slot < len(index.slots) else None
+            if idea is None:
+                continue
+            self._add(slot, idea)
+            if not self._neighbors:
+                continue
+            # Insert the edited idea into the cached lists it now belongs to
+            sims = self._similarities(self._features[slot])
+            for owner, neighbors in self._neighbors.items():
+                sim = sims[owner]
+                if owner == slot or sim <= 0 or (len(neighbors) >= self.size and -sim >= neighbors[-1][0]):
+                    continue
+                insort(neighbors, (-sim, slot))
+                self._owners.setdefault(slot, set()).add(owner)
+                if len(neighbors) > self.size:
+                    _, dropped = neighbors.pop()
+                    self._owners[dropped].discard(owner)
+
+    def _rank(self, slot: int, limit: Optional[int]) -> List[Tuple[float, int]]:
+        sims = self._similarities(self._features[slot])
+        sims[slot] = 0.0
+        positive = np.flatnonzero(sims > 0)
+        if limit is not None and len(positive) > limit:
+            positive = positive[np.argpartition(-sims[positive], limit - 1)[:limit]]
+        # Most similar first, lower slot first among equals
+        order = np.lexsort((positive, -sims[positive]))
+        return [(-float(sims[s]), int(s)) for s in positive[order]]
+
+    def neighbors(self, slot: int) -> List[Tuple[float, int]]:
+        """The `size` most similar slots to `slot` as (similarity, slot), most similar first."""
+        if slot >= len(self._features) or self._features[slot] is None:
+            raise KeyError(slot)
+        cached = self._neighbors.get(slot)
+        if cached is None:
+            cached = self._neighbors[slot] = self._rank(slot, self.size)
+            for _, member in cached:
+                self._owners.setdefault(member, set()).add(slot)
+            if len(self._neighbors) > self.cache_size:
+                self._forget(next(iter(self._neighbors)))
+        else:
+            self._neighbors.move_to_end(slot)
+        return [(-neg, member) for neg, member in cached]
+
+    def similar(self, slot: int, k: int, keep: Callable[[int], bool]) -> List[Tuple[float, int]]:
+        """
+        The k most similar slots for which keep(slot) is true. Served from the cached
+        neighbour list when it has enough of them, otherwise from rankings 4x deeper
+        each time.
+        """
+        ranked = self.neighbors(slot)
+        limit = self.size
+        while True:
+            kept = [(sim, member) for sim, member in ranked if keep(member)]
+            if len(kept) >= k or len(ranked) < limit:
+                return kept[:k]
+            limit *= 4
+            ranked = [(-neg, member) for neg, member in self._rank(slot, limit)]
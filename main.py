@@ -13,17 +13,32 @@ from kivy.uix.image import Image
 from kivy.uix.widget import Widget
 from kivy.core.window import Window
 from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.filechooser import FileChooserIconView
+from kivy.graphics import Color, Rectangle
 from kivy.graphics.texture import Texture
 from kivy.clock import mainthread, Clock
+from kivy.logger import Logger
 import os
-from date_manager import DateIdeaManager
+import threading
+from date_manager import DateIdeaManager, warm_up_imports
+from date_idea import DateIdea
+from idea_loader import IdeaFileError
+from idea_repository import IdeaRepository
+from screen_lists import HistoryPager, editor_fields, idea_from_fields, idea_row, idea_rows
+from charts import ChartCache, ChartRenderer, chart_specs, cached_render
+from metrics import configure, metrics
 from kivy.uix.gridlayout import GridLayout
 
 # Set window size for desktop testing
 Window.size = (400, 700)
 
 IDEAS_FILE = 'ideas.json'
+# Append-only journal: recording a date writes one line instead of the whole history.
+# An existing history.json is imported the first time the app opens it.
+HISTORY_FILE = 'history.jsonl'
 
 class MainMenuScreen(Screen):
     def __init__(self, **kwargs):
@@ -165,6 +180,7 @@ class AddIdeaScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.manager_app = None
+        self.repository = None
         # Use a ScrollView to make the form scrollable and prevent overlap
         self.layout = BoxLayout(orientation='vertical', spacing=10, padding=20)
         self.scroll = ScrollView(size_hint=(1, 1))
@@ -208,6 +224,7 @@ class AddIdeaScreen(Screen):
 
     def on_enter(self):
         self.manager_app = getattr(App.get_running_app(), 'manager', None)
+        self.repository = getattr(App.get_running_app(), 'repository', None)
         self.status_label.text = ''
 
     def on_save(self, instance):
@@ -225,28 +242,23 @@ class AddIdeaScreen(Screen):
         if not name:
             self.status_label.text = 'Name is required.'
             return
-        # Save to ideas.json
-        import json
-        idea = {
-            'name': name,
-            'liked_by': liked_by,
-            'location': location,
-            'tags': tags,
-            'cost': cost,
-            'max_people': max_people,
-            'cost_type': cost_type
-        }
-        try:
-            with open('ideas.json', 'r', encoding='utf-8') as f:
-                ideas = json.load(f)
-        except Exception:
-            ideas = []
-        ideas.append(idea)
-        with open('ideas.json', 'w', encoding='utf-8') as f:
-            json.dump(ideas, f, ensure_ascii=False, indent=2)
-        # Reload ideas in manager
-        if self.manager_app:
-            self.manager_app.ideas = self.manager_app.load_ideas('ideas.json')
+        idea = DateIdea(
+            name=name,
+            liked_by=liked_by,
+            location=location,
+            tags=tags,
+            cost=cost,
+            max_people=max_people,
+            cost_type=cost_type
+        )
+        # The repository updates the manager in memory and writes ideas.json shortly after
+        if self.repository:
+            try:
+                self.repository.add(idea)
+            except IdeaFileError as e:
+                # Rejected before it reaches the catalog or ideas.json; keep the input for fixing
+                self.status_label.text = e.message
+                return
         self.status_label.text = 'Idea saved!'
         self.name_input.text = ''
         self.tags_input.text = ''
@@ -260,14 +272,24 @@ class AddIdeaScreen(Screen):
         self.manager.current = 'main_menu'
 
 class HistoryScreen(Screen):
+    # Entries are fetched a page at a time, newest first, as the list is scrolled
+    PAGE_SIZE = 100
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.manager_app = None
+        self.pager = HistoryPager(self.PAGE_SIZE)
         self.layout = BoxLayout(orientation='vertical', spacing=10, padding=20)
-        self.scroll = ScrollView(size_hint=(1, 0.9))
-        self.history_grid = GridLayout(cols=1, spacing=5, size_hint_y=None)
-        self.scroll.add_widget(self.history_grid)
-        self.layout.add_widget(self.scroll)
+        # Only the visible rows exist as Labels; scrolling rebinds them to other entries
+        self.history_view = RecycleView(size_hint=(1, 0.9))
+        rows = RecycleBoxLayout(orientation='vertical', spacing=5, default_size=(None, 40),
+                                default_size_hint=(1, None), size_hint_y=None)
+        rows.bind(minimum_height=rows.setter('height'))
+        self.history_view.add_widget(rows)
+        # viewclass is forwarded to the layout manager, so set it once that exists
+        self.history_view.viewclass = 'Label'
+        self.history_view.bind(scroll_y=self.on_scroll)
+        self.layout.add_widget(self.history_view)
         self.back_btn = Button(text='Back', size_hint_y=None, height=50, on_press=self.go_back)
         self.layout.add_widget(self.back_btn)
         self.add_widget(self.layout)
@@ -275,15 +297,20 @@ class HistoryScreen(Screen):
     def on_enter(self):
         app = App.get_running_app()
         self.manager_app = getattr(app, 'manager', None)
-        self.history_grid.clear_widgets()
-        history = self.manager_app.history.get_history() if self.manager_app else []
-        if not history:
-            self.history_grid.add_widget(Label(text='No history yet.'))
-        else:
-            for entry in reversed(history):
-                text = f"[b]{entry['activity_name']}[/b] | {entry['date']} | ₹{entry.get('cost_per_person', 0):.2f}"
-                lbl = Label(text=text, markup=True, size_hint_y=None, height=40)
-                self.history_grid.add_widget(lbl)
+        # Page through one view, so dates recorded meanwhile do not shift the pages
+        history = self.manager_app.history.view() if self.manager_app else []
+        data = self.pager.open(history)
+        if data is not None:
+            self.history_view.data = data
+            self.history_view.scroll_y = 1
+
+    def on_scroll(self, view, scroll_y):
+        # Near the bottom: append the next page of older entries
+        if scroll_y > 0.05:
+            return
+        rows = self.pager.next_page()
+        if rows:
+            self.history_view.data.extend(rows)
 
     def go_back(self, instance):
         self.manager.current = 'main_menu'
@@ -323,7 +350,11 @@ class ClearHistoryScreen(Screen):
         except Exception:
             self.status_label.text = 'Enter a valid number.'
             return
-        self.manager_app.history.clear(n)
+        try:
+            self.manager_app.clear_history(n)
+        except ValueError:
+            self.status_label.text = 'Enter a positive number, or leave it empty to clear all.'
+            return
         self.status_label.text = f"History cleared{' (last ' + n_text + ' entries)' if n else ' (all)'}!"
 
     def go_back(self, instance):
@@ -389,8 +420,12 @@ class VisualizationsScreen(Screen):
         self.back_btn = Button(text='Back', size_hint_y=None, height=50, on_press=self.go_back)
         self.layout.add_widget(self.back_btn)
         self.add_widget(self.layout)
-        self.img_paths = []
+        self.textures = []
         self.current_index = 0
+        self.chart_cache = ChartCache()
+        # Error text of the charts whose render failed, by slot
+        self.render_errors = {}
+        self.renderer = ChartRenderer(self.render_chart_image, Clock.schedule_once)
 
     def on_enter(self):
         app = App.get_running_app()
@@ -401,23 +436,49 @@ class VisualizationsScreen(Screen):
         self.show_visualizations()
 
     def show_visualizations(self):
-        self.img_paths = self.generate_and_save_visualizations()
         self.current_index = 0
+        specs = self.chart_specs()
+        # One slot per chart; filled with a texture (or an error) as each render finishes
+        self.textures = [None] * len(specs)
+        self.render_errors = {}
+        self.renderer.start(specs, self.show_chart, self.show_chart_error)
         self.update_image()
 
+    def on_leave(self):
+        # Queued renders are dropped; ones already running finish into the cache but are not shown
+        self.renderer.cancel()
+
+    def show_chart(self, index, image):
+        # Textures must be created on the main thread
+        width, height, rgba = image
+        texture = Texture.create(size=(width, height), colorfmt='rgba')
+        texture.blit_buffer(rgba, colorfmt='rgba', bufferfmt='ubyte')
+        texture.flip_vertical()
+        self.textures[index] = texture
+        if index == self.current_index:
+            self.update_image()
+
+    def show_chart_error(self, index, error):
+        Logger.error('Charts: rendering chart %d failed', index, exc_info=error)
+        self.render_errors[index] = f'Could not render this chart:\n{error}'
+        if index == self.current_index:
+            self.update_image()
+
     def update_image(self):
         self.image_box.clear_widgets()
-        if not self.img_paths:
+        if not self.textures:
             self.image_box.add_widget(Label(text='No visualizations available.'))
             self.prev_btn.disabled = True
             self.next_btn.disabled = True
             return
-        img_path = self.img_paths[self.current_index]
-        if os.path.exists(img_path):
-            self.image_box.add_widget(Image(source=img_path, allow_stretch=True, keep_ratio=True))
+        texture = self.textures[self.current_index]
+        if texture is None:
+            self.image_box.add_widget(Label(text=self.render_errors.get(self.current_index, 'Rendering...')))
+        else:
+            self.image_box.add_widget(Image(texture=texture, allow_stretch=True, keep_ratio=True))
         # Update button states
         self.prev_btn.disabled = self.current_index == 0
-        self.next_btn.disabled = self.current_index == len(self.img_paths) - 1
+        self.next_btn.disabled = self.current_index == len(self.textures) - 1
 
     def on_prev(self, instance):
         if self.current_index > 0:
@@ -425,119 +486,108 @@ class VisualizationsScreen(Screen):
             self.update_image()
 
     def on_next(self, instance):
-        if self.current_index < len(self.img_paths) - 1:
+        if self.current_index < len(self.textures) - 1:
             self.current_index += 1
             self.update_image()
 
-    def generate_and_save_visualizations(self):
-        import matplotlib.pyplot as plt
-        import matplotlib.ticker as ticker
-        from matplotlib_venn import venn2
-        from collections import Counter, defaultdict
-        from datetime import datetime
+    def chart_specs(self):
         if not self.manager_app or not hasattr(self.manager_app, 'history') or not hasattr(self.manager_app, 'ideas'):
             return []
-        history = self.manager_app.history.get_history()
-        if not history:
-            return []
-        idea_by_name = {idea.name: idea for idea in self.manager_app.ideas}
-        img_paths = []
-        # 1. Bar chart: Number of times each activity was done (horizontal)
-        activity_counts = Counter(entry['activity_name'] for entry in history)
-        activities, counts = zip(*sorted(activity_counts.items(), key=lambda x: x[1], reverse=True)) if activity_counts else ([],[])
-        if activities:
-            plt.figure(figsize=(5, max(3, len(activities)*0.6)))
-            plt.barh(activities, counts, color='skyblue')
-            plt.title('Number of Times Each Activity Was Done')
-            plt.xlabel('Count')
-            plt.ylabel('Activity')
-            plt.gca().xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
-            plt.tight_layout()
-            img1 = 'activity_counts.png'
-            plt.savefig(img1, bbox_inches='tight')
-            plt.close()
-            img_paths.append(img1)
-        # 2. Venn Diagram: Percent of dates liked by bf, gf, both
-        bf_set, gf_set = set(), set()
-        for entry in history:
-            idea = idea_by_name.get(entry['activity_name'])
-            if not idea:
-                continue
-            if 'bf' in idea.liked_by:
-                bf_set.add(entry['activity_name'] + entry['date'])
-            if 'gf' in idea.liked_by:
-                gf_set.add(entry['activity_name'] + entry['date'])
-        if bf_set or gf_set:
-            plt.figure(figsize=(6, 6))
-            venn2((bf_set, gf_set), set_labels=('bf', 'gf'))
-            plt.title('Percent of Dates Liked by bf, gf, and Both')
-            img2 = 'liked_by_venn.png'
-            plt.savefig(img2, bbox_inches='tight')
-            plt.close()
-            img_paths.append(img2)
-        # 3. Bar chart: Total count of tags (sorted by count, horizontal)
-        tag_counter = Counter()
-        for entry in history:
-            idea = idea_by_name.get(entry['activity_name'])
-            if idea:
-                tag_counter.update(idea.tags)
-        if tag_counter:
-            tags, tag_counts = zip(*sorted(tag_counter.items(), key=lambda x: x[1], reverse=True))
-            plt.figure(figsize=(5, max(3, len(tags)*0.6)))
-            plt.barh(tags, tag_counts, color='orange')
-            plt.title('Total Count of Tags (All Time)')
-            plt.xlabel('Count')
-            plt.ylabel('Tag')
-            plt.gca().xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
-            plt.tight_layout()
-            img3 = 'tag_counts.png'
-            plt.savefig(img3, bbox_inches='tight')
-            plt.close()
-            img_paths.append(img3)
-        # 4. Bar chart: Money spent per person on dates per month (horizontal)
-        month_spending = defaultdict(float)
-        for entry in history:
-            date_str = entry['date']
-            try:
-                month = datetime.strptime(date_str, "%Y-%m-%d").strftime("%Y-%m")
-            except Exception:
-                continue
-            cost_per_person = entry.get('cost_per_person')
-            if cost_per_person is not None:
-                month_spending[month] += cost_per_person
-        if month_spending:
-            months, spend = zip(*sorted(month_spending.items()))
-            plt.figure(figsize=(5, max(3, len(months)*0.6)))
-            plt.barh(months, spend, color='green')
-            plt.title('Money Spent Per Person on Dates Per Month (₹)')
-            plt.xlabel('Total Spent Per Person (₹)')
-            plt.ylabel('Month')
-            # Only set integer ticks if all values are integers
-            if all(float(x).is_integer() for x in spend):
-                plt.gca().xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
-            plt.tight_layout()
-            img4 = 'monthly_spending.png'
-            plt.savefig(img4, bbox_inches='tight')
-            plt.close()
-            img_paths.append(img4)
-        return img_paths
+        return chart_specs(self.manager_app.snapshot().stats)
+
+    def render_chart_image(self, spec):
+        # Runs on a render thread; unchanged charts come straight from the render cache
+        return cached_render(spec, self.chart_cache)
 
     def go_back(self, instance):
         self.manager.current = 'main_menu'
 
+class IdeaEditorRow(RecycleDataViewBehavior, BoxLayout):
+    """
+    One idea editor in EditIdeasScreen's RecycleView. Only enough rows to fill the view
+    are built; scrolling rebinds them to other ideas through refresh_view_attrs.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(orientation='vertical', spacing=6, padding=10, **kwargs)
+        self.index = None
+        self.idea_id = None
+        self.owner = None
+        self.name_input = TextInput(multiline=False, size_hint_y=None, height=40)
+        self.liked_by_spinner = Spinner(values=['bf', 'gf', 'both'], size_hint_y=None, height=40)
+        self.location_spinner = Spinner(values=['home', 'outside', 'both'], size_hint_y=None, height=40)
+        self.tags_input = TextInput(multiline=False, size_hint_y=None, height=40)
+        self.cost_input = TextInput(input_filter='float', multiline=False, size_hint_y=None, height=40)
+        self.max_people_input = TextInput(input_filter='int', multiline=False, size_hint_y=None, height=40)
+        self.cost_type_spinner = Spinner(values=['total', 'per_person'], size_hint_y=None, height=40)
+        self.status = Label(text='', size_hint_y=None, height=30)
+
+        save_btn = Button(text='Save Changes', size_hint_y=None, height=40, on_press=self.on_save)
+        delete_btn = Button(text='Delete', size_hint_y=None, height=40, on_press=self.on_delete)
+        btns = BoxLayout(orientation='horizontal', size_hint_y=None, height=40, spacing=10)
+        btns.add_widget(save_btn)
+        btns.add_widget(delete_btn)
+
+        # Add fields and labels in order
+        self.add_widget(Label(text='Name:', size_hint_y=None, height=20))
+        self.add_widget(self.name_input)
+        self.add_widget(Label(text='Liked By:', size_hint_y=None, height=20))
+        self.add_widget(self.liked_by_spinner)
+        self.add_widget(Label(text='Location:', size_hint_y=None, height=20))
+        self.add_widget(self.location_spinner)
+        self.add_widget(Label(text='Tags:', size_hint_y=None, height=20))
+        self.add_widget(self.tags_input)
+        self.add_widget(Label(text='Cost:', size_hint_y=None, height=20))
+        self.add_widget(self.cost_input)
+        self.add_widget(Label(text='Max People:', size_hint_y=None, height=20))
+        self.add_widget(self.max_people_input)
+        self.add_widget(Label(text='Cost Type:', size_hint_y=None, height=20))
+        self.add_widget(self.cost_type_spinner)
+        self.add_widget(btns)
+        self.add_widget(self.status)
+        # editor_fields / idea_from_fields key -> the widget showing it
+        self.fields = {'name': self.name_input, 'liked_by': self.liked_by_spinner, 'location': self.location_spinner,
+                       'tags': self.tags_input, 'cost': self.cost_input, 'max_people': self.max_people_input,
+                       'cost_type': self.cost_type_spinner}
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        self.idea_id = data['idea_id']
+        self.owner = rv.owner
+        for key, text in editor_fields(data['idea']).items():
+            self.fields[key].text = text
+        self.status.text = data.get('status', '')
+
+    def on_save(self, _):
+        try:
+            new_idea = idea_from_fields({key: widget.text for key, widget in self.fields.items()})
+        except ValueError:
+            self.status.text = 'Enter valid numbers for cost and max people.'
+            return
+        self.owner.save_idea(self, new_idea)
+
+    def on_delete(self, _):
+        self.owner.delete_idea(self)
+
 class EditIdeasScreen(Screen):
+    # 8 fields, 7 labels, buttons, status, padding
+    ROW_HEIGHT = 8*40 + 7*20 + 40 + 30 + 20
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.manager_app = None
+        self.repository = None
 
         # Main vertical layout
         self.layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
-        # Scrollable area for ideas
-        self.scroll = ScrollView(size_hint=(1, 1))
-        self.ideas_box = BoxLayout(orientation='vertical', size_hint_y=None, spacing=20, padding=[0, 0, 0, 20])
-        self.ideas_box.bind(minimum_height=self.ideas_box.setter('height'))
-        self.scroll.add_widget(self.ideas_box)
-        self.layout.add_widget(self.scroll)
+        # Recycled editors: only the rows on screen are built, whatever the catalog size
+        self.ideas_view = RecycleView(size_hint=(1, 1))
+        self.ideas_view.owner = self
+        rows = RecycleBoxLayout(orientation='vertical', spacing=20, padding=[0, 0, 0, 20],
+                                default_size=(None, self.ROW_HEIGHT), default_size_hint=(1, None), size_hint_y=None)
+        rows.bind(minimum_height=rows.setter('height'))
+        self.ideas_view.add_widget(rows)
+        self.ideas_view.viewclass = IdeaEditorRow
+        self.layout.add_widget(self.ideas_view)
         # Back button at the bottom
         self.back_btn = Button(text='Back', size_hint_y=None, height=50, on_press=self.go_back)
         self.layout.add_widget(self.back_btn)
@@ -546,119 +596,100 @@ class EditIdeasScreen(Screen):
     def on_enter(self):
         app = App.get_running_app()
         self.manager_app = getattr(app, 'manager', None)
+        self.repository = getattr(app, 'repository', None)
         self.refresh_ideas()
         # Ensure scroll is at the top after layout
         Clock.schedule_once(lambda dt: self.scroll_to_top(), 0.1)
 
     def scroll_to_top(self):
-        self.scroll.scroll_y = 1
+        self.ideas_view.scroll_y = 1
 
     def refresh_ideas(self):
-        import json
-        self.ideas_box.clear_widgets()
+        if not self.repository:
+            self.ideas_view.data = []
+            return
+        self.ideas_view.data = idea_rows(self.repository.items())
+
+    def save_idea(self, row, idea):
         try:
-            with open('ideas.json', 'r', encoding='utf-8') as f:
-                ideas = json.load(f)
-        except Exception:
-            ideas = []
-        for idx, idea in enumerate(ideas):
-            editor = self._make_idea_editor(idea, idx, ideas)
-            self.ideas_box.add_widget(editor)
-
-    def _make_idea_editor(self, idea, idx, all_ideas):
-        box = BoxLayout(orientation='vertical', spacing=6, padding=10, size_hint_y=None)
-        box.height = 8*40 + 7*20 + 40 + 30 + 20  # 8 fields, 7 labels, buttons, status, padding
-
-        name_input = TextInput(text=idea.get('name', ''), multiline=False, size_hint_y=None, height=40)
-        liked_by_spinner = Spinner(
-            text=','.join(idea.get('liked_by', [])),
-            values=['bf', 'gf', 'both'],
-            size_hint_y=None, height=40
-        )
-        location_spinner = Spinner(
-            text=','.join(idea.get('location', [])),
-            values=['home', 'outside', 'both'],
-            size_hint_y=None, height=40
-        )
-        tags_input = TextInput(text=','.join(idea.get('tags', [])), multiline=False, size_hint_y=None, height=40)
-        cost_input = TextInput(text=str(idea.get('cost', '')), input_filter='float', multiline=False, size_hint_y=None, height=40)
-        max_people_input = TextInput(text=str(idea.get('max_people', '')), input_filter='int', multiline=False, size_hint_y=None, height=40)
-        cost_type_spinner = Spinner(
-            text=idea.get('cost_type', 'total'),
-            values=['total', 'per_person'],
-            size_hint_y=None, height=40
-        )
-        status = Label(text='', size_hint_y=None, height=30)
-
-        def on_save(_):
-            new_idea = {
-                'name': name_input.text.strip(),
-                'liked_by': [liked_by_spinner.text] if liked_by_spinner.text != 'both' else ['bf', 'gf'],
-                'location': [location_spinner.text] if location_spinner.text != 'both' else ['home', 'outside'],
-                'tags': [t.strip() for t in tags_input.text.split(',') if t.strip()],
-                'cost': float(cost_input.text) if cost_input.text else 0.0,
-                'max_people': int(max_people_input.text) if max_people_input.text else 1,
-                'cost_type': cost_type_spinner.text
-            }
-            all_ideas[idx] = new_idea
-            try:
-                with open('ideas.json', 'w', encoding='utf-8') as f:
-                    import json
-                    json.dump(all_ideas, f, ensure_ascii=False, indent=2)
-                status.text = 'Saved!'
-            except Exception as e:
-                status.text = f'Error: {e}'
-            if self.manager_app:
-                self.manager_app.ideas = self.manager_app.load_ideas('ideas.json')
-
-        def on_delete(_):
-            del all_ideas[idx]
-            try:
-                with open('ideas.json', 'w', encoding='utf-8') as f:
-                    import json
-                    json.dump(all_ideas, f, ensure_ascii=False, indent=2)
-                status.text = 'Deleted!'
-            except Exception as e:
-                status.text = f'Error: {e}'
-            if self.manager_app:
-                self.manager_app.ideas = self.manager_app.load_ideas('ideas.json')
-            self.refresh_ideas()
-
-        save_btn = Button(text='Save Changes', size_hint_y=None, height=40, on_press=on_save)
-        delete_btn = Button(text='Delete', size_hint_y=None, height=40, on_press=on_delete)
-        btns = BoxLayout(orientation='horizontal', size_hint_y=None, height=40, spacing=10)
-        btns.add_widget(save_btn)
-        btns.add_widget(delete_btn)
+            self.repository.update(row.idea_id, idea)
+        except IdeaFileError as e:
+            row.status.text = self.ideas_view.data[row.index]['status'] = e.message
+            return
+        except Exception as e:
+            # Keep the row's unsaved input; only the status changes
+            row.status.text = self.ideas_view.data[row.index]['status'] = f'Error: {e}'
+            return
+        # Replacing one item refreshes just that row
+        self.ideas_view.data[row.index] = idea_row(row.idea_id, idea, 'Saved!')
 
-        # Add fields and labels in order
-        box.add_widget(Label(text='Name:', size_hint_y=None, height=20))
-        box.add_widget(name_input)
-        box.add_widget(Label(text='Liked By:', size_hint_y=None, height=20))
-        box.add_widget(liked_by_spinner)
-        box.add_widget(Label(text='Location:', size_hint_y=None, height=20))
-        box.add_widget(location_spinner)
-        box.add_widget(Label(text='Tags:', size_hint_y=None, height=20))
-        box.add_widget(tags_input)
-        box.add_widget(Label(text='Cost:', size_hint_y=None, height=20))
-        box.add_widget(cost_input)
-        box.add_widget(Label(text='Max People:', size_hint_y=None, height=20))
-        box.add_widget(max_people_input)
-        box.add_widget(Label(text='Cost Type:', size_hint_y=None, height=20))
-        box.add_widget(cost_type_spinner)
-        box.add_widget(btns)
-        box.add_widget(status)
-        return box
+    def delete_idea(self, row):
+        try:
+            self.repository.delete(row.idea_id)
+        except Exception as e:
+            row.status.text = self.ideas_view.data[row.index]['status'] = f'Error: {e}'
+            return
+        del self.ideas_view.data[row.index]
 
     def go_back(self, instance):
         self.manager.current = 'main_menu'
 
+class MetricsOverlay(Label):
+    """
+    Hidden debug overlay (toggled with F12) listing the recent latencies of the
+    instrumented calls. Showing it turns metrics on if DATEPICKER_METRICS did not.
+    """
+    KEY = 293  # F12
+
+    def __init__(self, **kwargs):
+        super().__init__(font_name='RobotoMono-Regular', font_size='11sp', color=(1, 1, 0.6, 1),
+                         halign='left', valign='top', size_hint=(None, None), **kwargs)
+        with self.canvas.before:
+            Color(0, 0, 0, 0.7)
+            self._background = Rectangle()
+        self.bind(pos=self._layout, size=self._layout)
+        self._refresh = None
+
+    def _layout(self, *args):
+        self._background.pos = self.pos
+        self._background.size = self.size
+        self.text_size = (self.width - 16, self.height - 16)
+
+    def toggle(self, window, key, *args):
+        if key != self.KEY:
+            return False
+        if self.parent:
+            self._refresh.cancel()
+            window.remove_widget(self)
+            return True
+        if not metrics.enabled:
+            metrics.enable()
+        self.size = (window.width, window.height / 2)
+        self.pos = (0, window.height - self.height)
+        window.add_widget(self)
+        self.update()
+        self._refresh = Clock.schedule_interval(self.update, 0.5)
+        return True
+
+    def update(self, *args):
+        lines = [f"{'span':<26}{'n':>6}{'p50 ms':>9}{'p99 ms':>9}"]
+        for name, stat in metrics.snapshot().items():
+            lines.append(f"{name[:25]:<26}{stat['count']:>6}{stat['p50'] * 1e3:>9.2f}{stat['p99'] * 1e3:>9.2f}")
+        for name, value in sorted(metrics.counters.items()):
+            lines.append(f"{name[:25]:<26}{value:>6g}")
+        self.text = '\n'.join(lines)
+
 class DatePickerApp(App):
     def build(self):
+        # Before the manager loads, so idea loading and history setup are measured too
+        configure()
         sm = ScreenManager(transition=FadeTransition())
         # sm.app = self  # Remove this line, not needed
-        self.manager = DateIdeaManager(IDEAS_FILE)  # Use 'manager' for consistency
-        # Expose ideas and history for screens that expect them
-        self.ideas = self.manager.ideas
+        self.manager = DateIdeaManager(IDEAS_FILE, history_file=HISTORY_FILE)  # Use 'manager' for consistency
+        # All idea edits go through the repository, the only writer of IDEAS_FILE
+        self.repository = IdeaRepository(self.manager, IDEAS_FILE)
+        # Expose the history for screens that expect it; the catalog is read through
+        # the manager, which replaces it on every edit
         self.history = self.manager.history
         sm.add_widget(MainMenuScreen(name='main_menu'))
         sm.add_widget(SampleIdeaScreen(name='sample'))
@@ -670,5 +701,22 @@ class DatePickerApp(App):
         sm.add_widget(EditIdeasScreen(name='edit_ideas'))
         return sm
 
+    def on_start(self):
+        self.metrics_overlay = MetricsOverlay()
+        Window.bind(on_key_down=self.metrics_overlay.toggle)
+        # Load pandas/matplotlib in the background once the first frame is up
+        Clock.schedule_once(lambda dt: threading.Thread(target=warm_up_imports, daemon=True).start(), 0)
+
+    def on_stop(self):
+        # Write any idea edits still waiting for the debounce timer
+        self.repository.close()
+        self.manager.history.close()
+
+    def on_pause(self):
+        # Android may kill a paused app without calling on_stop
+        self.repository.flush()
+        self.manager.history.flush()
+        return True
+
 if __name__ == '__main__':
     DatePickerApp().run()
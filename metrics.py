@@ -0,0 +1,314 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+class Stat:
+    """Running count, total and max of one timed operation plus its most recent durations."""
+    __slots__ = ('count', 'total', 'max', 'recent')
+
+    def __init__(self, recent: int = 256):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=recent)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.recent.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        """Percentile (0-100) of the recent durations."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+class RingBufferSink:
+    """Keeps the last `size` events in memory, e.g. for a debug screen or a test."""
+    def __init__(self, size: int = 1000):
+        self.events: Deque[Dict] = deque(maxlen=size)
+
+    def emit(self, event: Dict):
+        self.events.append(event)
+
+    def close(self):
+        pass
+
+class JsonLinesSink:
+    """Appends one JSON object per event to a file, flushing every `flush_every` events."""
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self._file = open(path, 'a', encoding='utf-8')
+        self._pending = 0
+
+    def emit(self, event: Dict):
+        self._file.write(json.dumps(event) + '\n')
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self._file.flush()
+            self._pending = 0
+
+    def close(self):
+        self._file.close()
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+class Metrics:
+    """
+    Timing spans and counters for the app's hot paths, sent to pluggable sinks.
+
+    Disabled by default: instrumented functions then only check `enabled` before
+    calling through. Once enabled, every span updates an in-process Stat (count, total,
+    max and recent durations, read by snapshot() and prometheus_text()) and is passed
+    to each sink as {"name", "ts", "seconds"}; counters as {"name", "ts", "value"}.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.sinks: List[Any] = []
+        self.stats: Dict[str, Stat] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, *sinks):
+        with self._lock:
+            self.sinks.extend(sinks)
+            self.enabled = True
+
+    def disable(self):
+        """Stops recording and closes the sinks; collected stats are kept until reset()."""
+        with self._lock:
+            self.enabled = False
+            for sink in self.sinks:
+                sink.close()
+            self.sinks.clear()
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.counters.clear()
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = Stat()
+            stat.add(seconds)
+            if self.sinks:
+                event = {'name': name, 'ts': time.time(), 'seconds': seconds}
+                for sink in self.sinks:
+                    sink.emit(event)
+
+    def count(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            if self.sinks:
+                event = {'name': name, 'ts': time.time(), 'value': value}
+                for sink in self.sinks:
+                    sink.emit(event)
+
+    def span(self, name: str):
+        """Context manager timing a block: `with metrics.span('charts.render'): ...`."""
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def timed(self, name: str) -> Callable:
+        """Decorator timing every call of a function as the span `name`."""
+        def decorate(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Per span: count, mean, max, p50 and p99 (over its recent durations) in seconds."""
+        with self._lock:
+            return {name: {'count': stat.count, 'mean': stat.total / stat.count, 'max': stat.max,
+                           'p50': stat.percentile(50), 'p99': stat.percentile(99)}
+                    for name, stat in sorted(self.stats.items())}
+
+    def prometheus_text(self) -> str:
+        """The stats and counters in the Prometheus text exposition format."""
+        lines = ['# TYPE datepicker_span_seconds summary']
+        with self._lock:
+            for name, stat in sorted(self.stats.items()):
+                for q in (50, 90, 99):
+                    lines.append(f'datepicker_span_seconds{{name="{name}",quantile="{q / 100}"}} {stat.percentile(q):.9f}')
+                lines.append(f'datepicker_span_seconds_sum{{name="{name}"}} {stat.total:.9f}')
+                lines.append(f'datepicker_span_seconds_count{{name="{name}"}} {stat.count}')
+            lines.append('# TYPE datepicker_events_total counter')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'datepicker_events_total{{name="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+# The process-wide registry the instrumented modules report to
+metrics = Metrics()
+timed = metrics.timed
+span = metrics.span
+count = metrics.count
+
+class MetricsServer:
+    """Serves metrics.prometheus_text() at http://host:port/metrics from a daemon thread."""
+    def __init__(self, registry: Metrics = metrics, host: str = '127.0.0.1', port: int = 9108):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # Lets the server sit in Metrics.sinks, so disable() stops it
+    def emit(self, event: Dict):
+        pass
+
+class Profiler:
+    """
+    Optional cProfile (cpu) and tracemalloc (memory) capture around part of a run. Both
+    slow the program down noticeably, so they are only started on request.
+    """
+    def __init__(self, cpu: bool = True, memory: bool = False):
+        self.cpu = cpu
+        self.memory = memory
+        self._profile = None
+
+    def start(self):
+        if self.cpu:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start()
+        return self
+
+    def stop(self, path: Optional[str] = None, top: int = 20) -> str:
+        """Stops capturing and returns a text report; `path` also saves the cProfile stats (.prof)."""
+        report = []
+        if self._profile is not None:
+            import io
+            import pstats
+            self._profile.disable()
+            if path:
+                self._profile.dump_stats(path)
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats('cumulative').print_stats(top)
+            report.append(out.getvalue())
+            self._profile = None
+        if self.memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                report.append('Top allocations:')
+                report.extend(str(stat) for stat in snapshot.statistics('lineno')[:top])
+        return '\n'.join(report)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+def configure(spec: Optional[str] = None, registry: Metrics = metrics) -> Optional[Profiler]:
+    """
+    Enables metrics from a comma-separated spec, by default the DATEPICKER_METRICS
+    environment variable, e.g. "ring,jsonl=metrics.jsonl,prometheus=9108":
+
+    - on (or an empty item): in-process stats only
+    - ring[=SIZE]: RingBufferSink
+    - jsonl=PATH: JsonLinesSink
+    - prometheus[=PORT]: MetricsServer on 127.0.0.1 (default port 9108)
+    - profile[=PATH]: cProfile for the rest of the run, report printed (and stats saved) at exit
+    - tracemalloc: allocation tracking, top allocations printed at exit
+
+    Returns the started Profiler, if any. Does nothing when the spec is empty.
+    """
+    spec = os.environ.get('DATEPICKER_METRICS', '') if spec is None else spec
+    if not spec.strip():
+        return None
+    sinks, profile_path, cpu, memory = [], None, False, False
+    for item in spec.split(','):
+        key, _, value = item.strip().partition('=')
+        if key in ('', 'on', '1'):
+            continue
+        if key == 'ring':
+            sinks.append(RingBufferSink(int(value) if value else 1000))
+        elif key == 'jsonl':
+            if not value:
+                raise ValueError("jsonl needs a path, e.g. jsonl=metrics.jsonl")
+            sinks.append(JsonLinesSink(value))
+        elif key == 'prometheus':
+            sinks.append(MetricsServer(registry, port=int(value) if value else 9108))
+        elif key == 'profile':
+            cpu, profile_path = True, value or None
+        elif key == 'tracemalloc':
+            memory = True
+        else:
+            raise ValueError(f"unknown metrics option {key!r}")
+    import atexit
+    import sys
+    registry.enable(*sinks)
+    # Flush and close file sinks (and stop the server) on exit
+    atexit.register(registry.disable)
+    if not (cpu or memory):
+        return None
+    profiler = Profiler(cpu=cpu, memory=memory).start()
+    atexit.register(lambda: print(profiler.stop(profile_path), file=sys.stderr))
+    return profiler
@@ -0,0 +1,236 @@
+import random
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+from date_idea import DateIdea
+from date_stats import DateStats
+from idea_index import IdeaIndex
+
+# DateStats counter -> DateIdea attribute it counts
+BOOST_FIELDS = (('by_liked_by', 'liked_by'), ('by_location', 'location'), ('by_tag', 'tags'))
+
+def _packed(mask: Optional[int]) -> Optional[bytes]:
+    # Testing a bit of a big int (mask >> slot & 1) costs O(n); a byte lookup is O(1)
+    return None if mask is None else mask.to_bytes((mask.bit_length() + 7) >> 3, 'little')
+
+class FenwickTree:
+    """Binary indexed tree over non-negative float weights: O(log n) update, prefix sum and search."""
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        self.n = n
+        self.weights = list(weights)
+        tree = [0.0] + self.weights
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._top = 1 << n.bit_length() if n else 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def total(self) -> float:
+        return self.prefix_sum(self.n)
+
+    def prefix_sum(self, count: int) -> float:
+        """Sum of the first `count` weights."""
+        tree = self._tree
+        total = 0.0
+        while count > 0:
+            total += tree[count]
+            count &= count - 1
+        return total
+
+    def set(self, index: int, weight: float):
+        delta = weight - self.weights[index]
+        if not delta:
+            return
+        self.weights[index] = weight
+        tree = self._tree
+        i = index + 1
+        while i <= self.n:
+            tree[i] += delta
+            i += i & -i
+
+    def find(self, target: float) -> int:
+        """Returns the index whose cumulative weight range contains target (0 <= target < total)."""
+        tree = self._tree
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and tree[nxt] <= target:
+                pos = nxt
+                target -= tree[nxt]
+            step >>= 1
+        # Rounding can land past the end or on a zero weight; walk back to a live entry.
+        pos = min(pos, self.n - 1)
+        while pos > 0 and self.weights[pos] <= 0:
+            pos -= 1
+        return pos
+
+class NoveltySampler:
+    """
+    Weighted idea sampling that favours what has not been done lately.
+
+    Each idea slot's weight is boost * recency:
+
+    - boost favours under-used liked_by, location and tag values. For each of the three
+      attributes, an idea scores the mean of (average count + 1) / (value count + 1)
+      over its values, using the history counts in DateStats. The three scores are
+      multiplied and raised to `strength`.
+    - recency pushes down ideas done in the last `window` dates: an idea last done k
+      dates ago (k = 0 for the latest) gets (k + 1) / window.
+
+    Weights live in a Fenwick tree, so a draw is O(log n). Recording a date only touches
+    the ideas inside the recency window. Boosts depend on counts shared by many ideas,
+    so they are recomputed every `refresh_every` new dates instead of on every one.
+    """
+    def __init__(self, index: IdeaIndex, stats: Union[DateStats, Callable[[], DateStats]], slot_of: Callable[[str], Optional[int]],
+                 history: List[Dict], window: int = 10, strength: float = 1.0, refresh_every: int = 50):
+        self.index = index
+        self.slots = index.slots
+        # The DateStats, or a function returning them: they are only read to refresh the boosts
+        self.stats = stats
+        self.slot_of = slot_of
+        self.window = max(1, window)
+        self.strength = strength
+        self.refresh_every = refresh_every
+        self._boost: List[float] = []
+        # The last `window` dates as (date number, slot or None when the activity is not in the catalog)
+        self._recent: Deque[Tuple[int, Optional[int]]] = deque(maxlen=self.window)
+        self._last_seen: Dict[int, int] = {}
+        self._dates = 0
+        self._since_refresh = 0
+        self._seen: Tuple[int, Optional[int]] = (0, None)
+        self.rebuild(history)
+
+    def rebuild(self, history: List[Dict]):
+        """Recomputes all weights from scratch for the given history."""
+        self._recent.clear()
+        self._last_seen.clear()
+        recent = history[-self.window:]
+        self._dates = len(history) - len(recent)
+        for entry in recent:
+            self._push(entry)
+        self._refresh_boosts()
+        self._seen = self._key(history)
+
+    @staticmethod
+    def _key(history: List[Dict]) -> Tuple[int, Optional[int]]:
+        return len(history), id(history[-1]) if history else None
+
+    def _push(self, entry: Dict):
+        slot = self.slot_of(entry['activity_name'])
+        self._recent.append((self._dates, slot))
+        if slot is not None:
+            self._last_seen[slot] = self._dates
+        self._dates += 1
+
+    def _boost_for(self, idea: DateIdea, means: Dict[str, float], stats: DateStats) -> float:
+        boost = 1.0
+        for key, attr in BOOST_FIELDS:
+            values = getattr(idea, attr)
+            if values:
+                counts = getattr(stats, key)
+                boost *= sum((means[attr] + 1) / (counts[value] + 1) for value in values) / len(values)
+        return boost ** self.strength
+
+    def _refresh_boosts(self):
+        stats = self.stats() if callable(self.stats) else self.stats
+        means = {}
+        for key, attr in BOOST_FIELDS:
+            values = {value for idea in self.slots if idea is not None for value in getattr(idea, attr)}
+            counts = getattr(stats, key)
+            means[attr] = sum(counts[value] for value in values) / len(values) if values else 0.0
+        self._boost = [0.0 if idea is None else self._boost_for(idea, means, stats) for idea in self.slots]
+        self.tree = FenwickTree([self._weight(slot) for slot in range(len(self.slots))])
+        self._since_refresh = 0
+
+    def _recency(self, slot: int) -> float:
+        last = self._last_seen.get(slot)
+        if last is None:
+            return 1.0
+        age = self._dates - 1 - last
+        return min(1.0, (age + 1) / self.window)
+
+    def _weight(self, slot: int) -> float:
+        return self._boost[slot] * self._recency(slot)
+
+    def record(self, entry: Dict):
+        """Accounts for one newly recorded date in O(window log n)."""
+        # The date falling out of the window recovers fully; everything still inside ages by one.
+        dropped = self._recent[0] if len(self._recent) == self.window else None
+        self._push(entry)
+        self._since_refresh += 1
+        if self.refresh_every and self._since_refresh >= self.refresh_every:
+            self._refresh_boosts()
+            return
+        touched = {slot for _, slot in self._recent if slot is not None}
+        if dropped is not None and dropped[1] is not None:
+            touched.add(dropped[1])
+        for slot in touched:
+            if self._last_seen.get(slot, -1) < self._dates - self.window:
+                self._last_seen.pop(slot, None)
+            self.tree.set(slot, self._weight(slot))
+
+    def sync(self, history: List[Dict]):
+        """Catches up with dates recorded since the last call, rebuilding after clears."""
+        seen_len, seen_last = self._seen
+        if self._key(history) == self._seen:
+            return
+        appended = len(history) > seen_len and (seen_len == 0 or id(history[seen_len - 1]) == seen_last)
+        if not appended or len(history) - seen_len > self.refresh_every:
+            self.rebuild(history)
+            return
+        for entry in history[seen_len:]:
+            self.record(entry)
+        self._seen = self._key(history)
+
+    def choice(self, mask: Optional[int] = None, rng: Optional[random.Random] = None) -> Optional[int]:
+        """
+        Draws a slot with probability proportional to its weight, restricted to the slots
+        in `mask` (an IdeaIndex bitset) when given. Returns None if nothing has weight.
+        """
+        return self._choice(mask, _packed(mask), rng or random)
+
+    def _choice(self, mask: Optional[int], packed: Optional[bytes], rng) -> Optional[int]:
+        total = self.tree.total()
+        if total <= 0:
+            return self._fallback(mask, rng)
+        # Rejection against the mask keeps draws O(log n) while the filter keeps a
+        # reasonable share of the weight; very selective filters are weighed directly.
+        for _ in range(32):
+            slot = self.tree.find(rng.random() * total)
+            if self.tree.weights[slot] > 0 and (packed is None or (slot >> 3 < len(packed)
+                                                                  and packed[slot >> 3] >> (slot & 7) & 1)):
+                return slot
+        return self._fallback(mask, rng)
+
+    def _fallback(self, mask: Optional[int], rng: random.Random) -> Optional[int]:
+        weights = self.tree.weights
+        candidates = range(len(weights)) if mask is None else self.index.slots_of(mask)
+        slots = [slot for slot in candidates if weights[slot] > 0]
+        if not slots:
+            return None
+        return rng.choices(slots, weights=[weights[slot] for slot in slots])[0]
+
+    def sample(self, n: int, mask: Optional[int] = None, rng: Optional[random.Random] = None, replace: bool = False) -> List[int]:
+        """Draws n slots; without replacement, each drawn slot is excluded from later draws."""
+        drawn: List[int] = []
+        removed: List[Tuple[int, float]] = []
+        packed = _packed(mask)
+        rng = rng or random
+        try:
+            for _ in range(n):
+                slot = self._choice(mask, packed, rng)
+                if slot is None:
+                    break
+                drawn.append(slot)
+                if not replace:
+                    removed.append((slot, self.tree.weights[slot]))
+                    self.tree.set(slot, 0.0)
+        finally:
+            for slot, weight in removed:
+                self.tree.set(slot, weight)
+        return drawn
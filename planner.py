@@ -0,0 +1,253 @@
+import heapq
+import random
+import time
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from date_idea import DateIdea
+from date_manager import DateIdeaManager, cost_per_person
+from metrics import timed
+
+# DateIdea attributes an itinerary is balanced over
+BALANCE_FIELDS = ('liked_by', 'location', 'tags')
+
+@dataclass
+class Itinerary:
+    """A planned sequence of dates; costs are per person."""
+    ideas: List[DateIdea]
+    costs: List[float]
+    total_cost: float
+    budget: float
+    n_people: int
+    score: float
+    # Widest beam that was searched to the end, and whether the timeout stopped a wider one
+    beam_width: int = 0
+    timed_out: bool = False
+
+    @property
+    def remaining(self) -> float:
+        return self.budget - self.total_cost
+
+class _Pool:
+    """
+    Candidate ideas for one plan as numpy arrays, so each partial plan scores every
+    candidate in a few vectorized passes.
+
+    Balance values are numbered as keys. Each candidate owns a run of groups, one per
+    balance field it has values for, and each group a run of keys, so per-group means
+    and per-candidate products are np.add/np.multiply.reduceat over the flat arrays. A
+    leading group pointing at the count slot `n_keys`, which stays zero, keeps every
+    candidate's run non-empty.
+    """
+    def __init__(self, ideas: Sequence[DateIdea], costs: Sequence[float], weights: Sequence[float]):
+        self.ideas = list(ideas)
+        self.costs = np.asarray(costs, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        key_ids: Dict[Tuple[str, str], int] = {}
+        self.key_fields: List[str] = []
+        # Candidate ids holding each key, to exclude them all once the key reaches a cap
+        self.holders: List[List[int]] = []
+        # Key ids of each candidate, to update a plan's counts when it is added
+        self.idea_keys: List[List[int]] = []
+        flat_keys: List[int] = []
+        group_starts: List[int] = []
+        group_sizes: List[int] = []
+        idea_starts: List[int] = []
+        for j, idea in enumerate(self.ideas):
+            idea_starts.append(len(group_starts))
+            group_starts.append(len(flat_keys))
+            group_sizes.append(1)
+            flat_keys.append(-1)
+            keys = []
+            for attr in BALANCE_FIELDS:
+                values = set(getattr(idea, attr))
+                if not values:
+                    continue
+                group_starts.append(len(flat_keys))
+                group_sizes.append(len(values))
+                for value in values:
+                    key = key_ids.get((attr, value))
+                    if key is None:
+                        key = key_ids[(attr, value)] = len(self.key_fields)
+                        self.key_fields.append(attr)
+                        self.holders.append([])
+                    self.holders[key].append(j)
+                    keys.append(key)
+                    flat_keys.append(key)
+            self.idea_keys.append(keys)
+        self.n_keys = len(self.key_fields)
+        # The leading group of every candidate holds the last count slot, which stays zero
+        self.flat_keys = np.asarray([self.n_keys if key < 0 else key for key in flat_keys], dtype=np.intp)
+        self.group_starts = np.asarray(group_starts, dtype=np.intp)
+        self.group_sizes = np.asarray(group_sizes, dtype=float)
+        self.idea_starts = np.asarray(idea_starts, dtype=np.intp)
+        by_name: Dict[str, List[int]] = {}
+        for j, idea in enumerate(self.ideas):
+            by_name.setdefault(idea.name, []).append(j)
+        # Candidate ids sharing each candidate's name, excluded together when repeats are off
+        self.same_name = [by_name[idea.name] for idea in self.ideas]
+        # cheapest[k]: least possible spend on k more dates
+        self.cheapest = [0.0] + list(accumulate(sorted(self.costs.tolist())))
+
+    def __len__(self) -> int:
+        return len(self.ideas)
+
+    def values(self, counts, powers):
+        """Each candidate's value as the next date of a plan with the given key counts."""
+        factors = powers[counts][self.flat_keys]
+        means = np.add.reduceat(factors, self.group_starts) / self.group_sizes
+        return self.weights * np.multiply.reduceat(means, self.idea_starts)
+
+class _State:
+    __slots__ = ('score', 'spent', 'chosen', 'counts')
+
+    def __init__(self, score: float, spent: float, chosen: Tuple[int, ...], counts):
+        self.score = score
+        self.spent = spent
+        self.chosen = chosen
+        self.counts = counts
+
+class _Timeout(Exception):
+    pass
+
+def _candidate_pool(manager: DateIdeaManager, n_people: int, budget: float, liked_by: Optional[str],
+                    location: Optional[str], max_cost: Optional[float], novelty: bool, pool_size: int,
+                    rng: random.Random) -> _Pool:
+    """
+    Filters the catalog with the manager's index and keeps the `pool_size` best-weighted
+    ideas (a random `pool_size` of them when every idea weighs the same) plus the
+    `pool_size` cheapest ones, so a plan over a 100k-idea catalog searches a few hundred
+    ideas and still has cheap fillers when the budget is tight.
+    """
+    if novelty:
+        index, weights = manager.novelty_weights()
+    else:
+        index, weights = manager.snapshot().index, None
+    per_date = budget if max_cost is None else min(max_cost, budget)
+    mask = index.candidates_mask(liked_by=liked_by, location=location, max_cost=per_date, n_people=n_people)
+    cheap = {slot for _, slot in index.cheapest(mask, n_people, pool_size)}
+    if weights is None:
+        matching = index.slots_of(mask)
+        best = set(matching if len(matching) <= pool_size else rng.sample(matching, pool_size))
+    else:
+        best = set(heapq.nlargest(pool_size, index.slots_of(mask), key=weights.__getitem__))
+    slots = sorted(cheap | best)
+    ideas = [index.slots[slot] for slot in slots]
+    return _Pool(ideas, [cost_per_person(idea, n_people) for idea in ideas],
+                 [1.0 if weights is None else weights[slot] for slot in slots])
+
+def _beam_search(pool: _Pool, dates: int, budget: float, width: int, repeat_penalty: float,
+                 max_per_value: Dict[str, Optional[int]], allow_repeats: bool, deadline: Optional[float]) -> _State:
+    """
+    Builds plans one date at a time, keeping the `width` best partial plans. A date's value
+    is its idea's weight times, for each balance field, the mean of repeat_penalty ** (times
+    the value is already in the plan), so repeated locations, tags and people earn less.
+    A partial plan is only extended if the cheapest possible remaining dates still fit.
+    """
+    powers = repeat_penalty ** np.arange(dates + 1, dtype=float)
+    limits = {attr: limit for attr, limit in max_per_value.items() if limit is not None}
+    # One count per key plus the always-zero key every candidate starts with
+    beam = [_State(0.0, 0.0, (), np.zeros(pool.n_keys + 1, dtype=np.intp))]
+    best = beam[0]
+    for depth in range(dates):
+        left = dates - depth - 1
+        children: List[Tuple[float, float, _State, int]] = []
+        for parent in beam:
+            if deadline is not None and time.perf_counter() > deadline:
+                raise _Timeout
+            values = pool.values(parent.counts, powers)
+            # Small slack so summed float costs that exactly fill the budget still fit
+            room = budget - parent.spent - pool.cheapest[min(left, len(pool))] + 1e-9
+            values[pool.costs > room] = -np.inf
+            if not allow_repeats:
+                for j in parent.chosen:
+                    values[pool.same_name[j]] = -np.inf
+            for key in np.flatnonzero(parent.counts[:-1]) if limits else ():
+                limit = limits.get(pool.key_fields[key])
+                if limit is not None and parent.counts[key] >= limit:
+                    values[pool.holders[key]] = -np.inf
+            # Best values first, cheaper first among equal values
+            for j in np.lexsort((pool.costs, -values))[:width].tolist():
+                if values[j] == -np.inf:
+                    break
+                children.append((parent.score + values[j], -(parent.spent + pool.costs[j]), parent, j))
+        if not children:
+            break
+        next_beam = []
+        seen = set()
+        for score, neg_spent, parent, j in heapq.nlargest(width * 4, children, key=lambda c: (c[0], c[1])):
+            chosen = tuple(sorted(parent.chosen + (j,)))
+            if chosen in seen:
+                continue
+            seen.add(chosen)
+            counts = parent.counts.copy()
+            counts[pool.idea_keys[j]] += 1
+            next_beam.append(_State(float(score), -neg_spent, parent.chosen + (j,), counts))
+            if len(next_beam) == width:
+                break
+        beam = next_beam
+        best = beam[0]
+    return best
+
+@timed('planner.plan_itinerary')
+def plan_itinerary(manager: DateIdeaManager, dates: int, budget: float, n_people: int,
+                   liked_by: Optional[str] = None, location: Optional[str] = None, max_cost: Optional[float] = None,
+                   repeat_penalty: float = 0.5, max_per_location: Optional[int] = None,
+                   max_per_tag: Optional[int] = None, allow_repeats: bool = False, novelty: bool = True,
+                   beam_width: int = 64, pool_size: int = 300, timeout: Optional[float] = 1.0,
+                   seed: Optional[int] = None) -> Itinerary:
+    """
+    Plans `dates` dates whose per-person costs add up to at most `budget`, under the same
+    filters as sample_idea (max_cost caps a single date). Nothing is recorded.
+
+    The plan favours ideas NoveltySampler would (under-used tags, locations and people in
+    the history, not done recently; novelty=False weighs every idea equally) and balances
+    the plan itself: each further date sharing a location, tag or person with earlier ones
+    is worth repeat_penalty times less. max_per_location/max_per_tag are hard caps.
+    With novelty=False the ideas searched are drawn at random; pass a seed to make that
+    draw reproducible.
+
+    The search is an anytime beam search: a greedy plan first, then beams 4x wider up to
+    beam_width, keeping the best complete plan. With a timeout (seconds) the search stops
+    there and returns the best plan so far; the greedy plan is always finished. Fewer than
+    `dates` dates are returned when nothing more fits the budget.
+    """
+    if n_people is None:
+        raise ValueError("You must specify n_people (number of people) when planning dates.")
+    if budget is None:
+        raise ValueError("You must specify a total budget when planning dates.")
+    if dates < 0 or budget < 0 or n_people < 1:
+        raise ValueError("dates and budget must be non-negative and n_people at least 1.")
+    if not 0 < repeat_penalty <= 1:
+        raise ValueError("repeat_penalty must be in (0, 1].")
+    started = time.perf_counter()
+    deadline = None if timeout is None else started + timeout
+    rng = random.Random(seed) if seed is not None else manager.rng
+    pool = _candidate_pool(manager, n_people, budget, liked_by, location, max_cost, novelty, pool_size, rng)
+    limits = {'location': max_per_location, 'tags': max_per_tag}
+    best, reached, timed_out = None, 0, False
+    width = 1
+    while True:
+        try:
+            state = _beam_search(pool, dates, budget, width, repeat_penalty, limits, allow_repeats,
+                                 None if width == 1 else deadline)
+        except _Timeout:
+            timed_out = True
+            break
+        if best is None or (len(state.chosen), state.score) > (len(best.chosen), best.score):
+            best = state
+        reached = width
+        if width >= beam_width:
+            break
+        width = min(width * 4, beam_width)
+    return Itinerary(
+        ideas=[pool.ideas[j] for j in best.chosen],
+        costs=[float(pool.costs[j]) for j in best.chosen],
+        total_cost=float(best.spent),
+        budget=budget,
+        n_people=n_people,
+        score=best.score,
+        beam_width=reached,
+        timed_out=timed_out,
+    )
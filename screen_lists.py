@@ -0,0 +1,93 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from date_idea import DateIdea
+
+# Spinner values that stand for both people / both places
+BOTH_LIKED_BY = ['bf', 'gf']
+BOTH_LOCATIONS = ['home', 'outside']
+
+def history_rows(entries: Iterable[Dict]) -> List[Dict]:
+    """RecycleView data for history entries: one markup Label per entry."""
+    return [{'text': f"[b]{entry['activity_name']}[/b] | {entry['date']} | ₹{entry.get('cost_per_person') or 0:.2f}",
+             'markup': True} for entry in entries]
+
+class HistoryPager:
+    """
+    The pages behind HistoryScreen's list, newest first. `open` gives the first page and
+    `next_page` the next older one as the list is scrolled to the bottom. Pages all come
+    from the HistoryView passed to `open`, so dates recorded meanwhile do not shift them.
+    """
+    def __init__(self, page_size: int = 100):
+        self.page_size = page_size
+        self.view = None
+        self.loaded = 0
+        self._shown: Optional[Tuple[int, Optional[int]]] = None
+
+    def open(self, history) -> Optional[List[Dict]]:
+        """Returns the list data for `history`, or None if that history is already shown."""
+        # Entries are only appended or cleared from the end, so the length and the last
+        # entry identify what is already shown.
+        shown = (len(history), id(history[-1]) if history else None)
+        if shown == self._shown:
+            return None
+        self._shown = shown
+        self.view = history
+        if not history:
+            self.loaded = 0
+            return [{'text': 'No history yet.'}]
+        entries = history.page(0, self.page_size)
+        self.loaded = len(entries)
+        return history_rows(entries)
+
+    def next_page(self) -> List[Dict]:
+        """Rows for the next page of older entries; empty once every entry is loaded."""
+        if not self.loaded:
+            return []
+        entries = self.view.page(self.loaded, self.page_size)
+        self.loaded += len(entries)
+        return history_rows(entries)
+
+def idea_rows(items: Iterable[Tuple[int, DateIdea]]) -> List[Dict]:
+    """RecycleView data for IdeaRepository.items(): one IdeaEditorRow per idea."""
+    return [idea_row(idea_id, idea) for idea_id, idea in items]
+
+def idea_row(idea_id: int, idea: DateIdea, status: str = '') -> Dict:
+    """One editor's data; replacing just this item refreshes just that row."""
+    row = {'idea_id': idea_id, 'idea': idea}
+    if status:
+        row['status'] = status
+    return row
+
+def spinner_text(values: List[str], both: List[str]) -> str:
+    """Spinner text for a liked_by/location list, where both values together show as 'both'."""
+    return 'both' if sorted(values) == sorted(both) else ','.join(values)
+
+def spinner_values(text: str, both: List[str]) -> List[str]:
+    """The liked_by/location list a spinner's text stands for."""
+    return list(both) if text == 'both' else [text]
+
+def editor_fields(idea: DateIdea) -> Dict[str, str]:
+    """The text an idea editor shows for each field."""
+    return {
+        'name': idea.name,
+        'liked_by': spinner_text(idea.liked_by, BOTH_LIKED_BY),
+        'location': spinner_text(idea.location, BOTH_LOCATIONS),
+        'tags': ','.join(idea.tags),
+        'cost': str(idea.cost),
+        'max_people': str(idea.max_people),
+        'cost_type': idea.cost_type,
+    }
+
+def idea_from_fields(fields: Dict[str, str]) -> DateIdea:
+    """
+    The idea an editor's field text describes; empty cost and max people mean 0 and 1.
+    Raises ValueError if either is not a number.
+    """
+    return DateIdea(
+        name=fields['name'].strip(),
+        liked_by=spinner_values(fields['liked_by'], BOTH_LIKED_BY),
+        location=spinner_values(fields['location'], BOTH_LOCATIONS),
+        tags=[t.strip() for t in fields['tags'].split(',') if t.strip()],
+        cost=float(fields['cost']) if fields['cost'] else 0.0,
+        max_people=int(fields['max_people']) if fields['max_people'] else 1,
+        cost_type=fields['cost_type'],
+    )
@@ -0,0 +1,188 @@
+import math
+import os
+import random
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from date_manager import DateIdeaManager, cost_per_person
+
+@dataclass
+class SimulationResult:
+    """Aggregated outcome of many simulated months; distributions map a value to a session count."""
+    sessions: int
+    monthly_budget: float
+    mean_dates: float
+    mean_spend: float
+    std_spend: float
+    min_spend: float
+    max_spend: float
+    # Share of months that ended because nothing affordable was left (rather than max_dates)
+    budget_limited: float
+    dates_distribution: Dict[int, int] = field(default_factory=dict)
+    # Lower bucket edge -> months, buckets spend_bucket wide
+    spend_histogram: Dict[float, int] = field(default_factory=dict)
+    spend_bucket: float = 0.0
+    # Idea name -> share of months in which it was done
+    coverage: Dict[str, float] = field(default_factory=dict)
+
+    def spend_percentile(self, q: float) -> float:
+        """Approximate spend percentile (0-100), read from the histogram's bucket edges."""
+        target = self.sessions * q / 100
+        seen = 0
+        for edge in sorted(self.spend_histogram):
+            seen += self.spend_histogram[edge]
+            if seen >= target:
+                return min(edge + self.spend_bucket, self.max_spend)
+        return self.max_spend
+
+class _Totals:
+    """Mergeable partial aggregates produced by one chunk of sessions."""
+    def __init__(self):
+        self.sessions = 0
+        self.dates = 0
+        self.spend = 0.0
+        self.spend_sq = 0.0
+        self.min_spend = math.inf
+        self.max_spend = -math.inf
+        self.budget_limited = 0
+        self.dates_distribution: Counter = Counter()
+        self.spend_histogram: Counter = Counter()
+        self.idea_counts: Counter = Counter()
+
+    def merge(self, other: "_Totals"):
+        self.sessions += other.sessions
+        self.dates += other.dates
+        self.spend += other.spend
+        self.spend_sq += other.spend_sq
+        self.min_spend = min(self.min_spend, other.min_spend)
+        self.max_spend = max(self.max_spend, other.max_spend)
+        self.budget_limited += other.budget_limited
+        self.dates_distribution.update(other.dates_distribution)
+        self.spend_histogram.update(other.spend_histogram)
+        self.idea_counts.update(other.idea_counts)
+
+# Per-process simulation inputs, set once by _init_worker so chunks only carry their seed.
+_costs: List[float] = []
+_params: Dict = {}
+
+def _init_worker(costs: List[float], params: Dict):
+    global _costs, _params
+    _costs, _params = costs, params
+
+def _run_chunk(seed: str, sessions: int) -> _Totals:
+    """
+    Simulates `sessions` months. Each month draws uniformly among the candidate ideas
+    still affordable with the remaining per-person budget, as sample_idea does with
+    max_cost set to that remainder, until nothing is affordable or max_dates is reached.
+    """
+    costs = _costs
+    budget, max_dates, allow_repeats, bucket = (
+        _params['budget'], _params['max_dates'], _params['allow_repeats'], _params['bucket'])
+    rng = random.Random(seed)
+    randrange = rng.randrange
+    totals = _Totals()
+    idea_counts = totals.idea_counts
+    for _ in range(sessions):
+        remaining = budget
+        done: List[int] = []
+        used = set()
+        limited = False
+        while len(done) < max_dates:
+            # costs are sorted, so the affordable ideas are a prefix
+            affordable = bisect_right(costs, remaining)
+            if allow_repeats:
+                if not affordable:
+                    limited = True
+                    break
+                pick = randrange(affordable)
+            else:
+                left = affordable - sum(1 for i in used if i < affordable)
+                if left <= 0:
+                    limited = True
+                    break
+                if left * 2 > affordable:
+                    # Mostly unused: rejection is cheap
+                    pick = randrange(affordable)
+                    while pick in used:
+                        pick = randrange(affordable)
+                else:
+                    pick = [i for i in range(affordable) if i not in used][randrange(left)]
+                used.add(pick)
+            done.append(pick)
+            remaining -= costs[pick]
+        spent = budget - remaining
+        totals.sessions += 1
+        totals.dates += len(done)
+        totals.spend += spent
+        totals.spend_sq += spent * spent
+        totals.min_spend = min(totals.min_spend, spent)
+        totals.max_spend = max(totals.max_spend, spent)
+        totals.budget_limited += limited
+        totals.dates_distribution[len(done)] += 1
+        totals.spend_histogram[math.floor(spent / bucket) if bucket else 0] += 1
+        idea_counts.update(set(done))
+    return totals
+
+def _chunks(sessions: int, chunk_size: int) -> List[int]:
+    return [min(chunk_size, sessions - start) for start in range(0, sessions, chunk_size)]
+
+def simulate_budget(manager: DateIdeaManager, monthly_budget: float, n_people: int,
+                    liked_by: Optional[str] = None, location: Optional[str] = None, max_cost: Optional[float] = None,
+                    sessions: int = 100_000, max_dates: int = 8, allow_repeats: bool = False,
+                    seed: int = 0, workers: Optional[int] = None, chunk_size: int = 20_000) -> SimulationResult:
+    """
+    Monte-Carlo estimate of how many dates a monthly per-person budget buys and what is
+    spent, under the given sample_idea filters. Nothing is recorded in the history.
+
+    Candidates are filtered once with the manager's index and shipped to each worker as a
+    sorted list of per-person costs. Sessions are split into fixed-size chunks, each with
+    its own RNG stream derived from `seed` and the chunk number, so results do not depend
+    on `workers`. workers=None uses every core; workers=1 runs in this process.
+    """
+    if sessions <= 0:
+        raise ValueError("sessions must be positive")
+    if max_cost is None:
+        max_cost = monthly_budget
+    mask = manager.index.candidates_mask(liked_by=liked_by, location=location, max_cost=max_cost, n_people=n_people)
+    candidates = sorted(((cost_per_person(idea, n_people), idea.name) for idea in manager.index.ideas_of(mask)),
+                        key=lambda pair: pair[0])
+    costs = [cost for cost, _ in candidates]
+    params = {'budget': monthly_budget, 'max_dates': max_dates, 'allow_repeats': allow_repeats,
+              'bucket': monthly_budget / 50 if monthly_budget > 0 else 0}
+    chunks = [(f'{seed}:{i}', size) for i, size in enumerate(_chunks(sessions, chunk_size))]
+    workers = workers or os.cpu_count() or 1
+    totals = _Totals()
+    if workers == 1 or len(chunks) == 1:
+        _init_worker(costs, params)
+        for chunk_seed, size in chunks:
+            totals.merge(_run_chunk(chunk_seed, size))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                                 initargs=(costs, params)) as pool:
+            for partial in pool.map(_run_chunk, *zip(*chunks)):
+                totals.merge(partial)
+    return _result(totals, monthly_budget, params['bucket'], [name for _, name in candidates])
+
+def _result(totals: _Totals, budget: float, bucket: float, names: Sequence[str]) -> SimulationResult:
+    n = totals.sessions
+    mean_spend = totals.spend / n
+    coverage: Counter = Counter()
+    for i, count in totals.idea_counts.items():
+        # Ideas sharing a name are reported together, like history entries
+        coverage[names[i]] += count / n
+    return SimulationResult(
+        sessions=n,
+        monthly_budget=budget,
+        mean_dates=totals.dates / n,
+        mean_spend=mean_spend,
+        std_spend=math.sqrt(max(0.0, totals.spend_sq / n - mean_spend * mean_spend)),
+        min_spend=totals.min_spend,
+        max_spend=totals.max_spend,
+        budget_limited=totals.budget_limited / n,
+        dates_distribution=dict(sorted(totals.dates_distribution.items())),
+        spend_histogram={k * bucket: v for k, v in sorted(totals.spend_histogram.items())},
+        spend_bucket=bucket,
+        coverage=dict(coverage.most_common()),
+    )
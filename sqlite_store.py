@@ -0,0 +1,306 @@
+import argparse
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from date_idea import DateIdea
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+SCHEMA_VERSION = 1
+# DateIdea list attribute -> table holding one (idea_id, idx, value) row per element
+VALUE_TABLES = (('liked_by', 'idea_liked_by'), ('location', 'idea_locations'), ('tags', 'idea_tags'))
+# analyze() stats key -> table
+STATS_TABLES = (('by_liked_by', 'idea_liked_by'), ('by_location', 'idea_locations'), ('by_tag', 'idea_tags'))
+# SQLite's historical limit on bound parameters is 999
+_CHUNK = 500
+# sample_idea's random id probes before it lists the matching ids instead
+_PROBES = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ideas (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    cost NUMERIC NOT NULL,
+    max_people INTEGER NOT NULL,
+    cost_type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ideas_name ON ideas (name);
+CREATE INDEX IF NOT EXISTS ideas_max_people ON ideas (max_people);
+CREATE INDEX IF NOT EXISTS ideas_cost ON ideas (cost_type, cost);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    idea_id INTEGER NOT NULL REFERENCES ideas (id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (idea_id, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS {table}_value ON {table} (value, idea_id);
+""" for _, table in VALUE_TABLES) + """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    activity_name TEXT NOT NULL,
+    date TEXT,
+    cost_per_person REAL
+);
+CREATE INDEX IF NOT EXISTS history_date ON history (date);
+CREATE INDEX IF NOT EXISTS history_activity ON history (activity_name);
+"""
+
+def is_sqlite_path(path: str) -> bool:
+    return path.endswith(SQLITE_SUFFIXES)
+
+def _number(value):
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+class SQLiteStore:
+    """
+    SQLite storage for both the idea catalog and the date history.
+
+    Ideas live in one row each, with liked_by, location and tags in side tables indexed
+    by value, so sampling filters and analysis counts run as indexed SQL instead of
+    Python loops. History is one row per date, indexed by date and activity. The
+    database runs in WAL mode so readers are not blocked by the writer.
+
+    The store also implements the HistoryJournal interface (load, append, clear,
+    compact, close), which is how DateHistory uses it.
+    """
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(file_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    # --- ideas ---
+
+    def _insert_values(self, idea_id: int, idea: DateIdea):
+        for attr, table in VALUE_TABLES:
+            self.conn.executemany(f"INSERT INTO {table} (idea_id, idx, value) VALUES (?, ?, ?)",
+                                  [(idea_id, idx, value) for idx, value in enumerate(getattr(idea, attr))])
+
+    def add_idea(self, idea: DateIdea) -> int:
+        """Inserts an idea and returns its id. Ids increase, so id order is catalog order."""
+        return self.add_ideas([idea])[0]
+
+    def add_ideas(self, ideas: Iterable[DateIdea]) -> List[int]:
+        """Inserts many ideas in one transaction."""
+        with self._lock, self.conn:
+            ids = []
+            for idea in ideas:
+                cursor = self.conn.execute("INSERT INTO ideas (name, cost, max_people, cost_type) VALUES (?, ?, ?, ?)",
+                                           (idea.name, idea.cost, idea.max_people, idea.cost_type))
+                self._insert_values(cursor.lastrowid, idea)
+                ids.append(cursor.lastrowid)
+            return ids
+
+    def update_idea(self, idea_id: int, idea: DateIdea):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE ideas SET name = ?, cost = ?, max_people = ?, cost_type = ? WHERE id = ?",
+                              (idea.name, idea.cost, idea.max_people, idea.cost_type, idea_id))
+            for _, table in VALUE_TABLES:
+                self.conn.execute(f"DELETE FROM {table} WHERE idea_id = ?", (idea_id,))
+            self._insert_values(idea_id, idea)
+
+    def delete_idea(self, idea_id: int):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM ideas WHERE id = ?", (idea_id,))
+
+    def _build_ideas(self, rows: Sequence[Tuple], where: str = "", params: Sequence = ()) -> List[Tuple[int, DateIdea]]:
+        values: Dict[str, Dict[int, List[str]]] = {}
+        for attr, table in VALUE_TABLES:
+            by_idea: Dict[int, List[str]] = {}
+            for idea_id, value in self.conn.execute(
+                    f"SELECT idea_id, value FROM {table} {where} ORDER BY idea_id, idx", params):
+                by_idea.setdefault(idea_id, []).append(value)
+            values[attr] = by_idea
+        return [(idea_id, DateIdea(
+            name=name,
+            liked_by=values['liked_by'].get(idea_id, []),
+            location=values['location'].get(idea_id, []),
+            tags=values['tags'].get(idea_id, []),
+            cost=_number(cost),
+            max_people=max_people,
+            cost_type=cost_type,
+        )) for idea_id, name, cost, max_people, cost_type in rows]
+
+    def load_ideas(self) -> List[Tuple[int, DateIdea]]:
+        """Returns (id, idea) for the whole catalog in catalog order."""
+        with self._lock:
+            rows = self.conn.execute("SELECT id, name, cost, max_people, cost_type FROM ideas ORDER BY id").fetchall()
+            return self._build_ideas(rows)
+
+    def ideas_by_id(self, ids: Sequence[int]) -> List[DateIdea]:
+        """Materializes the given ideas, in the order of `ids`."""
+        found: Dict[int, DateIdea] = {}
+        with self._lock:
+            for start in range(0, len(ids), _CHUNK):
+                chunk = list(ids[start:start + _CHUNK])
+                marks = ", ".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT id, name, cost, max_people, cost_type FROM ideas WHERE id IN ({marks})", chunk).fetchall()
+                found.update(self._build_ideas(rows, f"WHERE idea_id IN ({marks})", chunk))
+        return [found[idea_id] for idea_id in ids]
+
+    def _candidates_query(self, select: str, liked_by: Optional[str], location: Optional[str],
+                          max_cost: Optional[float], n_people: Optional[int],
+                          idea_id: Optional[int] = None) -> Tuple[str, List]:
+        # Same filters as IdeaIndex.candidates_mask; each attribute filter is an indexed join.
+        joins, where, params = [], [], []
+        if liked_by:
+            joins.append("JOIN idea_liked_by l ON l.idea_id = i.id AND l.value = ?")
+            params.append(liked_by)
+        if location:
+            joins.append("JOIN idea_locations o ON o.idea_id = i.id AND o.value = ?")
+            params.append(location)
+        if idea_id is not None:
+            where.append("i.id = ?")
+            params.append(idea_id)
+        if n_people is not None:
+            where.append("i.max_people >= ?")
+            params.append(n_people)
+        if max_cost is not None:
+            divisor = n_people if n_people else 1
+            where.append("((i.cost_type = 'total' AND i.cost * 1.0 / ? <= ?) OR (i.cost_type <> 'total' AND i.cost <= ?))")
+            params.extend((divisor, max_cost, max_cost))
+        sql = f"SELECT {select} FROM ideas i {' '.join(joins)}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, params
+
+    def candidate_ids(self, liked_by: Optional[str] = None, location: Optional[str] = None,
+                      max_cost: Optional[float] = None, n_people: Optional[int] = None) -> List[int]:
+        """Returns the ids of ideas matching the sample_idea filters, in catalog order."""
+        # DISTINCT: an idea listing the same value twice would otherwise match twice.
+        sql, params = self._candidates_query("DISTINCT i.id", liked_by, location, max_cost, n_people)
+        with self._lock:
+            return [row[0] for row in self.conn.execute(sql + " ORDER BY i.id", params)]
+
+    def sample_idea(self, rng, liked_by: Optional[str] = None, location: Optional[str] = None,
+                    max_cost: Optional[float] = None, n_people: Optional[int] = None) -> Optional[DateIdea]:
+        """
+        Picks one matching idea uniformly with `rng` by seeking random ids, redrawing ids that
+        were deleted or do not match; filters too narrow for that fall back to listing the ids.
+        """
+        with self._lock:
+            # Two subqueries: MIN and MAX in one SELECT would scan the table
+            low, high = self.conn.execute(
+                "SELECT (SELECT MIN(id) FROM ideas), (SELECT MAX(id) FROM ideas)").fetchone()
+            if low is None:
+                return None
+            for _ in range(_PROBES):
+                sql, params = self._candidates_query("i.id", liked_by, location, max_cost, n_people,
+                                                     idea_id=rng.randint(low, high))
+                row = self.conn.execute(sql + " LIMIT 1", params).fetchone()
+                if row is not None:
+                    return self.ideas_by_id([row[0]])[0]
+            ids = self.candidate_ids(liked_by, location, max_cost, n_people)
+            return self.ideas_by_id([rng.choice(ids)])[0] if ids else None
+
+    # --- analysis ---
+
+    def count_stats(self) -> Dict:
+        """
+        The aggregation behind DateIdeaManager.analyze (see analytics.count_stats), computed
+        by joining history to the catalog in SQL. As elsewhere, a history entry counts
+        towards the first idea with its name.
+        """
+        per_idea = """
+            WITH first AS (SELECT name, MIN(id) AS id FROM ideas GROUP BY name)
+            SELECT f.id AS idea_id, f.name AS name, COUNT(*) AS n
+            FROM history h JOIN first f ON f.name = h.activity_name
+            GROUP BY f.id
+        """
+        with self._lock:
+            stats = {'by_idea': dict.fromkeys((row[0] for row in self.conn.execute("SELECT DISTINCT name FROM ideas")), 0)}
+            counts = self.conn.execute(per_idea).fetchall()
+            stats['by_idea'].update((name, n) for _, name, n in counts)
+            for key, table in STATS_TABLES:
+                stats[key] = dict.fromkeys((row[0] for row in self.conn.execute(f"SELECT DISTINCT value FROM {table}")), 0)
+                stats[key].update(self.conn.execute(
+                    f"SELECT v.value, SUM(p.n) FROM ({per_idea}) p JOIN {table} v ON v.idea_id = p.idea_id GROUP BY v.value"))
+            stats['total'] = sum(n for _, _, n in counts)
+        return stats
+
+    # --- history (HistoryJournal interface) ---
+
+    def load(self) -> List[Dict]:
+        with self._lock:
+            return [{"activity_name": name, "date": date, "cost_per_person": cost}
+                    for name, date, cost in self.conn.execute(
+                        "SELECT activity_name, date, cost_per_person FROM history ORDER BY id")]
+
+    def append(self, entry: Dict, history: Optional[List[Dict]] = None):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT INTO history (activity_name, date, cost_per_person) VALUES (?, ?, ?)",
+                              (entry["activity_name"], entry.get("date"), entry.get("cost_per_person")))
+
+    def clear(self, n: Optional[int], history: Optional[List[Dict]] = None):
+        """Deletes the last n entries (all if n is None); n must be positive, as in DateHistory.clear."""
+        if n is not None and n <= 0:
+            raise ValueError(f"n must be a positive number of entries (or None for all), got {n}.")
+        with self._lock, self.conn:
+            if n is None:
+                self.conn.execute("DELETE FROM history")
+            else:
+                self.conn.execute("DELETE FROM history WHERE id IN (SELECT id FROM history ORDER BY id DESC LIMIT ?)", (n,))
+
+    def compact(self, history: List[Dict]):
+        """Replaces the stored history with `history`."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM history")
+            self.conn.executemany("INSERT INTO history (activity_name, date, cost_per_person) VALUES (?, ?, ?)",
+                                  [(e["activity_name"], e.get("date"), e.get("cost_per_person")) for e in history])
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+def _read_history(path: str) -> List[Dict]:
+    if path.endswith(".jsonl"):
+        from history_journal import HistoryJournal
+        return HistoryJournal(path).load()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+def migrate(ideas_path: str, history_path: str, db_path: str, replace: bool = False) -> Tuple[int, int]:
+    """
+    Imports an ideas.json and a history.json (or .jsonl) into a SQLite database and returns
+    (ideas, history entries) imported. Refuses to touch a database that already holds data
+    unless replace=True.
+    """
+    from idea_loader import load_ideas
+    ideas = load_ideas(ideas_path, use_cache=False)
+    history = _read_history(history_path)
+    store = SQLiteStore(db_path)
+    try:
+        with store._lock:
+            existing = store.conn.execute("SELECT (SELECT COUNT(*) FROM ideas) + (SELECT COUNT(*) FROM history)").fetchone()[0]
+            if existing and not replace:
+                raise ValueError(f"{db_path} already contains data; pass replace=True (--replace) to overwrite it")
+            with store.conn:
+                store.conn.execute("DELETE FROM ideas")
+            store.add_ideas(ideas)
+            store.compact(history)
+    finally:
+        store.close()
+    return len(ideas), len(history)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Import ideas.json and history.json into a SQLite database.")
+    parser.add_argument("ideas", help="ideas JSON file")
+    parser.add_argument("history", help="history .json or .jsonl file")
+    parser.add_argument("database", help="SQLite database to create, e.g. dates.db")
+    parser.add_argument("--replace", action="store_true", help="overwrite a database that already has data")
+    args = parser.parse_args(argv)
+    n_ideas, n_history = migrate(args.ideas, args.history, args.database, args.replace)
+    print(f"Imported {n_ideas} ideas and {n_history} history entries into {args.database}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import random
+from collections import Counter
+from benchmarks.synthetic import make_ideas
+from date_idea import DateIdea
+from analytics import IdeaFrames, count_stats, stats_from_activity_counts
+
+def reference_stats(ideas, history):
+    """The counting loop of the original analyze(), which searched the catalog per entry."""
+    stats = {'by_idea': {idea.name: 0 for idea in ideas},
+             'by_liked_by': {value: 0 for idea in ideas for value in idea.liked_by},
+             'by_location': {value: 0 for idea in ideas for value in idea.location},
+             'by_tag': {value: 0 for idea in ideas for value in idea.tags}, 'total': 0}
+    for entry in history:
+        idea = next((i for i in ideas if i.name == entry['activity_name']), None)
+        if not idea:
+            continue
+        stats['by_idea'][idea.name] += 1
+        for attr, key in (('liked_by', 'by_liked_by'), ('location', 'by_location'), ('tags', 'by_tag')):
+            for value in getattr(idea, attr):
+                stats[key][value] += 1
+        stats['total'] += 1
+    return stats
+
+def make_history(ideas, n, seed=1):
+    rng = random.Random(seed)
+    names = [idea.name for idea in ideas] + ["Removed idea"]
+    return [{'activity_name': rng.choice(names)} for _ in range(n)]
+
+def test_counts_match_the_original_loop():
+    ideas = make_ideas(300)
+    # A duplicated name counts against its first idea only
+    ideas.append(DateIdea(ideas[0].name, ['bf'], ['nowhere'], ['dup'], 1, 2, 'total'))
+    history = make_history(ideas, 2000)
+    frames = IdeaFrames(ideas)
+    expected = reference_stats(ideas, history)
+    assert count_stats(frames, history) == expected
+    counts = Counter(entry['activity_name'] for entry in history)
+    assert stats_from_activity_counts(frames, counts) == expected
+
+def test_empty_history_and_catalog():
+    ideas = make_ideas(20)
+    assert count_stats(IdeaFrames(ideas), []) == reference_stats(ideas, [])
+    assert stats_from_activity_counts(IdeaFrames([]), {'x': 3}) == reference_stats([], [{'activity_name': 'x'}])
+
+def test_analyze_suggests_the_least_used_values(make_manager):
+    manager = make_manager(200)
+    for entry in make_history(list(manager.ideas)[:50], 300):
+        idea = manager.find_idea(entry['activity_name'])
+        if idea is not None:
+            manager.record_date(idea, date='2025-01-01', n_people=2)
+    stats = reference_stats(list(manager.ideas), list(manager.history.view()))
+    suggestions = {line.split(': ')[0]: set(line.split(': ')[1].split(', ')) for line in manager.analyze()}
+    for prefix, key in (('Try more activities at', 'by_location'), ('Try more activities liked by', 'by_liked_by'),
+                        ('Try more activities with tag', 'by_tag')):
+        lowest = min(stats[key].values())
+        assert suggestions[prefix] == {value for value, count in stats[key].items() if count == lowest}
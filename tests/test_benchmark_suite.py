@@ -0,0 +1,43 @@
+import json
+import pytest
+from benchmarks import suite
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr('sys.argv', ['suite', '--sizes', '200', '--only', 'sample', '--min-time', '0.01', *args])
+    suite.main()
+
+def test_baselines_are_kept_per_machine(tmp_path, monkeypatch):
+    path = str(tmp_path / 'baseline.json')
+    monkeypatch.setattr(suite, 'machine_key', lambda: 'reference')
+    run_main(monkeypatch, '--save-baseline', '--baseline', path, '--sizes', '100', '200')
+    monkeypatch.setattr(suite, 'machine_key', lambda: 'laptop')
+    run_main(monkeypatch, '--save-baseline', '--baseline', path, '--only', 'sample', 'analyze')
+    machines = json.load(open(path))['machines']
+    assert sorted(machines['reference']['results']) == ['sample@100', 'sample@200']
+    assert sorted(machines['laptop']['results']) == ['analyze@200', 'sample@200']
+    # Saving again merges over this machine's results only
+    run_main(monkeypatch, '--save-baseline', '--baseline', path, '--sizes', '100')
+    machines = json.load(open(path))['machines']
+    assert set(machines['laptop']['results']) == {'sample@100', 'analyze@200', 'sample@200'}
+    assert sorted(machines['reference']['results']) == ['sample@100', 'sample@200']
+    assert suite.load_baseline(path, 'laptop')['meta']['machine'] == 'laptop'
+    assert suite.load_baseline(path, 'elsewhere') is None
+
+def test_other_machines_baselines_are_not_compared(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / 'baseline.json')
+    monkeypatch.setattr(suite, 'machine_key', lambda: 'reference')
+    run_main(monkeypatch, '--save-baseline', '--baseline', path)
+    machines = json.load(open(path))
+    # A baseline a thousand times faster fails the run on the machine that recorded it...
+    machines['machines']['reference']['results']['sample@200']['median_s'] /= 1000
+    json.dump(machines, open(path, 'w'))
+    with pytest.raises(SystemExit) as failed:
+        run_main(monkeypatch, '--baseline', path)
+    assert failed.value.code == 1
+    # ...and is only reported against elsewhere
+    monkeypatch.setattr(suite, 'machine_key', lambda: 'laptop')
+    capsys.readouterr()
+    run_main(monkeypatch, '--baseline', path)
+    assert 'no results for this machine (laptop)' in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        run_main(monkeypatch, '--baseline', str(tmp_path / 'missing.json'))
@@ -0,0 +1,127 @@
+import os
+import threading
+from concurrent.futures import Future
+from charts import ChartCache, ChartRenderer, cached_render, chart_specs, export_charts
+from date_idea import DateIdea
+from date_stats import DateStats
+
+IDEAS = {
+    'Picnic': DateIdea('Picnic', ['bf', 'gf'], ['outside'], ['food', 'sun'], 400, 2, 'total'),
+    'Movie': DateIdea('Movie', ['gf'], ['home'], ['film'], 150, 4, 'per_person'),
+}
+
+def make_stats(entries):
+    stats = DateStats('unused', IDEAS.get)
+    stats.rebuild(entries)
+    return stats
+
+ENTRIES = [{'activity_name': 'Picnic', 'date': '2025-01-05', 'cost_per_person': 200.0},
+           {'activity_name': 'Movie', 'date': '2025-01-20', 'cost_per_person': 150.0},
+           {'activity_name': 'Movie', 'date': '2025-02-02', 'cost_per_person': 150.5}]
+
+def test_chart_specs():
+    specs = {name: (data, params) for name, data, params in chart_specs(make_stats(ENTRIES))}
+    assert list(specs) == ['activity_counts', 'liked_by_venn', 'tag_counts', 'monthly_spending']
+    assert specs['activity_counts'][0] == [['Movie', 2], ['Picnic', 1]]
+    assert specs['liked_by_venn'][0] == [0, 2, 1]
+    assert specs['monthly_spending'][0] == [['2025-01', 350.0], ['2025-02', 150.5]]
+    assert not specs['monthly_spending'][1]['integer_ticks']
+    assert chart_specs(make_stats([])) == []
+
+def test_cache_key_follows_the_inputs():
+    first, second = chart_specs(make_stats(ENTRIES[:2])), chart_specs(make_stats(ENTRIES[:2]))
+    assert [ChartCache.key(spec) for spec in first] == [ChartCache.key(spec) for spec in second]
+    changed = chart_specs(make_stats(ENTRIES))
+    assert ChartCache.key(first[0]) != ChartCache.key(changed[0])
+
+def image(n):
+    return 1, n // 4 or 1, b'x' * n
+
+def test_cache_evicts_by_count_and_size():
+    cache = ChartCache(max_entries=3, max_bytes=10)
+    for key in 'abc':
+        cache.put(key, image(2))
+    cache.get('a')
+    cache.put('d', image(2))
+    assert cache.get('b') is None and cache.get('a') == image(2)
+    cache.put('e', image(8))
+    assert cache.size <= 10 and cache.get('e') is not None
+    cache.put('f', image(11))
+    assert cache.get('f') is None and cache.size == 0
+
+def test_cached_render_renders_once():
+    cache = ChartCache()
+    spec = chart_specs(make_stats(ENTRIES))[0]
+    rendered = cached_render(spec, cache)
+    assert cache.misses == 1 and cache.size == len(rendered[2])
+    assert cached_render(spec, cache) is rendered and cache.hits == 1
+
+def test_charts_render_to_rgba_pixels():
+    for spec in chart_specs(make_stats(ENTRIES)):
+        width, height, rgba = cached_render(spec)
+        # Straight from the canvas: the full figure at its size in inches times the dpi
+        assert (width, height) == tuple(round(inches * 100) for inches in spec[2]['figsize'])
+        assert len(rgba) == width * height * 4
+        assert rgba[3::4] == b'\xff' * (width * height) and len(set(rgba[0::4])) > 1
+
+def test_export_writes_pngs(tmp_path):
+    paths = export_charts(make_stats(ENTRIES), str(tmp_path / 'charts'))
+    assert [os.path.basename(path) for path in paths] == [f'{name}.png' for name, _, _ in chart_specs(make_stats(ENTRIES))]
+    for path in paths:
+        with open(path, 'rb') as f:
+            assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+
+class FakeClock:
+    """Stands in for Kivy's Clock: callbacks queue up until the "main thread" runs them."""
+    def __init__(self):
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def schedule_once(self, callback):
+        with self.lock:
+            self.callbacks.append(callback)
+
+    def tick(self):
+        with self.lock:
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback(0)
+
+def failing_render(spec):
+    if spec[0] == 'bad':
+        raise ValueError('no data')
+    return spec[0].upper()
+
+def test_renderer_delivers_results_and_errors_on_the_clock():
+    clock = FakeClock()
+    renderer = ChartRenderer(failing_render, clock.schedule_once, workers=2)
+    done, errors = {}, {}
+    renderer.start([('good', [], {}), ('bad', [], {})], done.__setitem__, errors.__setitem__)
+    for future in list(renderer._pending):
+        future.exception(timeout=5)
+    # Nothing reaches the screen before the main thread runs the callbacks
+    assert not done and not errors
+    clock.tick()
+    assert done == {0: 'GOOD'} and list(errors) == [1] and str(errors[1]) == 'no data'
+    renderer.close()
+
+def test_failed_and_stale_renders():
+    clock = FakeClock()
+    renderer = ChartRenderer(failing_render, clock.schedule_once)
+    done, errors = [], []
+    failed = Future()
+    failed.set_exception(RuntimeError('boom'))
+    renderer._rendered(renderer._generation, 3, done.append, lambda index, error: errors.append((index, error)), failed)
+    clock.tick()
+    assert not done and errors == [(3, failed.exception())]
+    # Results of a batch cancelled before they were delivered are dropped
+    finished = Future()
+    finished.set_result('chart')
+    renderer._rendered(renderer._generation, 0, done.append, errors.append, finished)
+    renderer.cancel()
+    clock.tick()
+    cancelled = Future()
+    cancelled.cancel()
+    renderer._rendered(renderer._generation, 0, done.append, errors.append, cancelled)
+    assert not clock.callbacks and not done and len(errors) == 1
+    renderer.close()
@@ -0,0 +1,146 @@
+import pytest
+from date_history import DateHistory
+from date_stats import DateStats
+
+def record(history, n, start=0):
+    for i in range(start, start + n):
+        history.add_entry(f"Idea {i % 7}", f"2025-{i % 12 + 1:02d}-01", float(i))
+
+def rebuilt(history):
+    stats = DateStats("unused")
+    stats.rebuild(list(history.view()))
+    return stats
+
+def assert_same(stats, expected):
+    assert stats.entries == expected.entries
+    assert stats.by_activity == expected.by_activity
+    assert stats.month_entries == expected.month_entries
+    assert stats.month_spending == pytest.approx(expected.month_spending)
+    assert stats.last_entry == expected.last_entry
+
+@pytest.fixture(params=["history.json", "history.jsonl"])
+def path(request, tmp_path):
+    return str(tmp_path / request.param)
+
+def test_stats_follow_appends_and_clears(path):
+    history = DateHistory(path)
+    history.stats_every = 5
+    record(history, 12)
+    assert_same(history.stats, rebuilt(history))
+    history.clear(3)
+    assert len(history.view()) == 9
+    assert_same(history.stats, rebuilt(history))
+    history.clear()
+    assert len(history.view()) == 0
+    assert history.stats.entries == 0
+
+def test_published_stats_do_not_change(path):
+    history = DateHistory(path)
+    record(history, 3)
+    view = history.view()
+    stats = view.stats
+    record(history, 4, start=3)
+    history.clear(2)
+    assert view.stats is stats
+    assert stats.entries == 3 and len(view) == 3
+
+def test_appends_do_not_save_the_stats_file(path, monkeypatch):
+    history = DateHistory(path)
+    history.stats_every = 10
+    saves = []
+    monkeypatch.setattr(DateStats, "save", lambda self: saves.append(self.entries))
+    record(history, 25)
+    assert saves == [10, 20]
+
+def test_stats_file_behind_the_history_is_caught_up(path):
+    history = DateHistory(path)
+    history.stats_every = 4
+    record(history, 10)
+    # The stats file covers 8 entries; the last 2 are only in the history
+    if history.journal:
+        history.journal.close()
+    reloaded = DateHistory(path)
+    assert_same(reloaded.stats, rebuilt(reloaded))
+    reloaded.close()
+    reloaded = DateHistory(path)
+    assert reloaded.stats.entries == 10
+
+def open_history(backend, tmp_path):
+    if backend == "sqlite":
+        from sqlite_store import SQLiteStore
+        path = str(tmp_path / "ideas.db")
+        return DateHistory(path, journal=SQLiteStore(path))
+    return DateHistory(str(tmp_path / backend))
+
+def close_history(history):
+    history.close()
+    if history.journal is not None:
+        history.journal.close()
+
+@pytest.mark.parametrize("backend", ["history.json", "history.jsonl", "sqlite"])
+def test_clear_semantics(backend, tmp_path):
+    history = open_history(backend, tmp_path)
+    record(history, 10)
+    for n in (0, -1):
+        with pytest.raises(ValueError):
+            history.clear(n)
+        assert len(history.view()) == 10
+    history.clear(3)
+    assert [e["activity_name"] for e in history.view()] == [f"Idea {i % 7}" for i in range(7)]
+    # More than there are clears everything
+    history.clear(100)
+    assert len(history.view()) == 0
+    record(history, 4)
+    history.clear(1)
+    close_history(history)
+    reloaded = open_history(backend, tmp_path)
+    assert [e["cost_per_person"] for e in reloaded.view()] == [0.0, 1.0, 2.0]
+    assert reloaded.stats.entries == 3
+    reloaded.clear()
+    assert len(reloaded.view()) == 0
+    close_history(reloaded)
+
+def test_queries_match_a_scan(path):
+    import datetime
+    import random
+    rng = random.Random(3)
+    history = DateHistory(path)
+    views = []
+    for step in range(400):
+        if rng.random() < 0.05 and len(history.view()):
+            history.clear(rng.randint(1, 10))
+        else:
+            date = rng.choice([None, f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"])
+            history.add_entry(f"Idea {rng.randrange(8)}", date, float(step))
+            if date is None:
+                # add_entry fills in today's date
+                assert history.view()[-1]["date"] == datetime.date.today().isoformat()
+        if step % 40 == 0:
+            views.append((history.view(), list(history.view())))
+    views.append((history.view(), list(history.view())))
+    # Older views answer for their own entries, even after later appends and clears
+    for view, entries in views:
+        assert list(view) == entries
+        assert view.page(0, 7) == entries[::-1][:7]
+        assert view.page(5, 10, newest_first=False) == entries[5:15]
+        assert view.page(len(entries) + 1) == []
+        assert view.by_activity("Idea 3") == [e for e in entries if e["activity_name"] == "Idea 3"]
+        for start, end in ((None, None), ("2025-03-01", "2025-06-30"), ("2025-07-15", None), (None, datetime.date(2025, 2, 1))):
+            expected = sorted(((e["date"], i) for i, e in enumerate(entries)
+                               if (start is None or e["date"] >= str(start)) and (end is None or e["date"] <= str(end))))
+            assert list(view.iter_range(start, end)) == [entries[i] for _, i in expected]
+    with pytest.raises(ValueError):
+        history.page(-1)
+
+def test_range_bounds_may_be_dates_or_datetimes(path):
+    import datetime
+    history = DateHistory(path)
+    for day in (1, 2, 2, 3):
+        history.add_entry(f"Idea {day}", f"2025-03-{day:02d}", 10.0)
+    def days(start, end):
+        return [entry["date"] for entry in history.iter_range(start, end)]
+    assert days(datetime.date(2025, 3, 2), datetime.date(2025, 3, 2)) == ["2025-03-02"] * 2
+    # A datetime covers its whole day, whatever the time
+    assert days(datetime.datetime(2025, 3, 2, 23, 59), datetime.datetime(2025, 3, 2, 0, 0)) == ["2025-03-02"] * 2
+    assert days(None, datetime.datetime(2025, 3, 1, 12, 0)) == ["2025-03-01"]
+    assert days(datetime.datetime(2025, 3, 3, 8, 0), None) == ["2025-03-03"]
@@ -0,0 +1,113 @@
+import contextlib
+import dataclasses
+import json
+import random
+import pytest
+from benchmarks.synthetic import make_history, make_ideas
+from date_manager import DateIdeaManager
+from date_stats import DateStats
+from idea_loader import save_ideas
+
+def first_by_name(ideas):
+    found = {}
+    for idea in ideas:
+        found.setdefault(idea.name, idea)
+    return found
+
+def assert_consistent(manager):
+    snapshot = manager.snapshot()
+    expected = first_by_name(snapshot.ideas)
+    for name, idea in expected.items():
+        assert snapshot.find_idea(name) == idea
+    assert snapshot.find_idea("no such idea") is None
+    stats = DateStats("unused", expected.get)
+    stats.rebuild(list(snapshot.history))
+    for attr in ('matched', 'by_liked_by', 'by_location', 'by_tag', 'liked_by_regions'):
+        assert getattr(snapshot.stats, attr) == getattr(stats, attr), attr
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_edits_keep_lookups_and_stats_in_sync(make_manager, compact):
+    manager = make_manager(200, compact=compact)
+    rng = random.Random(5)
+    for idea in rng.sample(list(manager.ideas), 40):
+        manager.record_date(idea, date="2025-03-01", n_people=2)
+    manager.find_idea("Idea 0")
+    names = [f"Idea {i}" for i in range(20)] + ["Duplicate", "Renamed"]
+    for step in range(300):
+        batch = rng.random() < 0.2
+        with manager.edit_batch() if batch else contextlib.nullcontext():
+            for _ in range(rng.randint(2, 5) if batch else 1):
+                position = rng.randrange(len(manager.ideas))
+                op = rng.random()
+                template = manager.ideas[rng.randrange(len(manager.ideas))]
+                idea = dataclasses.replace(template, name=rng.choice(names))
+                if op < 0.3:
+                    manager.add_idea(idea)
+                elif op < 0.6:
+                    manager.delete_idea(position)
+                else:
+                    manager.update_idea(position, idea)
+        assert_consistent(manager)
+
+def test_edit_batch_publishes_once(make_manager):
+    manager = make_manager(50)
+    before = manager.snapshot()
+    template = manager.ideas[0]
+    with manager.edit_batch():
+        manager.update_idea(0, dataclasses.replace(template, name="First"))
+        manager.add_idea(dataclasses.replace(template, name="Added"))
+        with manager.edit_batch():
+            manager.delete_idea(1)
+        # Readers keep the catalog from before the batch
+        assert manager.snapshot() is before
+        assert manager.ideas[0].name == "First"
+    after = manager.snapshot()
+    assert after.version == before.version + 1
+    assert after.find_idea("Added") is not None and after.find_idea("First") is not None
+    assert before.find_idea("Added") is None and len(before.ideas) == 50
+    assert manager._catalog_edits(before.version, after.version) == {0, 1, 50}
+
+def test_edit_batch_publishes_edits_made_before_an_error(make_manager):
+    manager = make_manager(50)
+    version = manager.snapshot().version
+    with pytest.raises(IndexError):
+        with manager.edit_batch():
+            manager.update_idea(0, dataclasses.replace(manager.ideas[0], name="Kept"))
+            manager.update_idea(500, manager.ideas[0])
+    assert manager.snapshot().version == version + 1
+    assert manager.find_idea("Kept") is not None
+
+def test_sample_ideas(make_manager):
+    manager = make_manager(500)
+    filters = dict(location='home', max_cost=500, n_people=2)
+    matching = {idea.name for idea in manager.ideas if 'home' in idea.location and idea.max_people >= 2
+                and (idea.cost / 2 if idea.cost_type == 'total' else idea.cost) <= 500}
+    drawn = manager.sample_ideas(20, **filters, seed=3)
+    assert len(drawn) == 20 and len({idea.name for idea in drawn}) == 20
+    assert {idea.name for idea in drawn} <= matching
+    assert manager.sample_ideas(20, **filters, seed=3) == drawn
+    # Without replacement at most every match comes back once; with it, n draws
+    assert len(manager.sample_ideas(10 ** 6, **filters)) == len(matching)
+    assert len(manager.sample_ideas(3 * len(matching), **filters, replace=True)) == 3 * len(matching)
+    assert manager.sample_ideas(5, location='nowhere', max_cost=500, n_people=2) == []
+    with pytest.raises(ValueError):
+        manager.sample_ideas(-1, **filters)
+    with pytest.raises(ValueError):
+        manager.sample_ideas(5, n_people=2)
+
+def test_default_history_is_a_journal_importing_history_json(tmp_path, monkeypatch):
+    ideas = make_ideas(50)
+    history = make_history(ideas, 20)
+    save_ideas(str(tmp_path / 'ideas.json'), ideas)
+    (tmp_path / 'history.json').write_text(json.dumps(history))
+    monkeypatch.chdir(tmp_path)
+    manager = DateIdeaManager('ideas.json')
+    assert list(manager.history.view()) == history
+    manager.record_date(ideas[0], date='2030-01-01', n_people=2)
+    manager.history.close()
+    # The old file is left alone; the date is one journal line
+    assert json.loads((tmp_path / 'history.json').read_text()) == history
+    assert len((tmp_path / 'history.jsonl').read_text().splitlines()) == 1
+    manager = DateIdeaManager('ideas.json')
+    assert len(manager.history.view()) == 21
+    manager.history.close()
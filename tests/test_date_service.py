@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+import pytest
+import date_service
+from date_service import DateService, ServiceClient
+
+@pytest.fixture
+def service(make_manager):
+    manager = make_manager(300)
+    service = DateService(manager)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        service.port = loop.run_until_complete(service.start(port=0))
+        started.set()
+        loop.run_forever()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait(5)
+    yield service
+    asyncio.run_coroutine_threadsafe(service.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+def test_sample_record_and_history(service):
+    client = ServiceClient(port=service.port)
+    idea = client.sample_idea(max_cost=500, n_people=2)
+    assert idea is not None and idea.max_people >= 2
+    assert client.history_page(limit=5) == []
+    client.record_date(idea, date="2025-07-01", n_people=2)
+    assert [entry["activity_name"] for entry in client.history_page(limit=5)] == [idea.name]
+    client.close()
+
+def test_seeded_reads_are_cached_until_a_write(service):
+    client = ServiceClient(port=service.port)
+    first = client.sample_ideas(3, max_cost=500, n_people=2, seed=1)
+    assert client.sample_ideas(3, max_cost=500, n_people=2, seed=1) == first
+    assert service.hits == 1
+    client.record_date(first[0], n_people=2)
+    assert not service.cache
+    client.close()
+
+def test_only_seeds_the_op_uses_are_cached(service):
+    client = ServiceClient(port=service.port)
+    params = dict(max_cost=2000, n_people=1, seed=1)
+    # sample ignores the seed, so every call must be a fresh draw
+    names = {client._call('GET', '/sample', params)['name'] for _ in range(20)}
+    assert len(names) > 1 and service.hits == 0 and not service.cache
+    plan = dict(dates=2, budget=1000, n_people=2, novelty=0, timeout=0.2)
+    client._call('GET', '/plan', plan)
+    assert not service.cache
+    client._call('GET', '/plan', dict(plan, seed=3))
+    client._call('GET', '/plan', dict(plan, seed=3))
+    assert service.hits == 1
+    client.close()
+
+def test_bad_parameters_are_a_400(service):
+    client = ServiceClient(port=service.port)
+    with pytest.raises(ValueError, match="n_people"):
+        client._call("GET", "/sample", {"n_people": "two", "max_cost": 5})
+    assert client.conn.sock is not None
+    client.close()
+
+def test_unexpected_errors_are_a_500(service, monkeypatch):
+    monkeypatch.setattr(service.manager, "analyze", lambda: 1 / 0)
+    client = ServiceClient(port=service.port)
+    with pytest.raises(ValueError, match="ZeroDivisionError"):
+        client.analyze()
+    # The connection is still answered and usable
+    assert client.history_page(limit=1) == []
+    client.close()
+
+def test_slow_reads_do_not_block_other_clients(service, monkeypatch):
+    handle = date_service.handle
+
+    def slow_handle(manager, request):
+        if request["op"] == "analyze":
+            time.sleep(1.0)
+        return handle(manager, request)
+    monkeypatch.setattr(date_service, "handle", slow_handle)
+    slow = threading.Thread(target=lambda: ServiceClient(port=service.port).analyze())
+    slow.start()
+    time.sleep(0.1)
+    started = time.perf_counter()
+    ServiceClient(port=service.port).sample_idea(max_cost=500, n_people=2)
+    assert time.perf_counter() - started < 0.5
+    slow.join()
@@ -0,0 +1,51 @@
+import io
+import json
+import pytest
+from datepicker import handle, main, stream
+
+def test_handle_runs_each_op(make_manager):
+    manager = make_manager(200)
+    filters = {'n_people': 2, 'max_cost': 500, 'location': 'home'}
+    idea = handle(manager, {'op': 'sample', **filters})
+    assert 'home' in idea['location'] and idea['max_people'] >= 2
+    ideas = handle(manager, {'op': 'batch-sample', 'n': 5, 'seed': 1, **filters})
+    assert ideas == handle(manager, {'op': 'batch-sample', 'n': 5, 'seed': 1, **filters})
+    assert len({idea['name'] for idea in ideas}) == len(ideas)
+    handle(manager, {'op': 'record', 'name': idea['name'], 'n_people': 2, 'date': '2025-03-01'})
+    handle(manager, {'op': 'record', 'name': ideas[0]['name'], 'n_people': 2, 'date': '2025-04-01'})
+    assert [e['date'] for e in handle(manager, {'op': 'history'})] == ['2025-04-01', '2025-03-01']
+    assert [e['date'] for e in handle(manager, {'op': 'history', 'start': '2025-03-15'})] == ['2025-04-01']
+    assert len(handle(manager, {'op': 'history', 'activity': idea['name']})) >= 1
+    assert isinstance(handle(manager, {'op': 'analyze'}), list)
+    similar = handle(manager, {'op': 'similar', 'name': ideas[1]['name'], 'k': 3})
+    assert len(similar) == 3 and ideas[1]['name'] not in [s['name'] for s in similar]
+    plan = handle(manager, {'op': 'plan', 'dates': 3, 'budget': 1000, 'n_people': 2, 'timeout': 0.5})
+    assert plan['total_cost'] <= 1000 and len(plan['ideas']) <= 3
+    json.dumps(plan)
+
+@pytest.mark.parametrize("request_", [
+    {'op': 'launch'},
+    {'op': 'record', 'name': 'No such idea', 'n_people': 2},
+    {'op': 'similar'},
+])
+def test_handle_rejects_bad_requests(make_manager, request_):
+    with pytest.raises(ValueError):
+        handle(make_manager(50), request_)
+
+def test_stream_answers_every_line(make_manager):
+    manager = make_manager(100)
+    lines = ['{"op": "sample", "n_people": 2, "max_cost": 500, "id": 7}\n', '\n', 'not json\n', '[1]\n',
+             '{"op": "launch", "id": "x"}\n', '{"op": "analyze"}\n']
+    out = io.StringIO()
+    assert stream(manager, lines, out) == 3
+    responses = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [response['ok'] for response in responses] == [True, False, False, False, True]
+    assert responses[0]['id'] == 7 and responses[3]['id'] == 'x' and 'launch' in responses[3]['error']
+
+def test_main_prints_json(make_manager, tmp_path, capsys):
+    make_manager(100)
+    args = ['--ideas', str(tmp_path / 'ideas.json'), '--history', str(tmp_path / 'cli.jsonl')]
+    assert main(args + ['batch-sample', '-n', '3', '--n-people', '2', '--max-cost', '500', '--seed', '2']) == 0
+    assert len(json.loads(capsys.readouterr().out)) == 3
+    assert main(args + ['record', 'No such idea', '--n-people', '2']) == 1
+    assert 'unknown idea' in capsys.readouterr().err
@@ -0,0 +1,87 @@
+import dataclasses
+import random
+import pytest
+from benchmarks.synthetic import make_ideas
+from filter_cache import FilterCache
+from idea_index import IdeaIndex
+
+FILTERS = [(liked_by, location, max_cost, n_people) for liked_by in (None, 'bf', 'gf') for location in (None, 'home')
+           for max_cost in (0, 150, 500, 2000) for n_people in (1, 2, 4)]
+
+def test_cached_sets_match_the_index():
+    index = IdeaIndex(make_ideas(300))
+    cache = FilterCache(index, size=len(FILTERS))
+    for _ in range(2):
+        for liked_by, location, max_cost, n_people in FILTERS:
+            entry = cache.get(liked_by, location, max_cost, n_people)
+            mask = index.candidates_mask(liked_by=liked_by, location=location, max_cost=max_cost, n_people=n_people)
+            assert entry.mask == mask and entry.count == mask.bit_count()
+            assert entry.slots(index) == index.slots_of(mask)
+    assert cache.misses <= len(FILTERS) and cache.hits == 2 * len(FILTERS) - cache.misses
+
+def test_budgets_with_the_same_ideas_share_an_entry():
+    index = IdeaIndex(make_ideas(300))
+    cache = FilterCache(index)
+    floor = index.cost_floor(500, 2)
+    assert cache.get(None, 'home', floor, 2) is cache.get(None, 'home', 500, 2)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+def test_least_recently_used_sets_are_evicted():
+    index = IdeaIndex(make_ideas(100))
+    cache = FilterCache(index, size=2)
+    first = cache.get('bf', None, 10 ** 6, 1)
+    cache.get('gf', None, 10 ** 6, 1)
+    assert cache.get('bf', None, 10 ** 6, 1) is first
+    cache.get(None, 'home', 10 ** 6, 1)
+    assert len(cache) == 2 and cache.evictions == 1
+    # 'gf' was used least recently, so it went
+    assert cache.get('bf', None, 10 ** 6, 1) is first
+    cache.get('gf', None, 10 ** 6, 1)
+    assert cache.misses == 4
+
+def test_choice_draws_only_matching_slots():
+    index = IdeaIndex(make_ideas(400))
+    cache = FilterCache(index)
+    rng = random.Random(1)
+    # A large set uses rejection sampling, a small one the slot list
+    for filters in ((None, None, 10 ** 6, 1), ('gf', 'home', 150, 4)):
+        entry = cache.get(*filters)
+        members = set(entry.slots(index))
+        assert members and all(entry.choice(index, rng) in members for _ in range(200))
+    assert cache.get(None, None, -1, 1).choice(index, rng) is None
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_manager_cache_follows_edits(make_manager, compact):
+    manager = make_manager(300, compact=compact)
+    rng = random.Random(2)
+
+    def check():
+        snapshot = manager.snapshot()
+        for liked_by, location, max_cost, n_people in rng.sample(FILTERS, 12):
+            cached = manager._candidates(snapshot, liked_by, location, max_cost, n_people)
+            mask = snapshot.index.candidates_mask(liked_by=liked_by, location=location, max_cost=max_cost, n_people=n_people)
+            assert cached.mask == mask
+
+    check()
+    spare = make_ideas(400)[300:]
+    for step in range(60):
+        action = rng.random()
+        if action < 0.3:
+            manager.add_idea(spare[step])
+        elif action < 0.6:
+            manager.delete_idea(rng.randrange(len(manager.ideas)))
+        elif action < 0.8:
+            position = rng.randrange(len(manager.ideas))
+            manager.update_idea(position, dataclasses.replace(manager.ideas[position], cost=rng.choice([0, 100, 900]),
+                                                              location=[rng.choice(['home', 'outside'])]))
+        else:
+            with manager.edit_batch():
+                for position in rng.sample(range(len(manager.ideas)), 5):
+                    manager.update_idea(position, dataclasses.replace(manager.ideas[position], max_people=rng.randint(1, 4)))
+        check()
+    assert manager.filter_cache_stats()['invalidations'] > 0
+    # Replacing the whole catalog drops every cached set
+    before = manager.filter_cache_stats()
+    manager.ideas = make_ideas(50)
+    check()
+    assert manager.filter_cache_stats()['invalidations'] == before['invalidations'] + before['entries']
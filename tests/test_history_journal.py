@@ -0,0 +1,93 @@
+import json
+import pytest
+from history_journal import HistoryJournal, JournalError
+
+def entry(i):
+    return {"activity_name": f"Idea {i}", "date": "2025-01-01", "cost_per_person": i}
+
+def write(journal, n):
+    history = []
+    for i in range(n):
+        history.append(entry(i))
+        journal.append(entry(i), history)
+    return history
+
+def test_append_and_clear_replay(tmp_path):
+    journal = HistoryJournal(str(tmp_path / "h.jsonl"), fsync=False)
+    history = write(journal, 5)
+    del history[-2:]
+    journal.clear(2, history)
+    journal.close()
+    assert HistoryJournal(journal.file_path).load() == history
+
+def test_compaction_truncates_journal(tmp_path):
+    journal = HistoryJournal(str(tmp_path / "h.jsonl"), compact_every=3, fsync=False)
+    history = write(journal, 7)
+    journal.close()
+    with open(journal.file_path) as f:
+        assert len(f.readlines()) == 1
+    reloaded = HistoryJournal(journal.file_path)
+    assert reloaded.load() == history
+    assert reloaded.seq == 7
+
+def test_records_covered_by_snapshot_are_not_replayed(tmp_path):
+    journal = HistoryJournal(str(tmp_path / "h.jsonl"), fsync=False)
+    history = write(journal, 3)
+    journal.close()
+    with open(journal.file_path) as f:
+        lines = f.read()
+    journal.compact(history)
+    # A crash after the snapshot rename but before the truncate leaves the old records behind
+    with open(journal.file_path, "w") as f:
+        f.write(lines)
+    assert HistoryJournal(journal.file_path).load() == history
+
+def test_torn_last_line_is_dropped(tmp_path):
+    journal = HistoryJournal(str(tmp_path / "h.jsonl"), fsync=False)
+    history = write(journal, 3)
+    journal.close()
+    size = (tmp_path / "h.jsonl").stat().st_size
+    with open(journal.file_path, "a") as f:
+        f.write('{"op": "add", "entry": {"activity_na')
+    reloaded = HistoryJournal(journal.file_path)
+    assert reloaded.load() == history
+    assert (tmp_path / "h.jsonl").stat().st_size == size
+    # The next append continues the sequence after the valid records
+    reloaded.append(entry(3), history + [entry(3)])
+    reloaded.close()
+    assert HistoryJournal(journal.file_path).load() == history + [entry(3)]
+
+def test_last_record_without_its_newline_is_kept(tmp_path):
+    journal = HistoryJournal(str(tmp_path / "h.jsonl"), fsync=False)
+    history = write(journal, 3)
+    journal.close()
+    with open(journal.file_path, "rb+") as f:
+        f.truncate(f.seek(0, 2) - 1)
+    reloaded = HistoryJournal(journal.file_path)
+    assert reloaded.load() == history
+    history.append(entry(3))
+    reloaded.append(entry(3), history)
+    reloaded.close()
+    assert HistoryJournal(journal.file_path).load() == history
+
+def test_corrupt_line_before_the_end_raises(tmp_path):
+    journal = HistoryJournal(str(tmp_path / "h.jsonl"), fsync=False)
+    write(journal, 3)
+    journal.close()
+    with open(journal.file_path) as f:
+        lines = f.readlines()
+    lines[1] = "not json\n"
+    with open(journal.file_path, "w") as f:
+        f.writelines(lines)
+    with pytest.raises(JournalError) as error:
+        HistoryJournal(journal.file_path).load()
+    assert error.value.line == 2
+
+def test_legacy_history_is_imported(tmp_path):
+    history = [entry(i) for i in range(4)]
+    legacy = tmp_path / "h.json"
+    legacy.write_text(json.dumps(history))
+    journal = HistoryJournal(str(tmp_path / "h.jsonl"), legacy_path=str(legacy))
+    assert journal.load() == history
+    journal.close()
+    assert HistoryJournal(journal.file_path).load() == history
@@ -0,0 +1,71 @@
+import dataclasses
+import random
+import pytest
+from benchmarks.synthetic import make_ideas
+from idea_catalog import CompactCatalog
+from idea_index import IdeaIndex
+
+def test_round_trip():
+    ideas = make_ideas(500)
+    ideas.append(dataclasses.replace(ideas[0], name="Fractional", cost=12.5, tags=[]))
+    catalog = CompactCatalog(ideas)
+    assert len(catalog) == len(ideas)
+    assert list(catalog) == ideas
+    assert catalog[3] == ideas[3] and catalog[-1] == ideas[-1]
+    assert catalog[10:13] == ideas[10:13]
+    assert isinstance(catalog[0].cost, int) and catalog[-1].cost == 12.5
+
+def test_edits_match_a_list():
+    rng = random.Random(1)
+    pool = make_ideas(400)
+    expected = list(pool[:200])
+    catalog = CompactCatalog(expected)
+    for step in range(600):
+        idea = dataclasses.replace(rng.choice(pool), tags=rng.sample(['a', 'b', 'c', 'd'], rng.randint(0, 3)))
+        op = rng.random()
+        if op < 0.35:
+            catalog.append(idea)
+            expected.append(idea)
+        elif op < 0.6 and expected:
+            position = rng.randrange(len(expected))
+            del catalog[position]
+            del expected[position]
+        elif op < 0.7:
+            position = rng.randrange(len(expected) + 1)
+            catalog.insert(position, idea)
+            expected.insert(position, idea)
+        elif expected:
+            position = rng.randrange(len(expected))
+            catalog[position] = idea
+            expected[position] = idea
+    assert list(catalog) == expected
+    # Rows stay stable and free rows read as None, so an index over the rows agrees
+    rows = catalog.rows
+    assert sum(row is not None for row in rows) == len(expected)
+    assert [rows[catalog.row_at(position)] for position in range(len(catalog))] == expected
+    assert all(catalog.position_of(catalog.row_at(position)) == position for position in range(len(catalog)))
+    assert len(IdeaIndex(rows=rows)) == len(expected)
+
+def test_copy_is_independent():
+    ideas = make_ideas(100)
+    catalog = CompactCatalog(ideas)
+    clone = catalog.copy()
+    clone[0] = ideas[1]
+    del clone[5]
+    clone.append(ideas[2])
+    assert list(catalog) == ideas
+    assert clone[0] == ideas[1] and len(clone) == 100
+
+def test_slices_cannot_be_assigned():
+    catalog = CompactCatalog(make_ideas(10))
+    with pytest.raises(TypeError):
+        catalog[0:2] = make_ideas(2)
+    with pytest.raises(TypeError):
+        del catalog[0:2]
+
+def test_compact_manager_samples_like_a_list_manager(make_manager):
+    plain = make_manager(300, history="plain.jsonl")
+    compact = make_manager(300, history="compact.jsonl", compact=True)
+    for filters in (dict(location='home', max_cost=500, n_people=2), dict(liked_by='bf', max_cost=100, n_people=1)):
+        assert (sorted(idea.name for idea in plain.sample_ideas(1000, **filters))
+                == sorted(idea.name for idea in compact.sample_ideas(1000, **filters)))
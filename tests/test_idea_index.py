@@ -0,0 +1,103 @@
+import random
+from collections import Counter
+import pytest
+from benchmarks.synthetic import make_ideas
+from date_manager import cost_per_person
+from idea_index import IdeaIndex
+
+def brute_force(slots, liked_by=None, location=None, max_cost=None, n_people=None):
+    """The filters of the original list-scanning sample_idea, as a set of slots."""
+    return {slot for slot, idea in enumerate(slots) if idea is not None
+            and (not liked_by or liked_by in idea.liked_by)
+            and (not location or location in idea.location)
+            and (n_people is None or n_people <= idea.max_people)
+            and (max_cost is None or cost_per_person(idea, n_people) <= max_cost)}
+
+def random_filters(rng):
+    return dict(liked_by=rng.choice([None, 'bf', 'gf']),
+                location=rng.choice([None, 'home', 'outside', 'nowhere']),
+                max_cost=rng.choice([None, 0, 150, 500, 1500, 10000]),
+                n_people=rng.choice([None, 0, 1, 2, 3, 5, 12, -2]))
+
+def assert_matches(index, rng, rounds=200):
+    for _ in range(rounds):
+        filters = random_filters(rng)
+        assert set(index.slots_of(index.candidates_mask(**filters))) == brute_force(index.slots, **filters), filters
+
+def test_candidates_match_brute_force():
+    index = IdeaIndex(make_ideas(2000))
+    assert len(index) == 2000
+    assert_matches(index, random.Random(1))
+
+def test_candidates_match_after_edits():
+    rng = random.Random(2)
+    ideas = make_ideas(1500)
+    index = IdeaIndex(ideas[:1000])
+    for step, idea in enumerate(ideas[1000:]):
+        op = rng.random()
+        live = [slot for slot, existing in enumerate(index.slots) if existing is not None]
+        if op < 0.4:
+            index.add(idea)
+        elif op < 0.7:
+            index.remove(rng.choice(live))
+        else:
+            index.replace(rng.choice(live), idea)
+        if step % 100 == 0:
+            assert_matches(index, rng, rounds=30)
+    assert len(index) == sum(idea is not None for idea in index.slots)
+    assert_matches(index, rng)
+
+def test_copy_is_independent():
+    ideas = make_ideas(300)
+    index = IdeaIndex(ideas[:200])
+    clone = index.copy()
+    for idea in ideas[200:]:
+        clone.add(idea)
+    clone.remove(0)
+    assert len(index) == 200 and len(clone) == 299
+    assert_matches(index, random.Random(3), rounds=50)
+    assert_matches(clone, random.Random(3), rounds=50)
+
+def test_cost_floor_selects_the_same_ideas():
+    index = IdeaIndex(make_ideas(1000))
+    for max_cost in (0, 99, 100, 250.5, 700, 1e9):
+        for n_people in (1, 2, 4):
+            floor = index.cost_floor(max_cost, n_people)
+            assert floor <= max_cost
+            assert (index.candidates_mask(max_cost=floor, n_people=n_people)
+                    == index.candidates_mask(max_cost=max_cost, n_people=n_people))
+    assert index.cost_floor(-1, 2) == float('-inf')
+
+def test_cheapest_returns_the_lowest_costs_in_order():
+    index = IdeaIndex(make_ideas(1000))
+    mask = index.candidates_mask(location='home', n_people=2)
+    found = index.cheapest(mask, 2, 25)
+    expected = sorted(cost_per_person(index.slots[slot], 2) for slot in index.slots_of(mask))[:25]
+    assert [cost for cost, _ in found] == pytest.approx(expected)
+    assert all(mask >> slot & 1 for _, slot in found)
+
+@pytest.mark.parametrize("location", [None, 'home'])
+def test_choice_draws_uniformly_from_the_set(location):
+    index = IdeaIndex(make_ideas(400))
+    # A dense set uses rejection sampling, a sparse one the slot list
+    mask = index.candidates_mask(location=location, max_cost=300 if location else None, n_people=2)
+    members = {index.slots[slot].name for slot in index.slots_of(mask)}
+    rng = random.Random(4)
+    draws = Counter(index.choice(mask, rng).name for _ in range(200 * len(members)))
+    assert set(draws) == members
+    assert max(draws.values()) < 2 * min(draws.values())
+    assert index.choice(0, rng) is None
+
+def test_manager_samples_only_matching_ideas(make_manager):
+    manager = make_manager(500)
+    rng = random.Random(5)
+    for _ in range(100):
+        filters = random_filters(rng)
+        filters['n_people'] = filters['n_people'] or 2
+        filters['max_cost'] = 800 if filters['max_cost'] is None else filters['max_cost']
+        expected = {manager.ideas[slot].name for slot in brute_force(list(manager.ideas), **filters)}
+        idea = manager.sample_idea(**filters)
+        assert (idea is None) == (not expected)
+        assert idea is None or idea.name in expected
+    with pytest.raises(ValueError):
+        manager.sample_idea(max_cost=100)
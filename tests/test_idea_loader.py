@@ -0,0 +1,90 @@
+import dataclasses
+import json
+import os
+import pytest
+from benchmarks.synthetic import make_ideas
+from date_idea import DateIdea
+import idea_loader
+from idea_loader import IdeaFileError, cache_path, iter_records, load_ideas, save_ideas
+
+def write(path, text):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+def test_loads_what_json_loads(tmp_path):
+    ideas = make_ideas(300)
+    path = write(tmp_path / 'ideas.json', json.dumps([dataclasses.asdict(idea) for idea in ideas], indent=2))
+    assert load_ideas(path, use_cache=False) == [DateIdea(**record) for record in json.loads(open(path).read())]
+    # Small chunks make values straddle buffer refills
+    assert [DateIdea(*values) for values in iter_records(path, chunk_size=7)] == ideas
+
+def test_cache_is_used_and_invalidated(tmp_path):
+    ideas = make_ideas(20)
+    path = str(tmp_path / 'ideas.json')
+    save_ideas(path, ideas)
+    assert os.path.exists(cache_path(path))
+    assert load_ideas(path) == ideas
+    # A file changed behind the cache's back (size differs) is parsed again
+    changed = ideas[:5]
+    write(tmp_path / 'ideas.json', json.dumps([dataclasses.asdict(idea) for idea in changed]))
+    assert load_ideas(path) == changed
+    # A corrupt cache is ignored
+    with open(cache_path(path), 'wb') as f:
+        f.write(b'not a pickle')
+    assert load_ideas(path) == changed
+
+def test_save_ideas_round_trips(tmp_path):
+    ideas = make_ideas(50) + [DateIdea('Café ☕', ['gf'], ['outside'], [], 99.5, 2, 'per_person')]
+    path = str(tmp_path / 'ideas.json')
+    save_ideas(path, ideas)
+    os.remove(cache_path(path))
+    assert load_ideas(path) == ideas
+    assert not os.path.exists(path + '.tmp')
+
+def test_defaults_fill_missing_optional_fields(tmp_path):
+    path = write(tmp_path / 'ideas.json', '[{"name": "Walk", "liked_by": ["bf"], "location": ["outside"], '
+                                          '"cost": 0, "max_people": 2, "cost_type": "total"}]')
+    assert load_ideas(path, use_cache=False)[0].tags == []
+
+@pytest.mark.parametrize("text, line, field", [
+    ('[\n{"name": "A", "liked_by": [], "location": [], "tags": [], "cost": 1, "max_people": 2, "cost_type": "total"},\n'
+     '{"name": "B", "liked_by": "bf", "location": [], "tags": [], "cost": 1, "max_people": 2, "cost_type": "total"}\n]',
+     3, 'liked_by'),
+    ('[\n\n{"name": "A", "liked_by": [], "location": [], "tags": [], "cost": "1", "max_people": 2, "cost_type": "total"}]',
+     3, 'cost'),
+    ('[{"name": "A", "liked_by": [], "location": [], "tags": [], "cost": 1, "max_people": 2, "cost_type": "each"}]',
+     1, 'cost_type'),
+    ('[{"name": "A", "liked_by": [], "location": [], "tags": [], "cost": 1, "max_people": -1, "cost_type": "total"}]',
+     1, 'max_people'),
+    ('[{"name": "A", "colour": "red"}]', 1, None),
+    ('[{"name": "A"}]', 1, None),
+    ('[\n{"name": "A",\n "cost": }]', 3, None),
+    ('{"name": "A"}', 1, None),
+    ('[]\n[]', 2, None),
+])
+def test_errors_name_the_line(tmp_path, text, line, field):
+    path = write(tmp_path / 'ideas.json', text)
+    with pytest.raises(IdeaFileError) as raised:
+        load_ideas(path, use_cache=False)
+    assert raised.value.line == line and raised.value.field == field
+    assert str(raised.value).startswith(f"{path}:{line}: ")
+
+def test_values_cut_by_the_chunk_edge(tmp_path):
+    ideas = [DateIdea('Caf\u00e9 \\ "x"', ['gf'], ['home'], ['a'], cost, 2, 'total') for cost in (12.5, 1e-7, 1234.0625, 0)]
+    path = str(tmp_path / 'ideas.json')
+    save_ideas(path, ideas)
+    for chunk_size in range(1, 40):
+        assert [DateIdea(*values) for values in iter_records(path, chunk_size=chunk_size)] == ideas
+
+def test_early_errors_do_not_read_the_whole_file(tmp_path, monkeypatch):
+    records = [dataclasses.asdict(idea) for idea in make_ideas(20000)]
+    text = json.dumps(records, indent=2)
+    # A missing comma after the first idea's name
+    path = write(tmp_path / 'ideas.json', text.replace('",\n', '"\n', 1))
+    reads = []
+    more = idea_loader._StreamReader._more
+    monkeypatch.setattr(idea_loader._StreamReader, '_more', lambda self: reads.append(1) or more(self))
+    with pytest.raises(IdeaFileError) as raised:
+        load_ideas(path, use_cache=False)
+    assert raised.value.line == 4  # where the comma was expected
+    assert len(reads) <= 2 < len(text) >> 16
@@ -0,0 +1,65 @@
+import dataclasses
+import os
+import time
+import pytest
+from idea_loader import IdeaFileError, cache_path, load_ideas
+from idea_repository import IdeaRepository
+
+def test_ids_survive_position_changes(make_manager, tmp_path):
+    manager = make_manager(10)
+    repository = IdeaRepository(manager, str(tmp_path / 'ideas.json'), delay=60)
+    ids = [idea_id for idea_id, _ in repository.items()]
+    last = manager.ideas[9]
+    repository.delete(ids[0])
+    repository.delete(ids[4])
+    assert repository.get(ids[9]) == last
+    new_id = repository.add(dataclasses.replace(last, name="New"))
+    repository.update(ids[9], dataclasses.replace(last, name="Edited"))
+    assert repository.get(ids[9]).name == "Edited" and repository.get(new_id).name == "New"
+    assert [idea.name for _, idea in repository.items()] == [idea.name for idea in manager.ideas]
+    assert len(repository) == len(manager.ideas) == 9
+
+def test_writes_are_debounced(make_manager, tmp_path):
+    manager = make_manager(10)
+    path = str(tmp_path / 'ideas.json')
+    repository = IdeaRepository(manager, path, delay=0.05, max_delay=0.2)
+    first_id = next(iter(repository.items()))[0]
+    for i in range(5):
+        repository.update(first_id, dataclasses.replace(manager.ideas[0], name=f"Edit {i}"))
+    assert load_ideas(path)[0].name != "Edit 4"
+    deadline = time.monotonic() + 5
+    while load_ideas(path)[0].name != "Edit 4" and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert load_ideas(path)[0].name == "Edit 4"
+
+def test_flush_writes_pending_edits(make_manager, tmp_path):
+    manager = make_manager(10)
+    path = str(tmp_path / 'ideas.json')
+    repository = IdeaRepository(manager, path, delay=60)
+    with repository.batch():
+        for idea_id, idea in list(repository.items())[:3]:
+            repository.update(idea_id, dataclasses.replace(idea, name=idea.name + "!"))
+        repository.delete(next(iter(repository.items()))[0])
+    repository.close()
+    assert [idea.name for idea in load_ideas(path)] == [idea.name for idea in manager.ideas]
+    assert len(manager.ideas) == 9 and manager.ideas[0].name.endswith("!")
+
+@pytest.mark.parametrize("change", [{'max_people': -1}, {'cost_type': 'each'}, {'tags': 'outdoor'}, {'cost': '100'}])
+def test_invalid_ideas_are_rejected(make_manager, tmp_path, change):
+    manager = make_manager(10)
+    path = str(tmp_path / 'ideas.json')
+    repository = IdeaRepository(manager, path, delay=60)
+    first_id = next(iter(repository.items()))[0]
+    before = list(manager.ideas)
+    bad = dataclasses.replace(manager.ideas[0], **change)
+    with pytest.raises(IdeaFileError) as raised:
+        repository.add(bad)
+    assert raised.value.field == next(iter(change))
+    with pytest.raises(IdeaFileError):
+        repository.update(first_id, bad)
+    assert list(manager.ideas) == before and len(repository) == 10
+    repository.add(dataclasses.replace(bad, **{key: getattr(before[0], key) for key in change}))
+    repository.close()
+    # Parsed from the file, not the cache written alongside it
+    os.remove(cache_path(path))
+    assert load_ideas(path) == list(manager.ideas)
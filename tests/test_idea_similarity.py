@@ -0,0 +1,84 @@
+import dataclasses
+import threading
+import time
+from idea_similarity import SimilarityIndex, cost_bucket
+from date_idea import DateIdea
+
+def ranking(similarity, slot):
+    """Similarities in order, and the members ranked above the last similarity (ties at the cut may differ)."""
+    neighbors = [(round(sim, 9), member) for sim, member in similarity.neighbors(slot)]
+    cut = neighbors[-1][0] if neighbors else 0
+    return [sim for sim, _ in neighbors], {member for sim, member in neighbors if sim > cut}
+
+def test_cost_bucket():
+    assert cost_bucket(DateIdea("a", [], [], [], 0, 2, "total"), 2) == 0
+    # One bucket per doubling of the per-person cost: 1, 2-3, 4-7, ...
+    assert cost_bucket(DateIdea("a", [], [], [], 2, 2, "total"), 2) == 2
+    assert cost_bucket(DateIdea("a", [], [], [], 4, 2, "total"), 2) == 3
+    assert cost_bucket(DateIdea("a", [], [], [], 4, 2, "per_person"), 2) == 4
+
+def test_neighbors_share_features(make_manager):
+    manager = make_manager(300)
+    similarity = SimilarityIndex(manager.index)
+    idea = manager.index.slots[0]
+    for sim, member in similarity.neighbors(0):
+        other = manager.index.slots[member]
+        assert 0 < sim <= 1 + 1e-9 and member != 0
+        assert (set(idea.tags) & set(other.tags) or set(idea.location) & set(other.location)
+                or set(idea.liked_by) & set(other.liked_by)
+                or cost_bucket(idea, 2) == cost_bucket(other, 2))
+
+def test_incremental_updates_match_a_fresh_index(make_manager):
+    manager = make_manager(300)
+    similarity = SimilarityIndex(manager.index)
+    since = manager.snapshot().version
+    for slot in range(0, 300, 7):
+        similarity.neighbors(slot)
+    edited = set()
+    for position in range(0, 300, 11):
+        idea = manager.ideas[position]
+        manager.update_idea(position, dataclasses.replace(idea, tags=["puzzle", "food"], cost=idea.cost + 50))
+        edited.add(position)
+    manager.delete_idea(5)
+    manager.add_idea(DateIdea("New", ["bf"], ["home"], ["puzzle"], 10, 2, "total"))
+    snapshot = manager.snapshot()
+    similarity.update(snapshot.index, manager._catalog_edits(since, snapshot.version))
+    fresh = SimilarityIndex(snapshot.index)
+    for slot in range(0, 300, 7):
+        if snapshot.index.slots[slot] is not None:
+            assert ranking(similarity, slot) == ranking(fresh, slot)
+
+def test_similar_ideas_skips_tried_ideas(make_manager):
+    manager = make_manager(300)
+    first = manager.similar_ideas("Idea 0", k=5)
+    assert len(first) == 5 and all(idea.name != "Idea 0" for idea in first)
+    manager.record_date(first[0], n_people=2)
+    assert first[0] not in manager.similar_ideas("Idea 0", k=5)
+    assert first[0] in manager.similar_ideas("Idea 0", k=5, untried=False)
+
+def test_reads_during_catalog_edits(make_manager):
+    manager = make_manager(500)
+    errors = []
+    stop = time.monotonic() + 1.0
+
+    def read(sample):
+        while time.monotonic() < stop:
+            try:
+                if sample:
+                    manager.sample_idea(max_cost=500, n_people=2)
+                else:
+                    manager.similar_ideas("Idea 5", k=5)
+            except Exception as e:
+                errors.append(e)
+                return
+    readers = [threading.Thread(target=read, args=(k % 2,)) for k in range(3)]
+    for reader in readers:
+        reader.start()
+    position = 0
+    while time.monotonic() < stop:
+        idea = manager.ideas[position % 500]
+        manager.update_idea(position % 500, dataclasses.replace(idea, cost=position % 700))
+        position += 1
+    for reader in readers:
+        reader.join()
+    assert not errors
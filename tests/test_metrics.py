@@ -0,0 +1,76 @@
+import json
+import urllib.request
+import pytest
+from metrics import JsonLinesSink, Metrics, MetricsServer, RingBufferSink, Stat, configure
+
+def test_disabled_registry_records_nothing():
+    registry = Metrics()
+    calls = []
+    work = registry.timed('work')(lambda x: calls.append(x) or x * 2)
+    assert work(3) == 6 and calls == [3]
+    with registry.span('block'):
+        pass
+    registry.count('events')
+    assert registry.snapshot() == {} and registry.counters == {}
+
+def test_spans_and_counters_reach_the_sinks(tmp_path):
+    registry = Metrics()
+    ring, jsonl = RingBufferSink(size=3), JsonLinesSink(str(tmp_path / 'metrics.jsonl'), flush_every=1000)
+    registry.enable(ring, jsonl)
+    work = registry.timed('work')(lambda: None)
+    for _ in range(4):
+        work()
+    with registry.span('block'):
+        pass
+    registry.count('events', 2)
+    snapshot = registry.snapshot()
+    assert snapshot['work']['count'] == 4 and snapshot['block']['count'] == 1
+    assert 0 <= snapshot['work']['p50'] <= snapshot['work']['max']
+    assert registry.counters == {'events': 2}
+    # The ring keeps only the newest events
+    assert [event['name'] for event in ring.events] == ['work', 'block', 'events']
+    registry.disable()
+    events = [json.loads(line) for line in open(tmp_path / 'metrics.jsonl')]
+    assert [event['name'] for event in events] == ['work'] * 4 + ['block', 'events']
+    assert events[-1]['value'] == 2 and 'seconds' in events[0]
+    assert not registry.enabled and registry.sinks == []
+
+def test_stat_percentiles():
+    stat = Stat(recent=100)
+    assert stat.percentile(50) == 0.0
+    for i in range(1, 201):
+        stat.add(i / 1000)
+    assert stat.count == 200 and stat.max == 0.2 and stat.total == pytest.approx(20.1)
+    # Only the most recent 100 durations count towards the percentiles
+    assert stat.percentile(0) == 0.101 and stat.percentile(50) == 0.151 and stat.percentile(100) == 0.2
+
+def test_prometheus_text_and_server():
+    registry = Metrics()
+    registry.enable()
+    registry.observe('idea.sample', 0.25)
+    registry.count('cache.hit', 3)
+    text = registry.prometheus_text()
+    assert 'datepicker_span_seconds{name="idea.sample",quantile="0.5"} 0.250000000' in text
+    assert 'datepicker_span_seconds_count{name="idea.sample"} 1' in text
+    assert 'datepicker_events_total{name="cache.hit"} 3' in text
+    server = MetricsServer(registry, port=0)
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/metrics', timeout=5) as response:
+            assert response.read().decode('utf-8') == registry.prometheus_text()
+    finally:
+        server.close()
+
+def test_configure_parses_the_spec(tmp_path, monkeypatch):
+    registry = Metrics()
+    monkeypatch.delenv('DATEPICKER_METRICS', raising=False)
+    assert configure(registry=registry) is None and not registry.enabled
+    assert configure('ring=5,jsonl=' + str(tmp_path / 'm.jsonl'), registry=registry) is None
+    assert registry.enabled and [type(sink) for sink in registry.sinks] == [RingBufferSink, JsonLinesSink]
+    assert registry.sinks[0].events.maxlen == 5
+    registry.disable()
+    monkeypatch.setenv('DATEPICKER_METRICS', 'on')
+    assert configure(registry=registry) is None and registry.enabled and registry.sinks == []
+    registry.disable()
+    for spec in ('jsonl', 'graphite=1'):
+        with pytest.raises(ValueError):
+            configure(spec, registry=Metrics())
@@ -0,0 +1,99 @@
+import random
+from collections import Counter
+import pytest
+from benchmarks.synthetic import make_history, make_ideas
+from date_stats import DateStats
+from idea_index import IdeaIndex
+from novelty_sampler import FenwickTree, NoveltySampler
+
+def test_fenwick_tree_matches_sums():
+    rng = random.Random(1)
+    weights = [rng.choice([0.0, rng.random() * 10]) for _ in range(300)]
+    tree = FenwickTree(weights)
+    for _ in range(200):
+        i = rng.randrange(len(weights))
+        weights[i] = rng.choice([0.0, rng.random() * 10])
+        tree.set(i, weights[i])
+    for count in range(len(weights) + 1):
+        assert tree.prefix_sum(count) == pytest.approx(sum(weights[:count]))
+    for _ in range(500):
+        target = rng.random() * tree.total()
+        found = tree.find(target)
+        assert weights[found] > 0
+        assert sum(weights[:found]) <= target + 1e-9 <= sum(weights[:found + 1]) + 2e-9
+
+def make_sampler(ideas, history, stats, **kwargs):
+    index = IdeaIndex(ideas)
+    first = {}
+    for slot, idea in enumerate(ideas):
+        first.setdefault(idea.name, slot)
+    return NoveltySampler(index, stats, first.get, history, **kwargs)
+
+def test_recording_matches_a_rebuild():
+    ideas = make_ideas(200)
+    history = make_history(ideas, 300)
+    stats = DateStats("unused", {idea.name: idea for idea in ideas}.get)
+    stats.rebuild(history)
+    # Boosts come from the same stats, so only the incremental recency updates differ
+    sampler = make_sampler(ideas, history[:250], stats, window=7, refresh_every=0)
+    for entry in history[250:]:
+        sampler.record(entry)
+    fresh = make_sampler(ideas, history, stats, window=7, refresh_every=0)
+    assert sampler.tree.weights == pytest.approx(fresh.tree.weights)
+    assert sampler.tree.total() == pytest.approx(fresh.tree.total())
+
+def test_recent_and_overused_ideas_weigh_less():
+    ideas = make_ideas(50)
+    history = [{'activity_name': ideas[0].name}] * 5
+    stats = DateStats("unused", {idea.name: idea for idea in ideas}.get)
+    stats.rebuild(history)
+    sampler = make_sampler(ideas, history, stats, window=10)
+    same = [slot for slot, idea in enumerate(ideas) if idea.location == ideas[0].location and idea.tags == ideas[0].tags
+            and idea.liked_by == ideas[0].liked_by and slot != 0]
+    assert same
+    # Ideas sharing every value carry the same boost, so only recency sets them apart
+    for slot in same:
+        assert sampler.tree.weights[0] < sampler.tree.weights[slot]
+    # Values used by the history are boosted less than unused ones
+    unused = [slot for slot, idea in enumerate(ideas) if not set(idea.tags) & set(ideas[0].tags)
+              and not set(idea.location) & set(ideas[0].location)]
+    assert unused and all(sampler.tree.weights[slot] > sampler.tree.weights[same[0]] for slot in unused)
+
+def test_sample_respects_mask_and_restores_weights():
+    ideas = make_ideas(300)
+    history = make_history(ideas, 100)
+    stats = DateStats("unused", {idea.name: idea for idea in ideas}.get)
+    stats.rebuild(history)
+    sampler = make_sampler(ideas, history, stats)
+    weights = list(sampler.tree.weights)
+    mask = sampler.index.candidates_mask(location='home', max_cost=500, n_people=2)
+    members = set(sampler.index.slots_of(mask))
+    drawn = sampler.sample(len(members) + 10, mask, random.Random(2))
+    assert sorted(drawn) == sorted(slot for slot in members if weights[slot] > 0)
+    assert sampler.tree.weights == weights
+    assert set(sampler.sample(50, mask, random.Random(3), replace=True)) <= members
+    # A mask shorter than the catalog leaves every higher slot out
+    low = min(slot for slot in members if weights[slot] > 0)
+    assert set(sampler.sample(20, 1 << low, random.Random(4), replace=True)) == {low}
+
+def test_draws_follow_the_weights():
+    ideas = make_ideas(5)
+    stats = DateStats("unused")
+    sampler = make_sampler(ideas, [], stats)
+    for slot, weight in enumerate([1.0, 2.0, 0.0, 3.0, 4.0]):
+        sampler.tree.set(slot, weight)
+    rng = random.Random(4)
+    draws = Counter(sampler.choice(rng=rng) for _ in range(20000))
+    assert 2 not in draws
+    for slot, weight in ((0, 1.0), (1, 2.0), (3, 3.0), (4, 4.0)):
+        assert draws[slot] / 20000 == pytest.approx(weight / 10, abs=0.015)
+
+def test_weighted_manager_sampling_respects_filters(make_manager):
+    manager = make_manager(300)
+    for idea in list(manager.ideas)[:20]:
+        manager.record_date(idea, date='2025-01-01', n_people=2)
+    for _ in range(50):
+        idea = manager.sample_idea(location='home', max_cost=500, n_people=2, weighted=True)
+        assert 'home' in idea.location and idea.max_people >= 2
+    drawn = manager.sample_ideas(30, location='home', max_cost=500, n_people=2, weighted=True, seed=1)
+    assert len({idea.name for idea in drawn}) == len(drawn)
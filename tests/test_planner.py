@@ -0,0 +1,58 @@
+import random
+from collections import Counter
+import pytest
+from date_manager import cost_per_person
+from planner import _candidate_pool, plan_itinerary
+
+@pytest.mark.parametrize("budget", [0, 300, 2500, 20000])
+def test_plan_stays_within_budget(make_manager, budget):
+    manager = make_manager(2000)
+    plan = plan_itinerary(manager, 8, budget, 2, timeout=None)
+    assert plan.total_cost <= budget + 1e-9
+    assert len(plan.ideas) <= 8
+    assert plan.costs == [cost_per_person(idea, 2) for idea in plan.ideas]
+    assert sum(plan.costs) == pytest.approx(plan.total_cost)
+
+def test_max_cost_caps_each_date(make_manager):
+    manager = make_manager(2000)
+    plan = plan_itinerary(manager, 6, 10000, 2, max_cost=800, timeout=None)
+    assert plan.ideas and all(cost <= 800 for cost in plan.costs)
+
+def test_no_repeats_unless_allowed(make_manager):
+    manager = make_manager(50)
+    plan = plan_itinerary(manager, 20, 100000, 2, timeout=None)
+    assert len({idea.name for idea in plan.ideas}) == len(plan.ideas)
+    plan = plan_itinerary(manager, 60, 10 ** 9, 2, allow_repeats=True, timeout=None)
+    assert len(plan.ideas) == 60
+
+def test_max_per_location(make_manager):
+    manager = make_manager(2000)
+    plan = plan_itinerary(manager, 8, 50000, 2, max_per_location=2, timeout=None)
+    counts = Counter(location for idea in plan.ideas for location in set(idea.location))
+    assert plan.ideas and max(counts.values()) <= 2
+
+def test_invalid_arguments(make_manager):
+    manager = make_manager(50)
+    with pytest.raises(ValueError):
+        plan_itinerary(manager, 3, None, 2)
+    with pytest.raises(ValueError):
+        plan_itinerary(manager, 3, 100, 0)
+    with pytest.raises(ValueError):
+        plan_itinerary(manager, 3, 100, 2, repeat_penalty=0)
+
+def test_uniform_pool_is_drawn_at_random(make_manager):
+    manager = make_manager(3000)
+    index = manager.snapshot().index
+
+    def pool_slots(seed):
+        pool = _candidate_pool(manager, 2, 10 ** 9, None, None, None, False, 300, random.Random(seed))
+        return sorted(index.slots.index(idea) for idea in pool.ideas)
+    slots = pool_slots(1)
+    assert slots == pool_slots(1) and slots != pool_slots(2)
+    # Not just the lowest slot ids
+    assert slots[-1] > 1500
+
+def test_uniform_plan_is_reproducible_with_a_seed(make_manager):
+    manager = make_manager(3000)
+    plans = [plan_itinerary(manager, 5, 50000, 2, novelty=False, seed=7, timeout=None) for _ in range(2)]
+    assert [idea.name for idea in plans[0].ideas] == [idea.name for idea in plans[1].ideas]
@@ -0,0 +1,51 @@
+import dataclasses
+import pytest
+from benchmarks.synthetic import make_history, make_ideas
+from date_history import DateHistory
+from screen_lists import HistoryPager, editor_fields, idea_from_fields, idea_row, idea_rows
+
+def test_pages_run_newest_first_until_the_history_ends(tmp_path):
+    ideas = make_ideas(50)
+    history = DateHistory(str(tmp_path / 'history.jsonl'))
+    for entry in make_history(ideas, 250):
+        history.add_entry(entry['activity_name'], entry['date'], entry.get('cost_per_person'))
+    pager = HistoryPager(page_size=100)
+    view = history.view()
+    rows = pager.open(view)
+    # Opening the same history again keeps the rows already shown
+    assert pager.open(history.view()) is None
+    while True:
+        page = pager.next_page()
+        if not page:
+            break
+        rows += page
+    assert [len(page) for page in (rows[:100], rows[100:200], rows[200:])] == [100, 100, 50]
+    assert rows[0]['markup'] and view[-1]['activity_name'] in rows[0]['text'] and view[-1]['date'] in rows[0]['text']
+    assert view[0]['activity_name'] in rows[-1]['text']
+    # A date recorded while scrolling does not shift the pages; the next open shows it
+    pager = HistoryPager(page_size=100)
+    pager.open(view)
+    pager.next_page()
+    history.add_entry('Recorded meanwhile', '2030-01-01')
+    assert pager.next_page() == rows[200:] and pager.next_page() == []
+    assert 'Recorded meanwhile' in pager.open(history.view())[0]['text']
+    history.clear()
+    assert pager.open(history.view()) == [{'text': 'No history yet.'}] and pager.next_page() == []
+    history.close()
+
+def test_editor_fields_round_trip_every_idea():
+    ideas = make_ideas(200)
+    for idea in ideas:
+        fields = editor_fields(idea)
+        assert idea_from_fields(fields) == idea
+    both = dataclasses.replace(ideas[0], liked_by=['gf', 'bf'], location=['home', 'outside'])
+    assert editor_fields(both)['liked_by'] == editor_fields(both)['location'] == 'both'
+    blank = dict(editor_fields(ideas[0]), cost='', max_people='', tags=' a, ,b ')
+    assert (idea_from_fields(blank).cost, idea_from_fields(blank).max_people, idea_from_fields(blank).tags) == (0.0, 1, ['a', 'b'])
+    with pytest.raises(ValueError):
+        idea_from_fields(dict(blank, cost='1.2.3'))
+
+def test_idea_rows_follow_the_repository_ids():
+    ideas = make_ideas(3)
+    assert idea_rows(enumerate(ideas)) == [{'idea_id': i, 'idea': idea} for i, idea in enumerate(ideas)]
+    assert idea_row(7, ideas[0], 'Saved!') == {'idea_id': 7, 'idea': ideas[0], 'status': 'Saved!'}
@@ -0,0 +1,35 @@
+import pytest
+from simulator import simulate_budget
+
+def test_months_stay_within_budget(make_manager):
+    manager = make_manager(500)
+    result = simulate_budget(manager, 2000, 2, sessions=3000, max_dates=6, workers=1, chunk_size=1000)
+    assert result.sessions == 3000
+    assert 0 <= result.min_spend <= result.mean_spend <= result.max_spend <= 2000
+    assert max(result.dates_distribution) <= 6 and sum(result.dates_distribution.values()) == 3000
+    assert sum(result.spend_histogram.values()) == 3000
+    assert result.mean_dates == pytest.approx(sum(k * v for k, v in result.dates_distribution.items()) / 3000)
+    assert result.spend_percentile(50) <= result.spend_percentile(90) <= result.max_spend
+    assert all(0 < share <= 1 for share in result.coverage.values())
+
+def test_results_do_not_depend_on_workers(make_manager):
+    manager = make_manager(300)
+    options = dict(sessions=4000, seed=7, chunk_size=1000)
+    assert simulate_budget(manager, 1500, 2, workers=1, **options) == simulate_budget(manager, 1500, 2, workers=2, **options)
+    assert simulate_budget(manager, 1500, 2, workers=1, **options) != simulate_budget(manager, 1500, 2, workers=1,
+                                                                                     sessions=4000, seed=8, chunk_size=1000)
+
+def test_repeats_and_small_budgets(make_manager):
+    manager = make_manager(300)
+    free = len(manager.index.slots_of(manager.index.candidates_mask(location='home', max_cost=0, n_people=2)))
+    assert 0 < free < 20
+    # Every free idea fits any budget, so without repeats each month runs out of ideas at exactly `free`
+    result = simulate_budget(manager, 100, 2, location='home', max_cost=0, sessions=500, max_dates=free + 3, workers=1)
+    assert result.dates_distribution == {free: 500} and result.max_spend == 0
+    assert len(result.coverage) == free and all(share == 1 for share in result.coverage.values())
+    repeated = simulate_budget(manager, 100, 2, location='home', max_cost=0, sessions=500, max_dates=free + 3,
+                               allow_repeats=True, workers=1)
+    assert repeated.dates_distribution == {free + 3: 500}
+    assert simulate_budget(manager, 0, 2, sessions=10, workers=1).max_spend == 0
+    with pytest.raises(ValueError):
+        simulate_budget(manager, 100, 2, sessions=0)
@@ -0,0 +1,89 @@
+import dataclasses
+import json
+import random
+import pytest
+from analytics import IdeaFrames, count_stats
+from benchmarks.synthetic import make_history, make_ideas
+from date_manager import DateIdeaManager
+from idea_index import IdeaIndex
+from sqlite_store import migrate
+
+@pytest.fixture
+def database(tmp_path):
+    ideas = make_ideas(400)
+    # Duplicate names count towards the first idea, as in the JSON backend
+    ideas.append(dataclasses.replace(ideas[3], location=['nowhere']))
+    history = make_history(ideas, 600)
+    ideas_path, history_path = tmp_path / 'ideas.json', tmp_path / 'history.json'
+    ideas_path.write_text(json.dumps([dataclasses.asdict(idea) for idea in ideas]))
+    history_path.write_text(json.dumps(history))
+    db_path = str(tmp_path / 'dates.db')
+    assert migrate(str(ideas_path), str(history_path), db_path) == (len(ideas), len(history))
+    return db_path, ideas, history
+
+def close_manager(manager):
+    manager.history.close()
+    manager.store.close()
+
+def test_migrate_refuses_to_overwrite(database, tmp_path):
+    db_path, _, _ = database
+    with pytest.raises(ValueError):
+        migrate(str(tmp_path / 'ideas.json'), str(tmp_path / 'history.json'), db_path)
+    assert migrate(str(tmp_path / 'ideas.json'), str(tmp_path / 'history.json'), db_path, replace=True)[0] == 401
+
+def test_sql_filters_match_the_index(database):
+    db_path, ideas, _ = database
+    manager = DateIdeaManager(db_path)
+    index = IdeaIndex(ideas)
+    rng = random.Random(1)
+    for _ in range(100):
+        filters = dict(liked_by=rng.choice([None, 'bf', 'gf']), location=rng.choice([None, 'home', 'outside']),
+                       max_cost=rng.choice([None, 100, 500, 2000]), n_people=rng.choice([None, 0, 1, 2, 6]))
+        expected = index.slots_of(index.candidates_mask(**filters))
+        # Ideas were imported in order, so id - 1 is the catalog position
+        assert [idea_id - 1 for idea_id in manager.store.candidate_ids(**filters)] == expected
+        idea = manager.store.sample_idea(rng, **filters)
+        assert (idea is None) == (not expected)
+        assert idea is None or idea in [ideas[slot] for slot in expected]
+    close_manager(manager)
+
+def test_counts_match_the_pandas_analysis(database):
+    db_path, ideas, history = database
+    manager = DateIdeaManager(db_path)
+    assert manager.store.count_stats() == count_stats(IdeaFrames(ideas), history)
+    close_manager(manager)
+
+def test_edits_and_history_persist(database):
+    db_path, ideas, history = database
+    manager = DateIdeaManager(db_path)
+    assert list(manager.ideas) == ideas and list(manager.history.view()) == history
+    manager.update_idea(0, dataclasses.replace(ideas[0], name="Renamed"))
+    manager.delete_idea(1)
+    manager.add_idea(dataclasses.replace(ideas[2], name="Added"))
+    manager.record_date(manager.ideas[0], date="2030-01-01", n_people=2)
+    expected_ideas = list(manager.ideas)
+    close_manager(manager)
+    manager = DateIdeaManager(db_path)
+    assert list(manager.ideas) == expected_ideas
+    assert manager.history.view()[-1]["activity_name"] == "Renamed"
+    assert manager.sample_ideas(5, location='nowhere', max_cost=10 ** 6, n_people=1) == [ideas[-1]]
+    close_manager(manager)
+
+def test_samples_are_uniform_across_deleted_ids(database):
+    db_path, ideas, _ = database
+    manager = DateIdeaManager(db_path)
+    for position in range(0, 300, 2):
+        manager.delete_idea(position // 2)
+    kept = {(idea.name, tuple(idea.location)) for idea in manager.ideas}
+    rng = random.Random(3)
+    counts = {}
+    for _ in range(5000):
+        idea = manager.store.sample_idea(rng)
+        key = (idea.name, tuple(idea.location))
+        counts[key] = counts.get(key, 0) + 1
+    assert set(counts) == kept
+    # 251 ideas share 5000 draws, about 20 each; ideas right after a gap must not get a double share
+    assert max(counts.values()) < 45
+    # A filter matching a single idea is found through the fallback listing
+    assert manager.store.sample_idea(rng, location='nowhere') == ideas[-1]
+    close_manager(manager)
@@ -0,0 +1,6 @@
+from benchmarks.bench_startup import DEFERRED, STARTUP_MODULES, import_times
+
+def test_startup_modules_defer_heavy_imports():
+    _, imported = import_times(STARTUP_MODULES)
+    assert set(STARTUP_MODULES) <= imported
+    assert not imported & set(DEFERRED)